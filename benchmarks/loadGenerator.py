@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+""" loadGenerator.py
+
+    Sends requests to a running `classicCiphers.py serve` from many
+    concurrent connections and reports the requests per second and
+    the p50 and p99 latencies.
+
+    Usage:
+        python benchmarks/loadGenerator.py --connections 50 --requests 200
+
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+import click
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import cipherServer
+
+async def runConnection(host, port, unixPath, requests, payload, cipherName, key, latencies):
+	""" Sends requests one after another on one connection, timing each. """
+	if unixPath is not None:
+		reader, writer = await asyncio.open_unix_connection(unixPath)
+	else:
+		reader, writer = await asyncio.open_connection(host, port)
+	for i in range(0, requests):
+		start = time.perf_counter()
+		await cipherServer.request(reader, writer, cipherName, 'encrypt', key, payload)
+		latencies.append(time.perf_counter() - start)
+	writer.close()
+	await writer.wait_closed()
+
+async def runLoad(host, port, unixPath, connections, requests, payload, cipherName, key):
+	""" Runs all the connections at once and returns the latencies and elapsed time. """
+	latencies = []
+	start = time.perf_counter()
+	await asyncio.gather(*[runConnection(host, port, unixPath, requests, payload, cipherName, key,
+		latencies) for connection in range(0, connections)])
+	return latencies, time.perf_counter() - start
+
+def percentile(values, fraction):
+	""" Returns the value below which the given fraction of the sorted values fall. """
+	return values[min(len(values) - 1, int(fraction * len(values)))]
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', type=int, default=8750, show_default=True)
+@click.option('--unix', 'unix_path', type=click.Path(), help='Connect to this Unix socket instead')
+@click.option('-c', '--connections', type=click.IntRange(min=1), default=50, show_default=True)
+@click.option('-n', '--requests', type=click.IntRange(min=1), default=200, show_default=True,
+	help='The number of requests per connection')
+@click.option('--size', type=click.IntRange(min=0), default=1024, show_default=True,
+	help='The payload size in bytes')
+@click.option('--cipher', 'cipher_name', default='vigenere', show_default=True)
+@click.option('--key', default='point', show_default=True)
+def main(host, port, unix_path, connections, requests, size, cipher_name, key):
+	""" Measures the throughput and latency of a cipher server. """
+	random.seed(0)
+	payload = bytes(random.choice(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ ') for i in range(0, size))
+	latencies, elapsed = asyncio.run(runLoad(host, port, unix_path, connections, requests,
+		payload, cipher_name, key))
+	latencies.sort()
+	print("Requests: %d in %.2f s (%.0f requests/s)" % (len(latencies), elapsed, len(latencies) / elapsed))
+	print("Latency p50: %.2f ms, p99: %.2f ms" % (percentile(latencies, 0.50) * 1000,
+		percentile(latencies, 0.99) * 1000))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+""" startup.py
+
+    Measures how long the command-line tool takes to start, for batch
+    scripts that run it thousands of times on small files. It times
+    a bare interpreter, importing classicCiphers (with the breakdown
+    of python -X importtime), the fast encrypt path, run as a script
+    and with python -m, and the full click interface, each as the
+    median of separate processes. It fails with exit status 1 when
+    the fast path run with python -m or the import exceeds its budget
+    over the bare interpreter, or when importing classicCiphers loads
+    a module it should only load on demand. The bytecode of the
+    imported modules is cached in a temporary directory, as it is in
+    a normal installation, so that compiling them is not timed.
+
+    Usage:
+        python benchmarks/startup.py
+        python benchmarks/startup.py --runs 50 --budget 10 --import-budget 10
+
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SCRIPT = os.path.join(ROOT, 'classicCiphers.py')
+
+# Modules that importing classicCiphers must not load
+LAZY_MODULES = ['click', 'numpy', 'concurrent.futures', 'mmap']
+
+def cachingEnvironment(directory):
+	""" Returns the environment of the timed processes, caching bytecode in the directory. """
+	environment = dict(os.environ)
+	environment.pop('PYTHONDONTWRITEBYTECODE', None)
+	environment['PYTHONPYCACHEPREFIX'] = directory
+	return environment
+
+def timeRuns(command, runs, environment):
+	""" 
+	    Returns the median wall time of runs processes running the
+	    command, in milliseconds, after an untimed run filling the
+	    bytecode cache.
+
+	"""
+	times = []
+	for i in range(0, runs + 1):
+		start = time.perf_counter()
+		subprocess.run(command, cwd=ROOT, env=environment, check=True, stdout=subprocess.DEVNULL)
+		times.append((time.perf_counter() - start) * 1000)
+	return statistics.median(times[1:])
+
+def slowestImports(count, environment):
+	"""
+	    Returns the count slowest modules imported by classicCiphers,
+	    as (cumulative milliseconds, module) pairs, from the report of
+	    python -X importtime.
+
+	"""
+	report = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import classicCiphers'],
+		cwd=ROOT, env=environment, check=True, stderr=subprocess.PIPE, universal_newlines=True).stderr
+	imports = []
+	for line in report.splitlines():
+		fields = line.split('|')
+		if len(fields) == 3 and fields[1].strip().isdigit():
+			imports.append((int(fields[1]) / 1000, fields[2].strip()))
+	return sorted(imports, reverse=True)[:count]
+
+def loadedLazyModules():
+	""" Returns the modules of LAZY_MODULES loaded by importing classicCiphers. """
+	code = 'import sys, classicCiphers; print(" ".join(m for m in %r if m in sys.modules))' % LAZY_MODULES
+	return subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+		stdout=subprocess.PIPE, universal_newlines=True).stdout.split()
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('--runs', type=click.IntRange(min=1), default=20, show_default=True,
+	help='The number of processes timed for each command')
+@click.option('--budget', type=float, default=20, show_default=True,
+	help='The milliseconds the fast encrypt path run with python -m may take over a bare interpreter')
+@click.option('--import-budget', type=float, default=20, show_default=True,
+	help='The milliseconds importing classicCiphers may take over a bare interpreter')
+@click.option('--top', type=click.IntRange(min=0), default=8, show_default=True,
+	help='The number of slowest imports to list')
+def main(runs, budget, import_budget, top):
+	""" Measures the startup time of the command-line tool. """
+	with tempfile.TemporaryDirectory() as directory:
+		inputPath = os.path.join(directory, 'input.txt')
+		outputPath = os.path.join(directory, 'output.txt')
+		with open(inputPath, 'w') as file:
+			file.write('Attack at dawn\n')
+		open(outputPath, 'w').close()
+
+		environment = cachingEnvironment(directory)
+
+		bare = timeRuns([sys.executable, '-c', 'pass'], runs, environment)
+		imported = timeRuns([sys.executable, '-c', 'import classicCiphers'], runs, environment)
+		script = timeRuns([sys.executable, SCRIPT, 'encrypt', '-c', '-k', '3', inputPath, outputPath],
+			runs, environment)
+		# A module run with -m is not compiled again on every run, unlike a script
+		fast = timeRuns([sys.executable, '-m', 'classicCiphers', 'encrypt', '-c', '-k', '3', inputPath,
+			outputPath], runs, environment)
+		# --chunk-size is not handled by the fast path, so click is used
+		full = timeRuns([sys.executable, SCRIPT, 'encrypt', '-c', '-k', '3', '--chunk-size', '4096',
+			inputPath, outputPath], runs, environment)
+		slowest = slowestImports(top, environment)
+
+	print("%-28s %10s %10s" % ("run", "ms", "over bare"))
+	for name, milliseconds in (('bare interpreter', bare), ('import classicCiphers', imported),
+			('encrypt, fast path script', script), ('encrypt, fast path -m', fast),
+			('encrypt, click interface', full)):
+		print("%-28s %10.1f %10.1f" % (name, milliseconds, milliseconds - bare))
+
+	if top:
+		print("\nSlowest imports of classicCiphers (cumulative ms):")
+		for milliseconds, module in slowest:
+			print("%10.2f  %s" % (milliseconds, module))
+
+	failures = []
+	if fast - bare > budget:
+		failures.append("the fast path with python -m takes %.1f ms over the budget of %.1f ms"
+			% (fast - bare, budget))
+	if imported - bare > import_budget:
+		failures.append("importing classicCiphers takes %.1f ms over the budget of %.1f ms"
+			% (imported - bare, import_budget))
+	loaded = loadedLazyModules()
+	if loaded:
+		failures.append("importing classicCiphers loads %s" % ', '.join(loaded))
+	for failure in failures:
+		print("FAILED: %s" % failure)
+	if failures:
+		sys.exit(1)
+	print("\nWithin the startup budget")
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+""" substitution.py
+
+    Compares the throughput of the translation-table engine used by
+    the monoalphabetic ciphers (Caesar, Affine, Atbash and Simple
+    Substitution) against the original per-character loop, which
+    searched the letters list and wrote one character at a time.
+
+    Usage:
+        python benchmarks/substitution.py [SIZE_IN_MB]
+
+"""
+
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from classicCiphers import Cipher, CaesarCipher, AffineCipher, AtbashCipher, SimpleSubstitutionCipher
+
+def legacyEncipher(cipher, oldFileText, file):
+	""" The per-character loop that the ciphers used before the tables. """
+	letters = Cipher.letters
+	alphabet = cipher.cipherAlphabet()
+	for c in oldFileText:
+		newChar = c
+		if c in letters:
+			newChar = alphabet[letters.index(c)]
+		file.write(newChar)
+
+def tableEncipher(cipher, oldFileText, file):
+	""" The translation-table engine. """
+	cipher.buildTables()
+	file.write(oldFileText.translate(cipher.encryptTable))
+
+def timeRun(function, cipher, text):
+	""" Returns the throughput of function over text in MB/s. """
+	file = io.StringIO()
+	start = time.perf_counter()
+	function(cipher, text, file)
+	elapsed = time.perf_counter() - start
+	return len(text) / elapsed / 1e6
+
+def main():
+	sizeInMB = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+	random.seed(0)
+	alphabet = ''.join(Cipher.letters) + ' ' * 6 + '.,\n'
+	text = ''.join(random.choice(alphabet) for _ in range(int(sizeInMB * 1e6)))
+
+	caesar = CaesarCipher(3)
+	caesar.shift = 3
+	affine = AffineCipher(5, 8)
+	substitution = SimpleSubstitutionCipher(None)
+	substitution.keyAlpha = list('QWERTYUIOPASDFGHJKLZXCVBNM')
+	ciphers = [caesar, affine, AtbashCipher(), substitution]
+
+	print("%-26s %12s %12s %9s" % ("cipher", "loop MB/s", "table MB/s", "speedup"))
+	for cipher in ciphers:
+		loop = timeRun(legacyEncipher, cipher, text)
+		table = timeRun(tableEncipher, cipher, text)
+		print("%-26s %12.2f %12.2f %8.1fx" % (type(cipher).__name__, loop, table, table / loop))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+""" suite.py
+
+    Benchmarks encryption and decryption with all six ciphers over a
+    range of input sizes and shares of letters in the text. For each
+    run it reports the throughput in MB/s, the overhead per character
+    in nanoseconds and the peak memory allocated, and saves the
+    results as JSON. Given a baseline from an earlier run, it fails
+    with exit status 1 when any throughput dropped by more than the
+    tolerance.
+
+    Usage:
+        python benchmarks/suite.py --sizes 1K,1M,64M --output results.json
+        python benchmarks/suite.py --baseline results.json
+
+"""
+
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import click
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import classicCiphers
+
+# The key used to benchmark each cipher
+KEYS = {
+	'caesar': 3,
+	'vigenere': 'POINT',
+	'affine': (3, 11),
+	'atbash': None,
+	'substitution': 'QWERTYUIOPASDFGHJKLZXCVBNM',
+	'transposition': 'ZEBRAS',
+}
+
+UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+# Size of the random block repeated to build the larger inputs
+BLOCK_SIZE = 1024 * 1024
+
+def parseSize(size):
+	""" Returns the number of characters in a size such as 1K, 16M or 1G. """
+	size = size.strip().upper()
+	if size[-1] in UNITS:
+		return int(size[:-1]) * UNITS[size[-1]]
+	return int(size)
+
+def makeText(size, letterRatio, rng):
+	""" 
+	    Returns size characters, of which the share letterRatio are
+	    letters and the rest spaces, punctuation and digits. A random
+	    block is repeated to build inputs larger than BLOCK_SIZE.
+
+	"""
+	letters = ''.join(classicCiphers.Cipher.letters)
+	others = ' .,\n0123456789'
+	blockSize = min(size, BLOCK_SIZE)
+	block = ''.join(rng.choice(letters) if rng.random() < letterRatio else rng.choice(others)
+		for i in range(0, blockSize))
+	return (block * (size // blockSize + 1))[:size]
+
+def measure(transform, text, repeat, traceMemory):
+	""" 
+	    Returns the best time of repeat runs of transform on the text,
+	    and the peak memory allocated by one more traced run.
+
+	"""
+	best = float('inf')
+	for i in range(0, repeat):
+		start = time.perf_counter()
+		transform(text)
+		best = min(best, time.perf_counter() - start)
+	peakMemory = None
+	if traceMemory:
+		tracemalloc.start()
+		transform(text)
+		peakMemory = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	return best, peakMemory
+
+def compare(results, baseline, tolerance):
+	""" 
+	    Prints every run whose throughput fell below the baseline by
+	    more than the tolerance, and returns how many there were.
+
+	"""
+	previous = {result['name']: result for result in baseline['results']}
+	regressions = 0
+	for result in results:
+		before = previous.get(result['name'])
+		if before is not None and result['mbPerSecond'] < before['mbPerSecond'] * (1 - tolerance):
+			regressions += 1
+			print("REGRESSION %s: %.2f MB/s, baseline %.2f MB/s" % (result['name'],
+				result['mbPerSecond'], before['mbPerSecond']))
+	return regressions
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('--sizes', default='1K,1M,16M', show_default=True,
+	help='Comma-separated input sizes, with an optional K, M or G suffix')
+@click.option('--ratios', default='1.0,0.8,0.5', show_default=True,
+	help='Comma-separated shares of letters in the input')
+@click.option('--ciphers', default=','.join(KEYS), show_default=True,
+	help='Comma-separated cipher names')
+@click.option('--repeat', type=click.IntRange(min=1), default=3, show_default=True,
+	help='The number of timed runs, of which the best is kept')
+@click.option('--no-memory', is_flag=True, help='Skip the traced run measuring peak memory')
+@click.option('-o', '--output', type=click.Path(), help='Save the results to this JSON file')
+@click.option('--baseline', type=click.Path(exists=True), help='Compare with the results in this JSON file')
+@click.option('--tolerance', type=float, default=0.2, show_default=True,
+	help='The drop in throughput against the baseline that fails the run')
+def main(sizes, ratios, ciphers, repeat, no_memory, output, baseline, tolerance):
+	""" Benchmarks every cipher, mode and input size. """
+	rng = random.Random(0)
+	results = []
+	print("%-36s %10s %10s %12s" % ("run", "MB/s", "ns/char", "peak MB"))
+	for size in [parseSize(size) for size in sizes.split(',')]:
+		for letterRatio in [float(ratio) for ratio in ratios.split(',')]:
+			text = makeText(size, letterRatio, rng)
+			for name in ciphers.split(','):
+				cipher = classicCiphers.getCipher(name, KEYS[name])
+				ciphertext = cipher.encipherText(text)
+				for mode, transform, data in (('encrypt', cipher.encipherText, text),
+						('decrypt', cipher.decipherText, ciphertext)):
+					elapsed, peakMemory = measure(transform, data, repeat, not no_memory)
+					result = {
+						'name': '%s/%s/%d/%.2f' % (name, mode, size, letterRatio),
+						'cipher': name,
+						'mode': mode,
+						'size': size,
+						'letterRatio': letterRatio,
+						'seconds': elapsed,
+						'mbPerSecond': size / elapsed / 1e6,
+						'nsPerChar': elapsed / size * 1e9,
+						'peakMemory': peakMemory,
+					}
+					results.append(result)
+					print("%-36s %10.2f %10.2f %12s" % (result['name'], result['mbPerSecond'],
+						result['nsPerChar'], '-' if peakMemory is None else '%.2f' % (peakMemory / 1e6)))
+
+	if output is not None:
+		with open(output, 'w') as file:
+			json.dump({'python': platform.python_version(), 'numpy': classicCiphers.loadNumpy() is not None,
+				'results': results}, file, indent=1)
+
+	if baseline is not None:
+		with open(baseline, 'r') as file:
+			regressions = compare(results, json.load(file), tolerance)
+		if regressions:
+			print("%d runs regressed by more than %d%%" % (regressions, tolerance * 100))
+			sys.exit(1)
+		print("No regressions against %s" % baseline)
+
+if __name__ == '__main__':
+	main()
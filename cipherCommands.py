@@ -0,0 +1,899 @@
+#!/usr/bin/env python
+""" cipherCommands.py
+
+    The click command-line interface of classicCiphers.py. It is kept
+    apart from the ciphers so that importing them, or running the
+    common encrypt and decrypt cases through classicCiphers.runFast,
+    does not import click and build every command.
+
+"""
+
+import click
+import collections
+import json
+import os
+import time
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+from classicCiphers import (ALPHABETS, CIPHERS, DEFAULT_CHUNK_SIZE, AffineCipher, AtbashCipher,
+	CaesarCipher, Cipher, CipherChain, ColumnarTranspositionCipher, SimpleSubstitutionCipher, VigenereCipher,
+	processFileInWorker)
+
+CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
+
+def cipherOptions(command):
+	""" Adds the options shared by the encrypt and decrypt commands. """
+	options = [
+		click.option('-c', is_flag=True, help='use the Caesar cipher'),
+		click.option('-v', is_flag=True, help='use the Vigenere cipher'),
+		click.option('-af', is_flag=True, help='use the Affine cipher'),
+		click.option('-at', is_flag=True, help='use the Atbash cipher'),
+		click.option('-s', is_flag=True, help='use the Simple Substitution cipher'),
+		click.option('-t', is_flag=True, help='use the Columnar Transposition cipher'),
+		click.option('-k', '--key', help='The key needed for the cipher'),
+		click.option('-a', help='The \'a\' variable needed for the Affine cipher'),
+		click.option('-b', help='The \'b\' variable needed for the Affine cipher'),
+		click.option('--skip-non-letters', is_flag=True,
+			help='Move the Vigenere key on letters only, instead of on every character (not with --alphabet bytes)'),
+		click.option('-p', '--pipeline', multiple=True, metavar='CIPHER[:KEY]',
+			help='Use a chain of ciphers, one option per cipher in order: caesar:3, vigenere:lemon, '
+			'affine:5,8, atbash, substitution:<alphabet> or transposition:zebra'),
+		click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+			show_default=True, help='The number of characters processed at a time'),
+	]
+	for option in reversed(options):
+		command = option(command)
+	return command
+
+def runOptions(command):
+	""" Adds the options choosing how the encrypt and decrypt commands run. """
+	options = [
+		click.option('-j', '--jobs', type=click.IntRange(min=1), default=1,
+			show_default=True, help='The number of worker processes'),
+		click.option('--mmap', 'use_mmap', is_flag=True,
+			help='Memory-map the files and transform their bytes directly (not for -t)'),
+		click.option('--binary', is_flag=True, help='Read and write the files as bytes, without upper-casing them'),
+		click.option('--spill', is_flag=True,
+			help='Write the columns of -t straight to their place in the output file, for files larger '
+			'than memory (the bytes are transformed as with --mmap)'),
+		click.option('--alphabet', type=click.Choice(ALPHABETS), show_default='upper, or bytes with --compress',
+			help='The letters substituted with --binary, --mmap, --spill or --container: upper-cased letters, '
+			'letters keeping their case, or all the byte values (not for -s)'),
+		click.option('--container', is_flag=True,
+			help='Write, or read, a container: a header, the chunks encrypted one by one and their index'),
+		click.option('--compress', 'compression', type=click.Choice(['none', 'zlib', 'lzma']), default='none',
+			show_default=True, help='Compress each chunk of the container before encrypting it, which needs the bytes '
+			'alphabet (not for -s)'),
+		click.option('--stats', 'stats_format', flag_value='text',
+			help='Print the time of each phase, the throughput and the peak memory'),
+		click.option('--stats-json', 'stats_format', flag_value='json', help='Print the statistics of --stats as JSON'),
+		click.option('--profile', type=click.Path(dir_okay=False), help='Write a cProfile dump of the run to this file'),
+	]
+	for option in reversed(options):
+		command = option(command)
+	return command
+
+# How a file is processed by runCipher: the size of the chunks, the
+# number of worker processes, whether the files are memory-mapped, read
+# as bytes or spilled, the alphabet of the byte tables, whether the
+# output is a container and how its chunks are compressed, and the range
+# of the file to decrypt (offset and length, both None for the whole file)
+# and whether only the chunks changed since the last run are encrypted
+RunMode = collections.namedtuple('RunMode', ['chunkSize', 'jobs', 'useMmap', 'binary', 'spill',
+	'alphabet', 'container', 'compression', 'offset', 'length', 'incremental'])
+
+def readManifest(manifest):
+	""" 
+	    Returns the (input, output) path pairs listed in a manifest
+	    file, one tab-separated pair per line.
+
+	"""
+	pairs = []
+	with open(manifest, 'r') as file:
+		for lineNumber, line in enumerate(file, 1):
+			line = line.rstrip('\r\n')
+			if not line:
+				continue
+			fields = line.split('\t')
+			if len(fields) != 2:
+				print("ERROR: Line %d of the manifest is not an input/output pair" % lineNumber)
+				return None
+			pairs.append((fields[0], fields[1]))
+	return pairs
+
+def listDirectory(inputDirectory, outputDirectory):
+	""" 
+	    Returns the (input, output) path pairs for every file under
+	    the input directory, mirrored under the output directory.
+
+	"""
+	pairs = []
+	for root, directories, files in os.walk(inputDirectory):
+		directories.sort()
+		for name in sorted(files):
+			inputPath = os.path.join(root, name)
+			relativePath = os.path.relpath(inputPath, inputDirectory)
+			pairs.append((inputPath, os.path.join(outputDirectory, relativePath)))
+	return pairs
+
+def selectPipeline(pipeline):
+	""" 
+	    Returns the chain of the ciphers given with --pipeline, or
+	    None after printing an error if a cipher is unknown. A cipher
+	    given without a key asks for it.
+
+	"""
+	stages = []
+	for stage in pipeline:
+		name, separator, key = stage.partition(':')
+		name = name.lower()
+		if not separator:
+			key = None
+		if name not in CIPHERS:
+			print("ERROR: Unknown cipher in the pipeline: %s" % name)
+			return None
+		if name == 'affine':
+			a, separator, b = (key or '').partition(',')
+			stages.append(AffineCipher(a or None, b or None))
+		elif name == 'atbash':
+			stages.append(AtbashCipher())
+		else:
+			stages.append(CIPHERS[name](key))
+	return CipherChain(stages)
+
+def selectCipher(c, v, af, at, s, t, key, a, b, skipNonLetters, pipeline):
+	""" 
+	    Returns the cipher chosen with the option flags, or None
+	    after printing an error if not exactly one was chosen.
+
+	"""
+	trueCount = 0
+	cipher = None
+
+	if skipNonLetters and not v:
+		print("ERROR: --skip-non-letters is only available for the Vigenere cipher")
+		return None
+
+	if pipeline:
+		trueCount += 1
+		cipher = selectPipeline(pipeline)
+		if cipher is None:
+			return None
+
+	if c == True:
+		trueCount += 1
+		cipher = CaesarCipher(key)
+	
+	if v == True:
+		trueCount += 1
+		cipher = VigenereCipher(key, skipNonLetters)
+	
+	if af == True:
+		trueCount += 1
+		cipher = AffineCipher(a, b)
+
+	if at == True:
+		trueCount += 1
+		cipher = AtbashCipher()
+
+	if s == True:
+		trueCount += 1
+		cipher = SimpleSubstitutionCipher(key)
+
+	if t == True:
+		trueCount += 1
+		cipher = ColumnarTranspositionCipher(key)
+
+	if trueCount > 1:
+		print("ERROR: More than one cipher selected")
+		return None
+	elif trueCount == 0:
+		print("ERROR: No cipher selected")
+	return cipher
+
+class RunStats(object):
+	""" 
+	    Records the wall time spent in each phase of a run, so that a
+	    slow run shows whether the time goes into reading the file,
+	    upper-casing it, setting up the key, transforming or writing.
+	    When disabled, nothing is wrapped or timed. The throughput is
+	    that of the whole input file, unless a run processing only a
+	    range of it sets processedBytes.
+
+	"""
+	phases = ['read', 'normalize', 'key setup', 'transform', 'write']
+	processedBytes = None
+
+	def __init__(self, enabled):
+		self.enabled = enabled
+		self.seconds = dict((phase, 0.0) for phase in self.phases)
+		self.start = time.perf_counter()
+
+	def timed(self, phase, function):
+		""" Returns the function, adding the time of every call to the phase. """
+		if not self.enabled:
+			return function
+		def timedFunction(*args):
+			start = time.perf_counter()
+			try:
+				return function(*args)
+			finally:
+				self.seconds[phase] += time.perf_counter() - start
+		return timedFunction
+
+	def timedFile(self, file):
+		""" Returns the file, timing its reads and writes. """
+		if not self.enabled:
+			return file
+		return TimedFile(file, self.timed('read', file.read), self.timed('write', file.write))
+
+	def report(self, inputFile):
+		""" 
+		    Returns the time of each phase, the time spent outside of
+		    them (such as waiting for worker processes), the total time,
+		    the number of bytes processed, the throughput and the peak
+		    memory.
+
+		"""
+		total = time.perf_counter() - self.start
+		seconds = dict(self.seconds)
+		seconds['other'] = max(0.0, total - sum(self.seconds.values()))
+		seconds['total'] = total
+		size = self.processedBytes if self.processedBytes is not None else os.path.getsize(inputFile)
+		peakMemory = None
+		if resource is not None:
+			# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+			peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+			if not os.uname().sysname == 'Darwin':
+				peakMemory *= 1024
+		return {
+			'seconds': seconds,
+			'bytes': size,
+			'mbPerSecond': size / total / 1e6 if total > 0 else 0.0,
+			'peakMemory': peakMemory,
+		}
+
+class TimedFile(object):
+	""" A file whose read and write methods are timed by RunStats. """
+
+	def __init__(self, file, read, write):
+		self.file = file
+		self.read = read
+		self.write = write
+
+	def __getattr__(self, name):
+		return getattr(self.file, name)
+
+def printStats(report, statsFormat):
+	""" Prints the report of RunStats as text or as JSON. """
+	if statsFormat == 'json':
+		print(json.dumps(report))
+		return
+	for phase, seconds in report['seconds'].items():
+		print("%-10s %10.4f s" % (phase, seconds))
+	print("Processed %d bytes at %.2f MB/s" % (report['bytes'], report['mbPerSecond']))
+	if report['peakMemory'] is not None:
+		print("Peak memory: %.2f MB" % (report['peakMemory'] / 1e6))
+
+def alphabetError(cipher, alphabet):
+	""" Returns why the cipher cannot be run with the alphabet, or None if it can. """
+	if alphabet not in cipher.alphabets:
+		return "The %s alphabet is not available for this cipher" % alphabet
+	if alphabet == 'bytes' and getattr(cipher, 'skipNonLetters', False):
+		return "--skip-non-letters is not available with the bytes alphabet, where every byte is shifted"
+	return None
+
+def runCipher(cipher, decrypt, inputFile, outputFile, mode, stats):
+	""" 
+	    Encrypts or decrypts the input file into the output file in
+	    the RunMode chosen with the options: memory-mapped, with a
+	    pool of worker processes, or streamed, as text or as bytes,
+	    or only a range of it. The phases are timed by stats. Returns
+	    whether the run succeeded, after printing the error if not.
+
+	"""
+	useRange = mode.offset is not None or mode.length is not None
+	if mode.incremental:
+		return runIncremental(cipher, inputFile, outputFile, mode, stats)
+	if mode.container:
+		return runContainer(cipher, decrypt, inputFile, outputFile, mode, stats)
+	if mode.compression != 'none':
+		print("ERROR: --compress needs --container")
+		return False
+	if mode.useMmap and mode.jobs > 1:
+		print("ERROR: --mmap cannot be combined with --jobs")
+		return False
+	if mode.useMmap and mode.binary:
+		print("ERROR: --mmap already transforms the bytes, without --binary")
+		return False
+	if useRange and (mode.useMmap or mode.jobs > 1):
+		print("ERROR: --offset and --length cannot be combined with --mmap or --jobs")
+		return False
+	if mode.spill and (mode.useMmap or mode.jobs > 1 or useRange):
+		print("ERROR: --spill cannot be combined with --mmap, --jobs, --offset or --length")
+		return False
+	if mode.alphabet != 'upper' and not (mode.useMmap or mode.binary or mode.spill or useRange):
+		print("ERROR: --alphabet needs --binary, --mmap or --spill")
+		return False
+	if cipher is None:
+		open(outputFile, 'w').close()
+		return True
+	error = alphabetError(cipher, mode.alphabet)
+	if error is not None:
+		print("ERROR: %s" % error)
+		return False
+
+	cipher.alphabet = mode.alphabet
+	stats.timed('key setup', cipher.prepare)()
+	try:
+		transformFile(cipher, decrypt, inputFile, outputFile, mode, stats)
+	except ValueError as error:
+		# Such as a range or a memory map of a cipher needing the whole text
+		print("ERROR: %s" % error)
+		return False
+	return True
+
+def transformFile(cipher, decrypt, inputFile, outputFile, mode, stats):
+	""" Encrypts or decrypts the input file into the output file with the prepared cipher, for runCipher. """
+	useRange = mode.offset is not None or mode.length is not None
+	if mode.useMmap:
+		transform = cipher.decipherBytes if decrypt else cipher.encipherBytes
+		cipher.processMapped(inputFile, outputFile, mode.chunkSize, stats.timed('transform', transform))
+		return
+
+	if mode.spill:
+		stats.timed('transform', cipher.processSpilled)(inputFile, outputFile, mode.chunkSize, decrypt)
+		return
+
+	if mode.binary or useRange:
+		transform = cipher.decipherBytes if decrypt else cipher.encipherBytes
+		# bytes() returns the bytes read as they are, without a copy
+		normalize = bytes
+		fileMode = 'b'
+	else:
+		transform = cipher.decipherText if decrypt else cipher.encipherText
+		normalize = stats.timed('normalize', str.upper)
+		fileMode = ''
+	with open(inputFile, 'r' + fileMode) as inFile, open(outputFile, 'w' + fileMode) as file:
+		inFile = stats.timedFile(inFile)
+		file = stats.timedFile(file)
+		if useRange:
+			cipher.processRange(inFile, file, mode.offset or 0, mode.length, mode.chunkSize,
+				stats.timed('transform', transform))
+			# The bytes of the range are the ones written
+			stats.processedBytes = file.tell()
+		elif mode.jobs > 1:
+			# The workers transform the chunks, outside of the phases
+			cipher.processParallel(inFile, file, mode.chunkSize, mode.jobs, decrypt, normalize)
+		else:
+			cipher.processStream(inFile, file, mode.chunkSize, stats.timed('transform', transform), normalize)
+
+def runContainer(cipher, decrypt, inputFile, outputFile, mode, stats):
+	""" 
+	    Encrypts the input file into a container, or decrypts one or
+	    a range of one, with the chunks processed by a pool of worker
+	    processes when jobs is more than 1.
+
+	"""
+	import cipherContainer
+
+	if mode.useMmap or mode.spill:
+		print("ERROR: --container cannot be combined with --mmap or --spill")
+		return False
+	if cipher is None:
+		open(outputFile, 'w').close()
+		return True
+	error = alphabetError(cipher, mode.alphabet)
+	if error is not None:
+		print("ERROR: %s" % error)
+		return False
+
+	try:
+		if decrypt:
+			stats.timed('transform', cipherContainer.unpackFile)(cipher, inputFile, outputFile, mode.jobs,
+				mode.offset or 0, mode.length)
+			if mode.offset is not None or mode.length is not None:
+				stats.processedBytes = os.path.getsize(outputFile)
+		else:
+			cipher.alphabet = mode.alphabet
+			stats.timed('transform', cipherContainer.packFile)(cipher, inputFile, outputFile, mode.chunkSize,
+				mode.compression, mode.jobs)
+	except ValueError as error:
+		print("ERROR: %s" % error)
+		return False
+	return True
+
+def runIncremental(cipher, inputFile, outputFile, mode, stats):
+	""" 
+	    Encrypts the input file into the output file again, encrypting
+	    only the chunks changed since the run recorded in the state
+	    file next to the output. The state is removed during the run,
+	    so that a run stopped halfway is followed by a full one.
+
+	"""
+	import cipherIncremental
+
+	if mode.useMmap or mode.spill or mode.container or mode.jobs > 1:
+		print("ERROR: --incremental cannot be combined with --mmap, --spill, --container or --jobs")
+		return False
+	if mode.alphabet != 'upper' and not mode.binary:
+		print("ERROR: --alphabet needs --binary")
+		return False
+	if cipher is None:
+		open(outputFile, 'w').close()
+		return True
+	error = alphabetError(cipher, mode.alphabet)
+	if error is not None:
+		print("ERROR: %s" % error)
+		return False
+
+	cipher.alphabet = mode.alphabet
+	statePath = cipherIncremental.statePath(outputFile)
+	state = cipherIncremental.readState(statePath)
+	if state is not None:
+		os.remove(statePath)
+	state = stats.timed('transform', cipherIncremental.encryptFile)(cipher, inputFile, outputFile, mode.chunkSize,
+		mode.binary, state)
+	if state is not None:
+		cipherIncremental.writeState(statePath, state)
+	return True
+
+def runCommand(cipher, decrypt, inputFile, outputFile, mode, statsFormat, profile):
+	""" 
+	    Runs the cipher for the encrypt and decrypt commands, printing
+	    the statistics of a successful run if statsFormat is given and
+	    writing a cProfile dump of it if profile is given.
+
+	"""
+	stats = RunStats(statsFormat is not None)
+	if profile is not None:
+		import cProfile
+		profiler = cProfile.Profile()
+		succeeded = profiler.runcall(runCipher, cipher, decrypt, inputFile, outputFile, mode, stats)
+		profiler.dump_stats(profile)
+	else:
+		succeeded = runCipher(cipher, decrypt, inputFile, outputFile, mode, stats)
+	if succeeded and statsFormat is not None and cipher is not None:
+		printStats(stats.report(inputFile), statsFormat)
+
+@click.group(context_settings=CONTEXT_SETTINGS)
+def classicCiphers():
+	""" A tool that can encrypt or decrypt a text file with a variety of ciphers. """
+	pass
+
+@classicCiphers.command('encrypt')
+@cipherOptions
+@runOptions
+@click.option('--incremental', is_flag=True,
+	help='Encrypt only the chunks changed, or appended, since the last run, recorded in OUTPUT_FILE.state '
+	'(-t always runs in full)')
+@click.argument('input_file', type=click.Path(exists=True))
+@click.argument('output_file', type=click.Path(exists=True))
+def encryptCommand(c, v, af, at, s, t, key, a, b, skip_non_letters, pipeline, chunk_size, jobs, use_mmap, binary, spill,
+		alphabet, container, compression, stats_format, profile, incremental, input_file, output_file):
+	""" Encrypts a file using one of the available ciphers. """
+	cipher = selectCipher(c, v, af, at, s, t, key, a, b, skip_non_letters, pipeline)
+	# Compressed chunks are arbitrary bytes, so only the bytes alphabet keeps them
+	alphabet = alphabet or ('bytes' if compression != 'none' else 'upper')
+	mode = RunMode(chunk_size, jobs, use_mmap, binary, spill, alphabet, container, compression, None, None,
+		incremental)
+	runCommand(cipher, False, input_file, output_file, mode, stats_format, profile)
+
+@classicCiphers.command('decrypt')
+@cipherOptions
+@runOptions
+@click.option('--offset', type=click.IntRange(min=0),
+	help='Decrypt the bytes from this offset only, without reading the ones before it (not for -t '
+	'unless with --container)')
+@click.option('--length', type=click.IntRange(min=0),
+	help='Decrypt this number of bytes only, from --offset or the start of the file (not for -t unless '
+	'with --container)')
+@click.argument('input_file', type=click.Path(exists=True))
+@click.argument('output_file', type=click.Path(exists=True))
+def decryptCommand(c, v, af, at, s, t, key, a, b, skip_non_letters, pipeline, chunk_size, jobs, use_mmap, binary, spill,
+		alphabet, container, compression, stats_format, profile, offset, length, input_file, output_file):
+	""" Decrypts a file using one of the available ciphers. """
+	cipher = selectCipher(c, v, af, at, s, t, key, a, b, skip_non_letters, pipeline)
+	# Compressed chunks are arbitrary bytes, so only the bytes alphabet keeps them
+	alphabet = alphabet or ('bytes' if compression != 'none' else 'upper')
+	mode = RunMode(chunk_size, jobs, use_mmap, binary, spill, alphabet, container, compression, offset, length,
+		False)
+	runCommand(cipher, True, input_file, output_file, mode, stats_format, profile)
+
+def reportFile(inputPath, outputPath, future):
+	""" 
+	    Waits for a file of a batch run and prints its status.
+	    Returns its size in bytes, or None if it failed.
+
+	"""
+	try:
+		size = future.result()
+	except (OSError, UnicodeError) as error:
+		print("FAILED  %s: %s" % (inputPath, error))
+		return None
+	print("OK      %s -> %s (%d bytes)" % (inputPath, outputPath, size))
+	return size
+
+@classicCiphers.command()
+@cipherOptions
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=os.cpu_count() or 1,
+	show_default=True, help='The number of worker processes')
+@click.option('-d', '--decrypt', is_flag=True, help='Decrypt the files instead of encrypting them')
+@click.option('-m', '--manifest', is_flag=True,
+	help='SOURCE is a manifest of tab-separated input and output paths')
+@click.argument('source', type=click.Path(exists=True))
+@click.argument('output_dir', required=False, type=click.Path(file_okay=False))
+def batch(c, v, af, at, s, t, key, a, b, skip_non_letters, pipeline, chunk_size, jobs, decrypt, manifest, source, output_dir):
+	""" Encrypts or decrypts many files with one cipher and key. 
+
+	    SOURCE is either a directory, whose files are written under
+	    OUTPUT_DIR with the same relative paths, or with -m a manifest
+	    listing one input and output path per line. At most two files
+	    per worker process are open at any time.
+	"""
+	if manifest:
+		pairs = readManifest(source)
+	elif not os.path.isdir(source):
+		print("ERROR: SOURCE must be a directory unless -m is given")
+		return
+	elif output_dir is None:
+		print("ERROR: OUTPUT_DIR is needed when SOURCE is a directory")
+		return
+	else:
+		pairs = listDirectory(source, output_dir)
+
+	cipher = selectCipher(c, v, af, at, s, t, key, a, b, skip_non_letters, pipeline)
+	if cipher is None or pairs is None:
+		return
+	cipher.prepare()
+
+	start = time.perf_counter()
+	sizes = []
+	with cipher.createPool(jobs) as pool:
+		pending = collections.deque()
+		for inputPath, outputPath in pairs:
+			pending.append((inputPath, outputPath,
+				pool.submit(processFileInWorker, inputPath, outputPath, chunk_size, decrypt)))
+			# Keeps the number of queued files, and so of open files, bounded
+			if len(pending) >= 2 * jobs:
+				sizes.append(reportFile(*pending.popleft()))
+		while pending:
+			sizes.append(reportFile(*pending.popleft()))
+	elapsed = time.perf_counter() - start
+
+	totalBytes = sum(size for size in sizes if size is not None)
+	failures = sizes.count(None)
+
+	print("Processed %d files (%d failed), %.2f MB in %.2f s (%.2f MB/s)" % (len(pairs),
+		failures, totalBytes / 1e6, elapsed, totalBytes / 1e6 / elapsed if elapsed > 0 else 0))
+
+@classicCiphers.command()
+@click.option('-c', is_flag=True, help='try every Caesar cipher shift')
+@click.option('-af', is_flag=True, help='try every Affine cipher key')
+@click.option('-v', is_flag=True, help='recover the keyword of a Vigenere cipher')
+@click.option('-n', '--top', type=click.IntRange(min=1), default=5,
+	show_default=True, help='The number of candidates listed')
+@click.option('--max-key-length', type=click.IntRange(min=1), default=40,
+	show_default=True, help='The longest Vigenere keyword tried')
+@click.option('--sample-size', type=click.IntRange(min=1), default=1000000,
+	show_default=True, help='The number of characters used to find the Vigenere key length')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+	show_default=True, help='The number of characters counted at a time')
+@click.argument('input_file', type=click.Path(exists=True))
+def crack(c, af, v, top, max_key_length, sample_size, chunk_size, input_file):
+	""" Recovers the likely keys of a Caesar, Affine or Vigenere ciphertext. 
+
+	    Every key is scored with the chi-squared statistic of the
+	    letter frequencies it would give against English, computed
+	    from a single count of the ciphertext letters. Both Caesar
+	    and Affine are tried unless -c or -af is given.
+
+	    With -v, the Vigenere key length is estimated with the index
+	    of coincidence and the Kasiski examination, then each key
+	    letter is found from the letter counts of its column.
+	"""
+	import cryptanalysis
+
+	if v:
+		with open(input_file, 'r') as file:
+			try:
+				keyword, confidence, scores = cryptanalysis.crackVigenere(file,
+					chunk_size, max_key_length, sample_size)
+			except ValueError as error:
+				print("ERROR: %s" % error)
+				return
+		scores.sort(key=lambda score: -score[1])
+		print("%-10s %8s %8s %8s" % ("Key length", "Score", "IoC", "Kasiski"))
+		for keyLength, score, ioc, kasiski in scores[:top]:
+			print("%-10d %8.3f %8.4f %8.3f" % (keyLength, score, ioc, kasiski))
+		print("Keyword: %s (confidence %.2f)" % (keyword, confidence))
+		print("Decrypt with: decrypt -v --key=%s" % keyword)
+		return
+
+	with open(input_file, 'r') as file:
+		sample = file.read(60).upper()
+		file.seek(0)
+		counts = cryptanalysis.countFileLetters(file, chunk_size)
+
+	candidates = []
+	if c or not af:
+		for score, shift in cryptanalysis.crackCaesar(counts):
+			candidates.append((score, CaesarCipher(shift), '-c -k %d' % shift))
+	if af or not c:
+		for score, a, b in cryptanalysis.crackAffine(counts):
+			candidates.append((score, AffineCipher(a, b), '-af -a %d -b %d' % (a, b)))
+	candidates.sort(key=lambda candidate: candidate[0])
+
+	print("%-4s %-16s %12s  %s" % ("Rank", "Key", "Chi-squared", "Plaintext"))
+	for rank, (score, cipher, options) in enumerate(candidates[:top], 1):
+		cipher.prepare()
+		plaintext = cipher.decipherText(sample).replace('\n', ' ')
+		print("%-4d %-16s %12.2f  %s" % (rank, options, score, plaintext))
+
+@classicCiphers.command('recover-key')
+@click.option('-c', is_flag=True, help='recover the shift of a Caesar cipher')
+@click.option('-v', is_flag=True, help='recover the keyword of a Vigenere cipher')
+@click.option('-af', is_flag=True, help='recover the key of an Affine cipher')
+@click.option('-at', is_flag=True, help='check for an Atbash cipher')
+@click.option('-s', is_flag=True, help='recover the alphabet of a Simple Substitution cipher')
+@click.option('-t', is_flag=True, help='recover the column order of a Columnar Transposition cipher')
+@click.option('--crib', required=True, help='A known part of the plaintext')
+@click.option('--position', type=click.IntRange(min=0),
+	help='The offset of the crib in the plaintext; searched for if not given')
+@click.option('--max-key-length', type=click.IntRange(min=1), default=20, show_default=True,
+	help='The longest Vigenere keyword or transposition keyword tried')
+@click.option('-n', '--top', type=click.IntRange(min=1), default=10, show_default=True,
+	help='The number of keys to list')
+@click.argument('input_file', type=click.Path(exists=True))
+def recoverKey(c, v, af, at, s, t, crib, position, max_key_length, top, input_file):
+	""" Recovers the key of a ciphertext from a known plaintext. 
+
+	    The crib is a part of the plaintext, at --position or at an
+	    unknown place. The Caesar shift, the Affine key and the known
+	    letters of a substitution alphabet are read from the letters
+	    of the crib and their equivalents. For Vigenere, each crib
+	    letter gives the key letter at its position, and so the
+	    keyword in its phase. For the Columnar Transposition, the
+	    column orders putting the crib at its place are listed.
+
+	    Without --position, the crib is found using the pattern of
+	    its repeated letters for the monoalphabetic ciphers, the
+	    differences of its letters a key length apart for Vigenere,
+	    and its letters falling in one column for the transposition.
+	    Letters left unknown by the crib are shown as '?'.
+	"""
+	import cryptanalysis
+
+	flags = [(c, 'caesar'), (v, 'vigenere'), (af, 'affine'), (at, 'atbash'),
+		(s, 'substitution'), (t, 'transposition')]
+	names = [name for flag, name in flags if flag]
+	if len(names) > 1:
+		print("ERROR: More than one cipher selected")
+		return
+	elif not names:
+		print("ERROR: No cipher selected")
+		return
+	name = names[0]
+
+	with open(input_file, 'r') as file:
+		ciphertext = file.read()
+	keys = cryptanalysis.recoverKeys(name, ciphertext, crib, position, max_key_length)
+	if not keys:
+		print("No key gives the crib%s" % ("" if position is None else " at position %d" % position))
+		return
+
+	print("%-10s %-28s  %s" % ("Position", "Key", "Decrypt with"))
+	for keyPosition, key in keys[:top]:
+		if name == 'caesar':
+			shownKey, options = str(key), '-c -k %d' % key
+		elif name == 'affine':
+			shownKey, options = '%d,%d' % key, '-af -a %d -b %d' % key
+		elif name == 'atbash':
+			shownKey, options = '-', '-at'
+		else:
+			shownKey = key
+			options = '-%s --key=%s' % (name[0], key) if '?' not in key else '-'
+		print("%-10d %-28s  %s" % (keyPosition, shownKey, options))
+	if len(keys) > top:
+		print("... %d more" % (len(keys) - top))
+
+@classicCiphers.command('stats')
+@click.option('-n', '--top', type=click.IntRange(min=1), default=10,
+	show_default=True, help='The number of most common bigrams, trigrams and quadgrams listed')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+	show_default=True, help='The number of characters counted at a time')
+@click.argument('input_file', type=click.Path(exists=True))
+def statsCommand(top, chunk_size, input_file):
+	""" Prints the letter and n-gram statistics of a text file.
+
+	    The letters, bigrams, trigrams and quadgrams are counted in a
+	    single pass over the file, one chunk at a time, so files of
+	    any size are counted in constant memory. The n-grams skip
+	    non-letters. The index of coincidence and the chi-squared
+	    statistic against English tell apart English, a substitution
+	    of it and a polyalphabetic cipher.
+	"""
+	import cryptanalysis
+
+	with open(input_file, 'r') as file:
+		ngrams = cryptanalysis.countFileNgrams(file, chunk_size)
+	letterCounts = ngrams.counts[0]
+	total = sum(letterCounts)
+
+	print("Characters: %d, letters: %d" % (ngrams.characters, total))
+	print("Index of coincidence: %.4f (English %.4f, random %.4f)" % (
+		cryptanalysis.indexOfCoincidence(letterCounts), cryptanalysis.ENGLISH_IOC, cryptanalysis.RANDOM_IOC))
+	print("Chi-squared against English: %.2f" % cryptanalysis.chiSquared(letterCounts))
+
+	print("\n%-8s %12s %8s %8s" % ("Letter", "Count", "Percent", "English"))
+	for letter, count, frequency in zip(Cipher.letters, letterCounts, cryptanalysis.ENGLISH_FREQUENCIES):
+		print("%-8s %12d %8.3f %8.3f" % (letter, count, 100 * count / total if total else 0.0, frequency))
+
+	for n, name in ((2, "Bigram"), (3, "Trigram"), (4, "Quadgram")):
+		ngramTotal = max(0, total - n + 1)
+		print("\n%-8s %12s %8s" % (name, "Count", "Percent"))
+		for ngram, count in ngrams.mostCommon(n, top):
+			print("%-8s %12d %8.3f" % (ngram, count, 100 * count / ngramTotal))
+
+@classicCiphers.command()
+@click.argument('input_file', type=click.Path(exists=True))
+def info(input_file):
+	""" Prints how a container file was encrypted. """
+	import cipherContainer
+
+	try:
+		with open(input_file, 'rb') as file:
+			header = cipherContainer.readHeader(file)
+			index = cipherContainer.readIndex(file, header)
+	except ValueError as error:
+		print("ERROR: %s" % error)
+		return
+	storedLength = sum(entry.storedLength for entry in index)
+	print("%-18s %s" % ("Cipher", header.cipherName))
+	print("%-18s %s" % ("Alphabet", header.alphabet))
+	if header.cipherName == 'vigenere':
+		print("%-18s %s" % ("Key moves on", "letters" if header.skipNonLetters else "every character"))
+	print("%-18s %s" % ("Compression", header.compression))
+	print("%-18s %d bytes" % ("Original length", header.originalLength))
+	print("%-18s %d bytes" % ("Stored length", storedLength))
+	if header.originalLength:
+		print("%-18s %.3f" % ("Ratio", storedLength / header.originalLength))
+	print("%-18s %d of %d bytes" % ("Chunks", header.chunkCount, header.chunkSize))
+
+@classicCiphers.command()
+@click.option('--ngrams', required=True, type=click.Path(exists=True),
+	help='A file of English n-grams and their counts, one pair per line')
+@click.option('-r', '--restarts', type=click.IntRange(min=1), default=20,
+	show_default=True, help='The number of hill-climbs from random keys')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=os.cpu_count() or 1,
+	show_default=True, help='The number of worker processes')
+@click.option('--anneal', is_flag=True, help='Use simulated annealing before each climb')
+@click.option('--sample-size', type=click.IntRange(min=1), default=10000,
+	show_default=True, help='The number of ciphertext characters scored')
+@click.option('--seed', type=int, help='The seed of the random starting keys')
+@click.argument('input_file', type=click.Path(exists=True))
+def solve(ngrams, restarts, jobs, anneal, sample_size, seed, input_file):
+	""" Recovers the key of a Simple Substitution ciphertext. 
+
+	    Keys are searched by hill-climbing over swaps of two letters,
+	    scoring the decryption of a sample of the ciphertext with the
+	    n-gram log probabilities. Only the n-grams holding a swapped
+	    letter are rescored for each swap.
+	"""
+	import cryptanalysis
+
+	with open(input_file, 'r') as file:
+		sample = file.read(sample_size).upper()
+	try:
+		n, logProbabilities = cryptanalysis.loadNgrams(ngrams)
+	except ValueError as error:
+		print("ERROR: %s" % error)
+		return
+	keyString, score = cryptanalysis.solveSubstitution(sample, n, logProbabilities,
+		restarts, jobs, anneal, seed)
+
+	cipher = SimpleSubstitutionCipher(keyString)
+	cipher.prepare()
+	print("Key: %s (score %.2f)" % (keyString, score))
+	print("Plaintext: %s" % cipher.decipherText(sample[:60]).replace('\n', ' '))
+	print("Decrypt with: decrypt -s --key=%s" % keyString)
+
+@classicCiphers.command()
+@click.option('-v', is_flag=True, help='try the words as Vigenere keywords')
+@click.option('-t', is_flag=True, help='try the words as Columnar Transposition keywords')
+@click.option('-w', '--wordlist', required=True, type=click.Path(exists=True),
+	help='A file of candidate keywords, one per line')
+@click.option('--ngrams', required=True, type=click.Path(exists=True),
+	help='A file of English n-grams and their counts, one pair per line')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=os.cpu_count() or 1,
+	show_default=True, help='The number of worker processes')
+@click.option('--prefix-size', type=click.IntRange(min=1), default=200, show_default=True,
+	help='The number of characters every keyword is scored on')
+@click.option('--shortlist', type=click.IntRange(min=1), default=1000, show_default=True,
+	help='The number of best keywords scored again on the whole sample')
+@click.option('--sample-size', type=click.IntRange(min=1), default=10000, show_default=True,
+	help='The number of characters the shortlisted keywords are scored on')
+@click.option('--max-key-length', type=click.IntRange(min=1), default=40, show_default=True,
+	help='The longest keyword tried')
+@click.option('-n', '--top', type=click.IntRange(min=1), default=10, show_default=True,
+	help='The number of keywords to list')
+@click.argument('input_file', type=click.Path(exists=True))
+def dictionary(v, t, wordlist, ngrams, jobs, prefix_size, shortlist, sample_size, max_key_length, top,
+		input_file):
+	""" Tries the words of a wordlist as the keyword of a ciphertext. 
+
+	    Each distinct keyword is scored with the n-gram log
+	    probabilities of the decryption of the first characters of
+	    the ciphertext, and the best of them again on a longer
+	    sample. Words giving the same Vigenere shifts or the same
+	    column order as an earlier word are only scored once, and so
+	    are transposition keywords whose width does not divide the
+	    ciphertext length.
+	"""
+	import cryptanalysis
+
+	if v and t:
+		print("ERROR: More than one cipher selected")
+		return
+	elif not v and not t:
+		print("ERROR: No cipher selected")
+		return
+	name = 'vigenere' if v else 'transposition'
+
+	with open(input_file, 'r') as file:
+		# The transposition needs the whole text to find its columns
+		ciphertext = file.read(sample_size) if v else file.read()
+	try:
+		n, logProbabilities = cryptanalysis.loadNgrams(ngrams)
+	except ValueError as error:
+		print("ERROR: %s" % error)
+		return
+
+	def progress(scored, total):
+		click.echo("\rScored %d of %d keywords" % (scored, total), nl=scored == total, err=True)
+
+	with open(wordlist, 'r', errors='replace') as words:
+		results = cryptanalysis.dictionaryAttack(name, ciphertext, words, n, logProbabilities, jobs,
+			sample_size, prefix_size, shortlist, max_key_length, progress=progress)
+	if not results:
+		print("No keyword of the wordlist can be tried")
+		return
+
+	print("%-4s %-20s %8s  %s" % ("Rank", "Keyword", "Score", "Plaintext"))
+	for rank, (score, keyword, word) in enumerate(results[:top], 1):
+		cipher = VigenereCipher(word) if v else ColumnarTranspositionCipher(word)
+		cipher.prepare()
+		plaintext = cipher.decipherText(ciphertext.upper())[:50].replace('\n', ' ')
+		print("%-4d %-20s %8.3f  %s" % (rank, word.upper(), score, plaintext))
+	print("Decrypt with: decrypt -%s --key=%s" % (name[0], results[0][2].upper()))
+
+@classicCiphers.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='The address to listen on')
+@click.option('--port', type=click.IntRange(0, 65535), default=8750,
+	show_default=True, help='The TCP port to listen on')
+@click.option('--unix', 'unix_path', type=click.Path(), help='Listen on this Unix socket instead of TCP')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=os.cpu_count() or 1,
+	show_default=True, help='The number of worker processes for large payloads')
+@click.option('--inline-limit', type=click.IntRange(min=0), default=64 * 1024,
+	show_default=True, help='The largest payload, in bytes, transformed without a worker')
+def serve(host, port, unix_path, jobs, inline_limit):
+	""" Serves encryption requests over TCP or a Unix socket. 
+
+	    Each request is the cipher name, the mode, the key and the
+	    payload, each prefixed with its length as a 4-byte big-endian
+	    number. See cipherServer.py for the protocol.
+	"""
+	import asyncio
+	import cipherServer
+
+	try:
+		asyncio.run(cipherServer.serve(host, port, unix_path, jobs, inline_limit))
+	except KeyboardInterrupt:
+		pass
+
+if __name__ == '__main__':
+	classicCiphers()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+""" cipherContainer.py
+
+    A container format for the files encrypted with the ciphers of
+    classicCiphers.py, which records how they were encrypted and lets
+    them be processed one chunk at a time.
+
+    A container is made of, in order:
+        - a header of HEADER_SIZE bytes: the magic bytes "CCPH", the
+          format version, the cipher, compression and alphabet ids,
+          the flags (bit 0 set when the Vigenere key skips non-letters),
+          the original length, the chunk size, the number of chunks
+          and the offset of the index, all integers big-endian
+        - the chunks, each the bytes of chunkSize bytes of the input
+          (fewer for the last one), compressed if chosen, then
+          encrypted on their own from the first key letter
+        - the index, one entry per chunk: its offset in the container,
+          its stored length, its original length and the CRC-32 of
+          the stored bytes
+
+    The key is never stored. As every chunk but the last holds
+    chunkSize bytes of the input, the chunks covering a range of the
+    input are found from the chunk size, read through the index and
+    decrypted without the others.
+
+"""
+
+import collections
+import struct
+import zlib
+
+import classicCiphers
+
+MAGIC = b'CCPH'
+VERSION = 1
+
+HEADER = struct.Struct('>4sBBBBBxxxQIIQ')
+HEADER_SIZE = HEADER.size
+
+INDEX_ENTRY = struct.Struct('>QIII')
+
+# The ids stored in the header, which must not be reordered
+CIPHER_IDS = ('caesar', 'vigenere', 'affine', 'atbash', 'substitution', 'transposition')
+COMPRESSIONS = ('none', 'zlib', 'lzma')
+
+SKIP_NON_LETTERS = 1
+
+Header = collections.namedtuple('Header', ['cipherName', 'compression', 'alphabet', 'skipNonLetters',
+	'originalLength', 'chunkSize', 'chunkCount', 'indexOffset'])
+
+IndexEntry = collections.namedtuple('IndexEntry', ['offset', 'storedLength', 'originalLength', 'checksum'])
+
+def cipherName(cipher):
+	""" Returns the name of the cipher in CIPHERS, or raises a ValueError for a chain of ciphers. """
+	for name, cipherClass in classicCiphers.CIPHERS.items():
+		if type(cipher) is cipherClass:
+			return name
+	raise ValueError("A container holds a single cipher, not a pipeline")
+
+def compressor(compression):
+	""" Returns the compress and decompress functions of the compression, None for none. """
+	if compression == 'none':
+		return None, None
+	if compression == 'zlib':
+		return zlib.compress, lambda data: zlib.decompressobj().decompress(data)
+	if compression == 'lzma':
+		try:
+			import lzma
+		except ImportError:
+			raise ValueError("lzma compression is not available in this Python")
+		return lzma.compress, lambda data: lzma.LZMADecompressor().decompress(data)
+	raise ValueError("Unknown compression: %s" % compression)
+
+def packChunk(cipher, chunk, compression):
+	""" 
+	    Returns the stored bytes of a chunk: compressed, then
+	    encrypted from the first key letter.
+
+	"""
+	compress, decompress = compressor(compression)
+	if compress is not None:
+		chunk = compress(chunk)
+	return bytes(cipher.encipherBytes(chunk, 0))
+
+def unpackChunk(cipher, stored, originalLength, compression):
+	""" 
+	    Returns the input bytes of a chunk from its stored bytes. The
+	    padding added by the Columnar Transposition is dropped.
+
+	"""
+	compress, decompress = compressor(compression)
+	chunk = bytes(cipher.decipherBytes(stored, 0))
+	if decompress is not None:
+		chunk = decompress(chunk)
+	return chunk[:originalLength]
+
+def packInWorker(chunk, compression):
+	""" Packs a chunk in a worker process of classicCiphers. """
+	return packChunk(classicCiphers.workerCipher, chunk, compression)
+
+def unpackInWorker(stored, originalLength, compression):
+	""" Unpacks a chunk in a worker process of classicCiphers. """
+	return unpackChunk(classicCiphers.workerCipher, stored, originalLength, compression)
+
+def mapChunks(cipher, jobs, decrypt, argumentLists):
+	""" 
+	    Yields the chunks unpacked, or packed, with each list of
+	    arguments in order, in jobs worker processes holding the
+	    cipher when jobs is more than 1. At most two chunks per worker
+	    are in flight, so memory stays bounded.
+
+	"""
+	if jobs == 1:
+		function = unpackChunk if decrypt else packChunk
+		for arguments in argumentLists:
+			yield function(cipher, *arguments)
+		return
+	workerFunction = unpackInWorker if decrypt else packInWorker
+	with cipher.createPool(jobs) as pool:
+		pending = collections.deque()
+		for arguments in argumentLists:
+			pending.append(pool.submit(workerFunction, *arguments))
+			if len(pending) >= 2 * jobs:
+				yield pending.popleft().result()
+		while pending:
+			yield pending.popleft().result()
+
+def packFile(cipher, inputPath, outputPath, chunkSize, compression='none', jobs=1):
+	""" 
+	    Encrypts the input file into a container. The chunks are
+	    written as they are encrypted, and the header is completed
+	    once the index is written. Compressed chunks are arbitrary
+	    bytes, so they must be encrypted with the bytes alphabet,
+	    which the Simple Substitution cipher does not have.
+
+	"""
+	name = cipherName(cipher)
+	if compression != 'none':
+		compressor(compression)
+		if 'bytes' not in cipher.alphabets:
+			raise ValueError("Compression needs a cipher with the bytes alphabet")
+		if cipher.alphabet != 'bytes':
+			raise ValueError("Compression needs the bytes alphabet, not the %s alphabet" % cipher.alphabet)
+	if cipher.alphabet == 'bytes' and getattr(cipher, 'skipNonLetters', False):
+		raise ValueError("The key cannot skip non-letters with the bytes alphabet, where every byte is shifted")
+	cipher.prepare()
+	flags = SKIP_NON_LETTERS if getattr(cipher, 'skipNonLetters', False) else 0
+
+	# The lengths of the chunks read and not yet written
+	lengths = collections.deque()
+
+	def readChunks(inFile):
+		chunk = inFile.read(chunkSize)
+		while chunk:
+			lengths.append(len(chunk))
+			yield chunk, compression
+			chunk = inFile.read(chunkSize)
+
+	index = []
+	with open(inputPath, 'rb') as inFile, open(outputPath, 'wb') as file:
+		file.write(bytes(HEADER_SIZE))
+		offset = HEADER_SIZE
+		for stored in mapChunks(cipher, jobs, False, readChunks(inFile)):
+			file.write(stored)
+			index.append(IndexEntry(offset, len(stored), lengths.popleft(), zlib.crc32(stored)))
+			offset += len(stored)
+		for entry in index:
+			file.write(INDEX_ENTRY.pack(*entry))
+		file.seek(0)
+		file.write(HEADER.pack(MAGIC, VERSION, CIPHER_IDS.index(name), COMPRESSIONS.index(compression),
+			classicCiphers.ALPHABETS.index(cipher.alphabet), flags,
+			sum(entry.originalLength for entry in index), chunkSize, len(index), offset))
+
+def readHeader(file):
+	""" 
+	    Reads the header of a container, raising a ValueError if the
+	    file is not one or its header is inconsistent: an unknown id,
+	    or a number of chunks that does not cover the original length
+	    in chunks of the chunk size.
+
+	"""
+	data = file.read(HEADER_SIZE)
+	if len(data) < HEADER_SIZE or data[:4] != MAGIC:
+		raise ValueError("Not a container file")
+	(magic, version, cipherId, compressionId, alphabetId, flags, originalLength, chunkSize, chunkCount,
+		indexOffset) = HEADER.unpack(data)
+	if version != VERSION:
+		raise ValueError("Unsupported container version: %d" % version)
+	if cipherId >= len(CIPHER_IDS):
+		raise ValueError("Unknown cipher id in the container: %d" % cipherId)
+	if compressionId >= len(COMPRESSIONS):
+		raise ValueError("Unknown compression id in the container: %d" % compressionId)
+	if alphabetId >= len(classicCiphers.ALPHABETS):
+		raise ValueError("Unknown alphabet id in the container: %d" % alphabetId)
+	if chunkSize == 0 or chunkCount != -(-originalLength // chunkSize):
+		raise ValueError("The container holds %d chunks, which do not cover %d bytes in chunks of %d bytes"
+			% (chunkCount, originalLength, chunkSize))
+	return Header(CIPHER_IDS[cipherId], COMPRESSIONS[compressionId], classicCiphers.ALPHABETS[alphabetId],
+		bool(flags & SKIP_NON_LETTERS), originalLength, chunkSize, chunkCount, indexOffset)
+
+def readIndex(file, header):
+	""" 
+	    Reads the index of a container, raising a ValueError if it is
+	    truncated or its chunks do not each hold chunkSize bytes of
+	    the input, but the last.
+
+	"""
+	file.seek(header.indexOffset)
+	data = file.read(header.chunkCount * INDEX_ENTRY.size)
+	if len(data) != header.chunkCount * INDEX_ENTRY.size:
+		raise ValueError("The index of the container is truncated")
+	index = [IndexEntry(*INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size)) for i in range(0, header.chunkCount)]
+	for number, entry in enumerate(index):
+		if entry.originalLength != min(header.chunkSize, header.originalLength - number * header.chunkSize):
+			raise ValueError("The index of the container does not match its header")
+	return index
+
+def unpackFile(cipher, inputPath, outputPath, jobs=1, offset=0, length=None):
+	""" 
+	    Decrypts a container into the output file, or only the length
+	    bytes of the input from the offset, reading only the chunks
+	    that hold them. The cipher must be the one of the container,
+	    whose alphabet and key convention are taken from the header.
+
+	"""
+	with open(inputPath, 'rb') as inFile, open(outputPath, 'wb') as file:
+		header = readHeader(inFile)
+		if cipherName(cipher) != header.cipherName:
+			raise ValueError("The container was encrypted with the %s cipher" % header.cipherName)
+		cipher.alphabet = header.alphabet
+		if header.skipNonLetters:
+			cipher.skipNonLetters = True
+		cipher.prepare()
+		index = readIndex(inFile, header)
+
+		end = header.originalLength if length is None else min(header.originalLength, offset + length)
+		if offset >= end:
+			return
+		first = offset // header.chunkSize
+		last = (end - 1) // header.chunkSize
+
+		def readChunks():
+			for entry in index[first:last + 1]:
+				inFile.seek(entry.offset)
+				stored = inFile.read(entry.storedLength)
+				if zlib.crc32(stored) != entry.checksum:
+					raise ValueError("The chunk at offset %d of the container is corrupt" % entry.offset)
+				yield stored, entry.originalLength, header.compression
+
+		for number, chunk in enumerate(mapChunks(cipher, jobs, True, readChunks()), first):
+			start = number * header.chunkSize
+			file.write(chunk[max(0, offset - start):end - start])
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+""" cipherIncremental.py
+
+    Incremental encryption with the ciphers of classicCiphers.py, for
+    files encrypted again and again that mostly grow by appends, such
+    as logs. A run records in a state file, next to the output, how
+    much of the input was encrypted, the position of the key at its
+    end and, for each chunk of the input:
+        - the CRC-32 of the chunk as it was read
+        - its length, in characters, or bytes with --binary
+        - the number of positions the key moved over it
+        - the offset and the length of its output
+        - the CRC-32 of its output
+
+    The next run reads the input again, one chunk at a time, and only
+    encrypts the chunks that changed:
+        - a chunk with the same checksum keeps its output
+        - a chunk changed without changing its length or the key
+          positions it covers is encrypted again over its old output
+        - from the first chunk whose length or key positions changed,
+          such as the last chunk of a file that grew, every chunk is
+          encrypted again and the output cut after the last one
+
+    The key itself is never stored, but the state records the
+    checksum of a fixed probe text encrypted with it, so that a run
+    with a different key starts again in full. The Columnar
+    Transposition lays the whole text out in columns, so a cipher
+    needing the whole text is always run in full, without a state.
+
+"""
+
+import collections
+import json
+import os
+import zlib
+
+STATE_VERSION = 2
+
+# The text encrypted to tell keys apart, repeated to cover the longest key
+PROBE = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .\n'
+
+Chunk = collections.namedtuple('Chunk', ['inputChecksum', 'length', 'advance', 'outputOffset', 'outputLength',
+	'outputChecksum'])
+
+def statePath(outputPath):
+	""" Returns the path of the state file recording the runs into the output file. """
+	return outputPath + '.state'
+
+def checksum(data):
+	""" Returns the CRC-32 of bytes, or of a string encoded as UTF-8. """
+	if isinstance(data, str):
+		data = data.encode('utf-8', 'surrogatepass')
+	return zlib.crc32(data)
+
+def cipherDescription(cipher):
+	""" Returns the name of the cipher, or of the stages of a pipeline, and its key convention. """
+	stages = getattr(cipher, 'stages', [cipher])
+	description = '+'.join(type(stage).__name__ for stage in stages)
+	if any(getattr(stage, 'skipNonLetters', False) for stage in stages):
+		description += ':skipNonLetters'
+	return description
+
+def keyFingerprint(cipher, binary):
+	""" 
+	    Returns the checksum of the probe text encrypted from the first
+	    key letter, as text or as bytes with binary, which differs for
+	    another key. The probe is repeated once per letter of the
+	    longest key, so that every key letter shifts some of it.
+
+	"""
+	stages = getattr(cipher, 'stages', [cipher])
+	probe = PROBE * max([1] + [len(getattr(stage, 'keyPositions', [])) for stage in stages])
+	if binary:
+		return checksum(cipher.encipherBytes(probe.encode('ascii'), 0))
+	return checksum(cipher.encipherText(probe, 0))
+
+def readState(path):
+	""" Returns the state saved at the path, or None if there is none or it cannot be read. """
+	try:
+		with open(path, 'r') as file:
+			return json.load(file)
+	except (OSError, ValueError):
+		return None
+
+def writeState(path, state):
+	""" Saves the state at the path, replacing the previous one only once it is written. """
+	temporaryPath = path + '.tmp'
+	with open(temporaryPath, 'w') as file:
+		json.dump(state, file)
+	os.replace(temporaryPath, path)
+
+def reusableChunks(cipher, outputPath, chunkSize, binary, fingerprint, state):
+	""" 
+	    Returns the chunks recorded in the state, or an empty list if
+	    it is missing, was recorded with another cipher, key (told by
+	    its fingerprint) or options, or the output file no longer has
+	    the length it recorded.
+
+	"""
+	if state is None:
+		return []
+	try:
+		if (state['version'] != STATE_VERSION or state['cipher'] != cipherDescription(cipher)
+				or state['key'] != fingerprint or state['binary'] != binary or state['alphabet'] != cipher.alphabet
+				or state['chunkSize'] != chunkSize or os.path.getsize(outputPath) != state['outputLength']):
+			return []
+		return [Chunk(*entry) for entry in state['chunks']]
+	except (KeyError, TypeError, OSError):
+		return []
+
+def encryptFile(cipher, inputPath, outputPath, chunkSize, binary=False, state=None):
+	""" 
+	    Encrypts the input file into the output file, as a text file
+	    or as bytes with binary, reusing the output of the run that
+	    recorded the state. Returns the state of this run, or None for
+	    a cipher needing the whole text, which is run in full.
+
+	"""
+	fileMode = 'b' if binary else ''
+	transform = cipher.encipherBytes if binary else cipher.encipherText
+	# bytes() returns the bytes read as they are, without a copy
+	normalize = bytes if binary else str.upper
+	cipher.prepare()
+	if cipher.wholeText:
+		with open(inputPath, 'r' + fileMode) as inFile, open(outputPath, 'w' + fileMode) as file:
+			cipher.processStream(inFile, file, chunkSize, transform, normalize)
+		return None
+
+	fingerprint = keyFingerprint(cipher, binary)
+	old = reusableChunks(cipher, outputPath, chunkSize, binary, fingerprint, state)
+	chunks = []
+	position = 0
+	offset = 0
+	# Whether every chunk from here on is written again, one after the other
+	rewriting = not old
+	with open(inputPath, 'r' + fileMode) as inFile, open(outputPath, ('r+' if old else 'w') + fileMode) as file:
+		chunk = inFile.read(chunkSize)
+		while chunk:
+			inputChecksum = checksum(chunk)
+			previous = None if rewriting or len(chunks) >= len(old) else old[len(chunks)]
+			if previous is not None and previous.length != len(chunk):
+				previous = None
+
+			if previous is not None and previous.inputChecksum == inputChecksum:
+				# An unchanged chunk is neither normalized nor encrypted
+				chunks.append(previous)
+			else:
+				normalized = normalize(chunk)
+				advance = cipher.advance(normalized)
+				if previous is not None and previous.advance != advance:
+					previous = None
+				output = transform(normalized, position)
+				file.seek(offset)
+				file.write(output)
+				outputLength = file.tell() - offset
+				if previous is None or outputLength != previous.outputLength:
+					# The outputs after this one move, so they are written again
+					rewriting = True
+				chunks.append(Chunk(inputChecksum, len(chunk), advance, offset, outputLength, checksum(output)))
+
+			position += chunks[-1].advance
+			offset += chunks[-1].outputLength
+			chunk = inFile.read(chunkSize)
+		file.seek(offset)
+		file.truncate()
+
+	return {
+		'version': STATE_VERSION,
+		'cipher': cipherDescription(cipher),
+		'key': fingerprint,
+		'binary': binary,
+		'alphabet': cipher.alphabet,
+		'chunkSize': chunkSize,
+		'length': sum(chunk.length for chunk in chunks),
+		'position': position,
+		'outputLength': offset,
+		'chunks': [list(chunk) for chunk in chunks],
+	}
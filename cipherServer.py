@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+""" cipherServer.py
+
+    An asyncio server encrypting and decrypting payloads for many
+    clients at once, over TCP or a Unix socket, with the ciphers of
+    classicCiphers.py.
+
+    Every request and response is a sequence of fields, each sent as
+    a 4-byte big-endian length followed by that many bytes:
+        - request: cipher name, mode ("encrypt" or "decrypt"), key
+          (empty for none, "a,b" for the Affine cipher) and payload
+        - response: status ("ok" or "error") and the transformed
+          payload or the error message
+
+    Requests on one connection are answered in order. Payloads are
+    transformed as bytes, see classicCiphers.encrypt.
+
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import struct
+
+import classicCiphers
+
+# Largest field accepted from a client, in bytes
+MAX_FIELD_SIZE = 256 * 1024 * 1024
+
+# Payloads up to this size are transformed in the event loop itself
+DEFAULT_INLINE_LIMIT = 64 * 1024
+
+FIELD_LENGTH = struct.Struct('!I')
+
+def parseKey(cipherName, key):
+	""" Returns the key in the form getCipher expects for the cipher. """
+	if key == '':
+		return None
+	if cipherName == 'affine':
+		return tuple(int(value) for value in key.split(','))
+	return key
+
+def processRequest(cipherName, mode, key, payload):
+	""" 
+	    Encrypts or decrypts the payload. Runs in the event loop for
+	    small payloads and in a worker process for large ones, each
+	    with its own cache of prepared ciphers.
+
+	"""
+	key = parseKey(cipherName, key)
+	if mode == 'encrypt':
+		return classicCiphers.encrypt(cipherName, payload, key)
+	elif mode == 'decrypt':
+		return classicCiphers.decrypt(cipherName, payload, key)
+	raise ValueError("Unknown mode: %s" % mode)
+
+def encodeFields(*fields):
+	""" Returns the fields, each prefixed with its length. """
+	frame = bytearray()
+	for field in fields:
+		frame += FIELD_LENGTH.pack(len(field))
+		frame += field
+	return bytes(frame)
+
+async def readFields(reader, count):
+	""" 
+	    Reads count length-prefixed fields. Raises IncompleteReadError
+	    when the connection is closed, and ValueError for a field
+	    longer than MAX_FIELD_SIZE.
+
+	"""
+	fields = []
+	for i in range(0, count):
+		length, = FIELD_LENGTH.unpack(await reader.readexactly(FIELD_LENGTH.size))
+		if length > MAX_FIELD_SIZE:
+			raise ValueError("Field of %d bytes is too large" % length)
+		fields.append(await reader.readexactly(length))
+	return fields
+
+async def handleClient(reader, writer, pool, inlineLimit):
+	""" 
+	    Answers the requests of one client in order. Waiting for the
+	    response to drain before reading the next request applies
+	    backpressure to clients that do not read their responses.
+
+	"""
+	loop = asyncio.get_running_loop()
+	try:
+		while True:
+			try:
+				cipherName, mode, key, payload = await readFields(reader, 4)
+			except asyncio.IncompleteReadError:
+				break
+			except ValueError as error:
+				writer.write(encodeFields(b'error', str(error).encode()))
+				await writer.drain()
+				break
+
+			try:
+				arguments = (cipherName.decode(), mode.decode(), key.decode(), payload)
+				if len(payload) <= inlineLimit:
+					result = processRequest(*arguments)
+				else:
+					result = await loop.run_in_executor(pool, processRequest, *arguments)
+				writer.write(encodeFields(b'ok', result))
+			except (ValueError, TypeError) as error:
+				writer.write(encodeFields(b'error', str(error).encode()))
+			await writer.drain()
+	except ConnectionError:
+		pass
+	finally:
+		writer.close()
+
+async def serve(host, port, unixPath, jobs, inlineLimit=DEFAULT_INLINE_LIMIT):
+	""" 
+	    Runs the server until it is interrupted, on the Unix socket at
+	    unixPath if given and otherwise on host and port.
+
+	"""
+	with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+		handler = functools.partial(handleClient, pool=pool, inlineLimit=inlineLimit)
+		if unixPath is not None:
+			server = await asyncio.start_unix_server(handler, unixPath)
+		else:
+			server = await asyncio.start_server(handler, host, port)
+		for socket in server.sockets:
+			print("Serving on %s" % (socket.getsockname(),))
+		async with server:
+			await server.serve_forever()
+
+async def request(reader, writer, cipherName, mode, key, payload):
+	""" 
+	    Sends one request as a client and returns the transformed
+	    payload, raising a ValueError with the server's message if
+	    the request failed.
+
+	"""
+	writer.write(encodeFields(cipherName.encode(), mode.encode(), key.encode(), payload))
+	await writer.drain()
+	status, result = await readFields(reader, 2)
+	if status != b'ok':
+		raise ValueError(result.decode())
+	return result
@@ -17,15 +17,398 @@ __author__ = "Anthony Panisales"
 
 """
 
-import click
+import collections
+import functools
+import io
+import itertools
 import math
+import os
+import sys
+
+# The modules that are slow to import, such as click, NumPy and the
+# process pools, are only imported by the code that needs them, so a
+# run of the command-line tool does not pay for what it does not use
+
+@functools.lru_cache(maxsize=None)
+def loadNumpy():
+	""" Returns the numpy module the first time it is needed, or None if it is not installed. """
+	try:
+		import numpy
+	except ImportError:
+		return None
+	return numpy
+
+# The alphabets of the byte tables: the letters, folding lowercase
+# letters into uppercase ones, the letters in both cases, or all the
+# 256 byte values
+ALPHABETS = ('upper', 'letters', 'bytes')
+
+# The runs of characters a Vigenere key skipping non-letters does not
+# move on, for texts and for bytes, in which lowercase letters count
+NON_LETTER_RUNS = {str: '([^A-Z]+)', bytes: b'([^A-Za-z]+)', bytearray: b'([^A-Za-z]+)'}
+NON_LETTER_BYTES = bytes(set(range(0, 256)) - set(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'))
+
+# The cipher used by each worker process of a parallel run
+workerCipher = None
+
+def initWorker(cipher):
+	""" Stores the prepared cipher in a worker process. """
+	global workerCipher
+	workerCipher = cipher
+
+def transformInWorker(text, position, decrypt):
+	""" Encrypts or decrypts a piece of the text in a worker process. """
+	return workerCipher.transformData(text, position, decrypt)
+
+def processFileInWorker(inputPath, outputPath, chunkSize, decrypt):
+	""" Encrypts or decrypts a whole file in a worker process. """
+	return workerCipher.processFile(inputPath, outputPath, chunkSize, decrypt)
 
 class Cipher(object):
 	""" Base class for the ciphers. """
 	letters = []
 	for i in range(0, 26):
 		letters.append(chr(ord('A') + i))
-	pass
+	encryptTable = None
+	decryptTable = None
+	encryptByteTable = None
+	decryptByteTable = None
+	interactive = True
+	prepared = False
+	# Whether the cipher replaces each letter with a fixed letter
+	monoalphabetic = False
+	# Whether the cipher needs the whole text at once
+	wholeText = False
+	# The letters substituted in bytes, one of ALPHABETS
+	alphabet = 'upper'
+	# The alphabets the cipher supports
+	alphabets = ('upper', 'letters')
+
+	def getKey(self):
+		""" Retrieves the key needed by the cipher, if any. """
+		pass
+
+	def promptKey(self, prompt):
+		""" 
+		    Asks the user for the key. A ValueError is raised instead
+		    when the cipher is not interactive.
+
+		"""
+		if not self.interactive:
+			raise ValueError("Invalid key: No valid key was given")
+		return input(prompt)
+
+	def invalidKey(self, message):
+		""" 
+		    Tells the user that the key is invalid, before asking again.
+		    A ValueError is raised instead when the cipher is not
+		    interactive.
+
+		"""
+		if not self.interactive:
+			raise ValueError(message)
+		print(message)
+
+	def cipherAlphabet(self):
+		""" 
+		    Returns the cipher alphabet, the list of letters that
+		    replace 'A' to 'Z' in that order. Only the monoalphabetic
+		    ciphers (Caesar, Affine, Atbash and Simple Substitution)
+		    implement this method.
+
+		"""
+		raise NotImplementedError
+
+	def byteMapping(self):
+		""" 
+		    Returns the 256 byte values that replace the bytes 0 to 255
+		    in that order, for the bytes alphabet. Only the ciphers
+		    whose alphabets include 'bytes' implement this method.
+
+		"""
+		raise NotImplementedError
+
+	def buildTables(self):
+		""" 
+		    Builds the translation tables between the plain alphabet
+		    and the cipher alphabet. The tables are built once per key
+		    so that a whole text can be substituted in a single pass
+		    with str.translate, instead of searching the letters list
+		    for every character.
+
+		"""
+		plainAlphabet = ''.join(self.letters)
+		cipherAlphabet = ''.join(self.cipherAlphabet())
+		self.encryptTable = str.maketrans(plainAlphabet, cipherAlphabet)
+		self.decryptTable = str.maketrans(cipherAlphabet, plainAlphabet)
+
+		plainBytes = plainAlphabet.encode('ascii')
+		cipherBytes = cipherAlphabet.encode('ascii')
+		if self.alphabet == 'bytes':
+			cipherBytes = bytes(self.byteMapping())
+			self.encryptByteTable = cipherBytes
+			self.decryptByteTable = bytes.maketrans(cipherBytes, bytes(range(0, 256)))
+		elif self.alphabet == 'letters':
+			self.encryptByteTable = bytes.maketrans(plainBytes + plainBytes.lower(),
+				cipherBytes + cipherBytes.lower())
+			self.decryptByteTable = bytes.maketrans(cipherBytes + cipherBytes.lower(),
+				plainBytes + plainBytes.lower())
+		else:
+			# The lowercase letters are also mapped, to the uppercase
+			# letters the text mode would give
+			self.encryptByteTable = bytes.maketrans(plainBytes + plainBytes.lower(), cipherBytes * 2)
+			self.decryptByteTable = bytes.maketrans(cipherBytes + cipherBytes.lower(), plainBytes * 2)
+
+	def prepare(self):
+		""" 
+		    Retrieves the key and builds everything derived from it,
+		    so that the text can then be processed in any number of
+		    pieces without asking for the key again. Does nothing once
+		    the cipher is prepared.
+
+		"""
+		if not self.prepared:
+			if self.alphabet not in self.alphabets:
+				raise ValueError("The %s alphabet is not available for this cipher" % self.alphabet)
+			self.getKey()
+			self.buildTables()
+			self.prepared = True
+
+	def encipherText(self, text, position=0):
+		""" 
+		    Returns the encrypted text. The monoalphabetic ciphers
+		    replace every letter using the encryption table.
+
+		    Parameters
+		    ----------
+		    text : str
+		        The text to be encrypted
+		    position : int
+		        The offset of the text within the whole input text,
+		        needed by the ciphers whose key depends on it
+
+		"""
+		return text.translate(self.encryptTable)
+
+	def decipherText(self, text, position=0):
+		""" 
+		    Returns the decrypted text. The monoalphabetic ciphers
+		    replace every letter using the decryption table.
+
+		    Parameters
+		    ----------
+		    text : str
+		        The text to be decrypted
+		    position : int
+		        The offset of the text within the whole input text,
+		        needed by the ciphers whose key depends on it
+
+		"""
+		return text.translate(self.decryptTable)
+
+	def encipherBytes(self, data, position=0):
+		""" 
+		    Returns the encrypted bytes. The monoalphabetic ciphers
+		    replace every ASCII letter using the encryption byte table.
+
+		    Parameters
+		    ----------
+		    data : bytes
+		        The bytes to be encrypted
+		    position : int
+		        The offset of the bytes within the whole input file,
+		        needed by the ciphers whose key depends on it
+
+		"""
+		return data.translate(self.encryptByteTable)
+
+	def decipherBytes(self, data, position=0):
+		""" 
+		    Returns the decrypted bytes. The monoalphabetic ciphers
+		    replace every ASCII letter using the decryption byte table.
+
+		    Parameters
+		    ----------
+		    data : bytes
+		        The bytes to be decrypted
+		    position : int
+		        The offset of the bytes within the whole input file,
+		        needed by the ciphers whose key depends on it
+
+		"""
+		return data.translate(self.decryptByteTable)
+
+	def transformData(self, data, position, decrypt):
+		""" Encrypts or decrypts a str as text and anything else as bytes. """
+		if isinstance(data, str):
+			return self.decipherText(data, position) if decrypt else self.encipherText(data, position)
+		return self.decipherBytes(data, position) if decrypt else self.encipherBytes(data, position)
+
+	def encipher(self, oldFileText, file):
+		""" 
+		    Encrypts the file using the user's desired key.
+
+		    Parameters
+		    ----------
+		    oldFileText : str
+		        The text from the input text file to be encrypted
+		    file : file
+		        The output text file which will contain the
+		        encrypted text
+
+		"""
+		self.prepare()
+		file.write(self.encipherText(oldFileText))
+
+	def decipher(self, oldFileText, file):
+		""" 
+		    Decrypts the file using the user's desired key.
+
+		    Parameters
+		    ----------
+		    oldFileText : str
+		        The text from the input text file to be decrypted
+		    file : file
+		        The output text file which will contain the
+		        decrypted text
+
+		"""
+		self.prepare()
+		file.write(self.decipherText(oldFileText))
+
+	def advance(self, data):
+		""" 
+		    Returns how far the position of the key moves over the text
+		    or bytes, which is their length unless the key skips some
+		    characters.
+
+		"""
+		return len(data)
+
+	def processStream(self, inFile, file, chunkSize, transform, normalize=str.upper):
+		""" 
+		    Reads, normalizes, transforms and writes the input file one
+		    chunk at a time. The position of each chunk is passed along
+		    so the output is identical to transforming the whole file
+		    at once.
+
+		"""
+		position = 0
+		chunk = inFile.read(chunkSize)
+		while chunk:
+			chunk = normalize(chunk)
+			file.write(transform(chunk, position))
+			position += self.advance(chunk)
+			chunk = inFile.read(chunkSize)
+
+	def processRange(self, inFile, file, offset, length, chunkSize, transform, position=None):
+		""" 
+		    Seeks to the offset of the binary input file and transforms
+		    only the next length bytes, or the bytes up to the end of
+		    the file if length is None. Each chunk is given its position
+		    within the whole file, so the key starts at the right letter
+		    without the bytes before the offset being read. A cipher
+		    whose key skips some bytes gives the position of the key at
+		    the offset instead.
+
+		"""
+		inFile.seek(offset)
+		if position is None:
+			position = offset
+		done = 0
+		while length is None or done < length:
+			chunk = inFile.read(chunkSize if length is None else min(chunkSize, length - done))
+			if not chunk:
+				break
+			file.write(transform(chunk, position))
+			position += self.advance(chunk)
+			done += len(chunk)
+
+	def processFile(self, inputPath, outputPath, chunkSize, decrypt):
+		""" 
+		    Encrypts or decrypts one file with the prepared cipher,
+		    creating the directory of the output file if needed.
+		    Returns the size of the input file in bytes.
+
+		"""
+		outputDirectory = os.path.dirname(outputPath)
+		if outputDirectory:
+			os.makedirs(outputDirectory, exist_ok=True)
+		transform = self.decipherText if decrypt else self.encipherText
+		with open(inputPath, 'r') as inFile, open(outputPath, 'w') as file:
+			self.processStream(inFile, file, chunkSize, transform)
+		return os.path.getsize(inputPath)
+
+	def processMapped(self, inputPath, outputPath, chunkSize, transform):
+		""" 
+		    Maps the input file and an output file of the same size,
+		    and transforms one chunk of bytes at a time from one to
+		    the other. The pages of each chunk are released once it
+		    is written, so the memory used stays flat however large
+		    the files are.
+
+		"""
+		import mmap
+		# Chunks start on page boundaries so their pages can be released
+		chunkSize = -(-chunkSize // mmap.ALLOCATIONGRANULARITY) * mmap.ALLOCATIONGRANULARITY
+		size = os.path.getsize(inputPath)
+		with open(inputPath, 'rb') as inFile, open(outputPath, 'w+b') as file:
+			file.truncate(size)
+			if size == 0:
+				return
+			with mmap.mmap(inFile.fileno(), 0, access=mmap.ACCESS_READ) as source, \
+					mmap.mmap(file.fileno(), size) as target:
+				position = 0
+				for start in range(0, size, chunkSize):
+					length = min(chunkSize, size - start)
+					chunk = source[start:start + length]
+					target[start:start + length] = transform(chunk, position)
+					position += self.advance(chunk)
+					target.flush(start, length)
+					# Windows has no madvise, and releases the pages on its own
+					if hasattr(mmap, 'MADV_DONTNEED'):
+						source.madvise(mmap.MADV_DONTNEED, start, length)
+						target.madvise(mmap.MADV_DONTNEED, start, length)
+
+	def processSpilled(self, inputPath, outputPath, chunkSize, decrypt):
+		""" 
+		    Only the Columnar Transposition cipher needs to spill the
+		    text to the output file, the other ciphers stream the bytes
+		    of the input file.
+
+		"""
+		transform = self.decipherBytes if decrypt else self.encipherBytes
+		with open(inputPath, 'rb') as inFile, open(outputPath, 'wb') as file:
+			self.processStream(inFile, file, chunkSize, transform, bytes)
+
+	def createPool(self, jobs):
+		""" Returns a pool of worker processes holding this cipher. """
+		import concurrent.futures
+		return concurrent.futures.ProcessPoolExecutor(jobs,
+			initializer=initWorker, initargs=(self,))
+
+	def processParallel(self, inFile, file, chunkSize, jobs, decrypt, normalize=str.upper):
+		""" 
+		    Hands the input file to the workers one chunk at a time,
+		    together with the position of the chunk, and writes the
+		    results back in order. At most two chunks per worker are
+		    in flight, so memory stays bounded.
+
+		"""
+		with self.createPool(jobs) as pool:
+			pending = collections.deque()
+			position = 0
+			chunk = inFile.read(chunkSize)
+			while chunk:
+				chunk = normalize(chunk)
+				pending.append(pool.submit(transformInWorker, chunk, position, decrypt))
+				position += self.advance(chunk)
+				if len(pending) >= 2 * jobs:
+					file.write(pending.popleft().result())
+				chunk = inFile.read(chunkSize)
+			while pending:
+				file.write(pending.popleft().result())
+
 
 class CaesarCipher(Cipher):
 	""" 
@@ -39,11 +422,27 @@ class CaesarCipher(Cipher):
 	        http://www.practicalcryptography.com/ciphers/caesar-cipher/
 	        https://pycipher.readthedocs.io/en/master/#caesar-cipher
 	"""
+	monoalphabetic = True
+	alphabets = ALPHABETS
 	argKey = None
+	shift = 0
 
 	def __init__(self, key):
 		self.argKey = key
 
+	def cipherAlphabet(self):
+		""" 
+		    Returns the alphabet shifted by the shift value, so each
+		    letter is replaced with the letter a certain number of
+		    places after it.
+
+		"""
+		return [self.letters[(i + self.shift) % 26] for i in range(0, 26)]
+
+	def byteMapping(self):
+		""" Returns the byte values shifted by the shift value. """
+		return [(i + self.shift) % 256 for i in range(0, 256)]
+
 	def getKey(self):
 		""" Retrieves the user's desired shift value. """
 		while True:
@@ -51,64 +450,19 @@ class CaesarCipher(Cipher):
 				if self.argKey is not None:
 					shift = int(self.argKey)
 				else:
-					shift = int(input("Shift value (0-25): "))	
+					shift = int(self.promptKey("Shift value (0-25): "))	
 				if shift < 0 or shift > 25:
-					print("Invalid value")
+					self.invalidKey("Invalid value")
 					self.argKey = None
 					continue
 				else:
+					self.shift = shift
 					return shift      
 			except ValueError:
-				print("Invalid value")
+				self.invalidKey("Invalid value")
 				self.argKey = None
 				continue
 
-	def encipher(self, oldFileText, file):
-		""" 
-		    Encrypts the file by replacing each character in the
-		    text from the input file with the character a certain
-		    number of places after it in the alphabet. This number
-		    is defined by the user and is the shift value.
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be encrypted
-		    file : file
-		        The output text file which will contain the
-		        encrypted text
-
-		"""
-		key = self.getKey()
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[(self.letters.index(c) + key) % 26]
-			file.write(newChar)
-
-	def decipher(self, oldFileText, file):
-		""" 
-		    Decrypts the file by replacing each character in the
-		    text from the input file with the character a certain
-		    number of places before it in the alphabet. This number
-		    is defined by the user and is the shift value.
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be decrypted
-		    file : file
-		        The output text file which will contain the
-		        decrypted text
-
-		"""
-		key = self.getKey()
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[(self.letters.index(c) - key) % 26]
-			file.write(newChar)
-
 
 class VigenereCipher(Cipher):
 	""" 
@@ -122,71 +476,276 @@ class VigenereCipher(Cipher):
 	    Sources:
 	        "Friedman Lectures on Cryptography", 1965, page 29
 	        https://www.tutorialspoint.com/cryptography/traditional_ciphers.htm
+
+	    The key moves on every character by default. With
+	    skipNonLetters, it only moves on letters, the convention of
+	    many other implementations, and the position of a text is then
+	    the number of letters before it.
 	"""
 	keyPositions = []
+	shiftTables = []
+	shiftByteTables = []
 	argKey = None
-
-	def __init__(self, key):
+	skipNonLetters = False
+	# The NumPy backend shifts a text about three times faster than the
+	# rows of the tableau, but importing NumPy takes about as long as
+	# shifting six million characters with them, so unless NumPy is
+	# already imported it is only chosen once numpyMinLength characters
+	# were shifted, and never for texts shorter than numpyMinTextLength.
+	# NumPy is imported once per process, so shiftedLength counts the
+	# text shifted by every Vigenere cipher, not by each of them
+	useNumpy = True
+	numpyMinLength = 8 * 1024 * 1024
+	numpyMinTextLength = 4096
+	shiftedLength = 0
+	alphabets = ALPHABETS
+
+	def __init__(self, key, skipNonLetters=False):
 		self.argKey = key
+		self.skipNonLetters = skipNonLetters
 
 	def getKey(self):
 		""" Retrieves the user's desired keyword. """
 		keyword = self.argKey
+		if keyword is not None and not keyword.isalpha():
+			self.invalidKey("Invalid key: The key should only contain letters")
 		while keyword is None or not keyword.isalpha():
-			keyword = input("Keyword: ").upper()	
+			keyword = self.promptKey("Keyword: ").upper()	
 			if not keyword.isalpha():
-				print("Invalid key: The key should only contain letters")
+				self.invalidKey("Invalid key: The key should only contain letters")
 
 		keyword = keyword.upper()
 
+		self.keyPositions = []
 		for c in keyword:
 			self.keyPositions.append(self.letters.index(c))
 
-	def encipher(self, oldFileText, file):
+	def buildTables(self):
+		""" 
+		    Builds the rows of the Vigenere table for the letters of the
+		    keyword, as the tables shifting a text by each of them, and
+		    the byte tables shifting by each of them within the letters
+		    or within all the byte values for the bytes alphabet.
+
+		"""
+		plainAlphabet = ''.join(self.letters)
+		self.shiftTables = []
+		for keyPosition in self.keyPositions:
+			shiftedAlphabet = plainAlphabet[keyPosition:] + plainAlphabet[:keyPosition]
+			self.shiftTables.append((str.maketrans(plainAlphabet, shiftedAlphabet),
+				str.maketrans(shiftedAlphabet, plainAlphabet)))
+
+		plainBytes = plainAlphabet.encode('ascii')
+		allBytes = bytes(range(0, 256))
+		self.shiftByteTables = []
+		for keyPosition in self.keyPositions:
+			if self.alphabet == 'bytes':
+				self.shiftByteTables.append((
+					allBytes[keyPosition:] + allBytes[:keyPosition],
+					allBytes[256 - keyPosition:] + allBytes[:256 - keyPosition]))
+				continue
+			shifted = plainBytes[keyPosition:] + plainBytes[:keyPosition]
+			if self.alphabet == 'letters':
+				self.shiftByteTables.append((
+					bytes.maketrans(plainBytes + plainBytes.lower(), shifted + shifted.lower()),
+					bytes.maketrans(shifted + shifted.lower(), plainBytes + plainBytes.lower())))
+			else:
+				self.shiftByteTables.append((
+					bytes.maketrans(plainBytes + plainBytes.lower(), shifted * 2),
+					bytes.maketrans(shifted + shifted.lower(), plainBytes * 2)))
+
+	def shiftText(self, text, position, direction):
+		""" 
+		    Shifts each letter of the text by the key letter at its
+		    position, forwards for a direction of 1 and backwards for
+		    a direction of -1. The key letters come round every
+		    len(keyword) characters, so the text is cut into that many
+		    interleaved slices, and each slice is translated at once
+		    with the row of the table for its key letter. The NumPy
+		    backend is chosen instead when it is installed and the
+		    cipher has shifted enough text to pay for importing it.
+
+		"""
+		if self.skipNonLetters:
+			return self.shiftLetters(text, position, direction, self.shiftSlices)
+		if self.chooseNumpy(len(text)):
+			return self.shiftTextNumpy(text, position, direction)
+		return self.shiftSlices(text, position, direction)
+
+	def chooseNumpy(self, length):
+		""" Returns whether a text of the length is shifted with NumPy, counting it as shifted. """
+		VigenereCipher.shiftedLength += length
+		if not self.useNumpy or length < self.numpyMinTextLength:
+			return False
+		if 'numpy' not in sys.modules and self.shiftedLength < self.numpyMinLength:
+			return False
+		return loadNumpy() is not None
+
+	def shiftSlices(self, text, position, direction):
+		""" Shifts the text as len(keyword) interleaved slices, the key moving on every character. """
+		keyLength = len(self.keyPositions)
+		tableIndex = 0 if direction == 1 else 1
+		newText = [None] * len(text)
+		for offset in range(0, min(keyLength, len(text))):
+			table = self.shiftTables[(position + offset) % keyLength][tableIndex]
+			newText[offset::keyLength] = text[offset::keyLength].translate(table)
+		return ''.join(newText)
+
+	def shiftLetters(self, data, position, direction, shift):
+		""" 
+		    Shifts only the letters of the text or bytes, so that the
+		    key does not move on the rest. The letters are joined
+		    together, shifted at once by shift, and put back between
+		    the runs of other characters.
+
+		"""
+		import re
+		runs = re.split(NON_LETTER_RUNS[type(data)], data)
+		shifted = shift(data[:0].join(runs[0::2]), position, direction)
+		start = 0
+		for i in range(0, len(runs), 2):
+			end = start + len(runs[i])
+			runs[i] = shifted[start:end]
+			start = end
+		return data[:0].join(runs)
+
+	def advance(self, data):
+		""" Returns the number of letters in the data when the key skips the other characters. """
+		if not self.skipNonLetters or (self.alphabet == 'bytes' and not isinstance(data, str)):
+			return len(data)
+		if isinstance(data, str):
+			return sum(map(data.count, self.letters))
+		return len(bytes(data).translate(None, NON_LETTER_BYTES))
+
+	def processRange(self, inFile, file, offset, length, chunkSize, transform, position=None):
+		""" 
+		    Transforms a range of the binary input file. When the key
+		    skips the non-letters, the letters before the offset are
+		    counted first to find the position of the key.
+
+		"""
+		if position is None and self.skipNonLetters:
+			inFile.seek(0)
+			position = 0
+			done = 0
+			while done < offset:
+				chunk = inFile.read(min(chunkSize, offset - done))
+				if not chunk:
+					break
+				position += self.advance(chunk)
+				done += len(chunk)
+		Cipher.processRange(self, inFile, file, offset, length, chunkSize, transform, position)
+
+	def shiftTextNumpy(self, text, position, direction):
+		""" 
+		    Shifts the whole text at once as a NumPy array. The array
+		    is viewed as rows of len(keyword) characters, so the key
+		    shifts, starting at the key letter for position, are added
+		    to every row at once, and the non-letters are masked out.
+
+		"""
+		numpy = loadNumpy()
+		if text.isascii():
+			encoding, dtype, workType = 'ascii', numpy.uint8, numpy.int16
+		else:
+			encoding, dtype, workType = 'utf-32-le', numpy.uint32, numpy.int64
+		codes = numpy.frombuffer(text.encode(encoding), dtype=dtype)
+
+		keyLength = len(self.keyPositions)
+		keyShifts = numpy.array(self.keyPositions, dtype=workType) * direction % 26
+		keyShifts = numpy.roll(keyShifts, -(position % keyLength))
+
+		work = codes.astype(workType)
+		work -= ord('A')
+		isLetter = (work >= 0) & (work < 26)
+		rows = len(work) - len(work) % keyLength
+		work[:rows].reshape(-1, keyLength)[...] += keyShifts
+		work[rows:] += keyShifts[:len(work) - rows]
+		work %= 26
+		work += ord('A')
+		return numpy.where(isLetter, work, codes).astype(dtype).tobytes().decode(encoding)
+
+	def encipherText(self, text, position=0):
 		""" 
-		    Encrypts the file using the user's desired keyword.
+		    Encrypts the text using the user's desired keyword.
 
 		    Parameters
 		    ----------
-		    oldFileText : str
-		        The text from the input text file to be encrypted
-		    file : file
-		        The output text file which will contain the
-		        encrypted text
+		    text : str
+		        The text to be encrypted
+		    position : int
+		        The offset of the text within the whole input text,
+		        which selects the key letter the text starts with
 
 		"""
-		keyIndex = 0
-		self.getKey()
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[(self.letters.index(c) + 
-					self.keyPositions[keyIndex % len(self.keyPositions)]) % 26]
-			keyIndex += 1
-			file.write(newChar)
+		return self.shiftText(text, position, 1)
 
-	def decipher(self, oldFileText, file):
+	def decipherText(self, text, position=0):
 		""" 
-		    Decrypts the file using the user's desired keyword.
+		    Decrypts the text using the user's desired keyword.
 
 		    Parameters
 		    ----------
-		    oldFileText : str
-		        The text from the input text file to be decrypted
-		    file : file
-		        The output text file which will contain the
-		        decrypted text
+		    text : str
+		        The text to be decrypted
+		    position : int
+		        The offset of the text within the whole input text,
+		        which selects the key letter the text starts with
 
 		"""
-		keyIndex = 0
-		self.getKey()
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[(self.letters.index(c) - 
-					self.keyPositions[keyIndex % len(self.keyPositions)]) % 26]
-			keyIndex += 1
-			file.write(newChar)
+		return self.shiftText(text, position, -1)
+
+	def shiftBytes(self, data, position, tableIndex):
+		""" 
+		    Shifts the bytes as len(keyword) interleaved slices. All
+		    the bytes of a slice share a key letter, so each slice is
+		    translated at once with the byte table of its letter. The
+		    key advances once per byte, or once per letter with
+		    skipNonLetters unless all the bytes are letters.
+
+		"""
+		if self.skipNonLetters and self.alphabet != 'bytes':
+			return self.shiftLetters(data, position, tableIndex, self.shiftByteSlices)
+		return self.shiftByteSlices(data, position, tableIndex)
+
+	def shiftByteSlices(self, data, position, tableIndex):
+		""" Shifts the bytes as len(keyword) interleaved slices, the key moving on every byte. """
+		keyLength = len(self.keyPositions)
+		newData = bytearray(len(data))
+		for offset in range(0, min(keyLength, len(data))):
+			table = self.shiftByteTables[(position + offset) % keyLength][tableIndex]
+			newData[offset::keyLength] = data[offset::keyLength].translate(table)
+		return newData
+
+	def encipherBytes(self, data, position=0):
+		""" 
+		    Encrypts the bytes using the user's desired keyword.
+
+		    Parameters
+		    ----------
+		    data : bytes
+		        The bytes to be encrypted
+		    position : int
+		        The offset of the bytes within the whole input file,
+		        which selects the key letter the bytes start with
+
+		"""
+		return self.shiftBytes(data, position, 0)
+
+	def decipherBytes(self, data, position=0):
+		""" 
+		    Decrypts the bytes using the user's desired keyword.
+
+		    Parameters
+		    ----------
+		    data : bytes
+		        The bytes to be decrypted
+		    position : int
+		        The offset of the bytes within the whole input file,
+		        which selects the key letter the bytes start with
+
+		"""
+		return self.shiftBytes(data, position, 1)
 
 
 class AffineCipher(Cipher):
@@ -210,6 +769,8 @@ class AffineCipher(Cipher):
 	        https://pycipher.readthedocs.io/en/master/#affine-cipher
 	        http://www.practicalcryptography.com/ciphers/affine-cipher/
 	"""
+	monoalphabetic = True
+	alphabets = ALPHABETS
 	a = 0
 	b = 0
 
@@ -217,90 +778,59 @@ class AffineCipher(Cipher):
 		self.a = a
 		self.b = b
 
+	def cipherAlphabet(self):
+		""" 
+		    Returns the result of c = ap + b (mod 26) for each letter p.
+		    Inverting this alphabet is equivalent to applying the
+		    decryption function with the multiplicative inverse of a.
+
+		"""
+		return [self.letters[(i * self.a + self.b) % 26] for i in range(0, 26)]
+
+	def byteMapping(self):
+		""" 
+		    Returns the result of c = ap + b (mod 256) for each byte p,
+		    which can be inverted since a is odd.
+
+		"""
+		return [(i * self.a + self.b) % 256 for i in range(0, 256)]
+
 	def getKey(self):
 		""" Retrieves the user's desired values for a and b. """
 		while True:
 			try:
 				if self.a is None:
-					self.a = int(input("a: "))	
+					self.a = int(self.promptKey("a: "))	
 				else:
 					self.a = int(self.a)
 				if self.a < 0 or self.a % 2 == 0 or self.a == 13:
-					print("Invalid \'a\' value: Must be a positive number less than and has no common factors with 26")
+					self.invalidKey("Invalid \'a\' value: Must be a positive number less than and has no common factors with 26")
 					self.a = None
 					continue
 				else:
 					break     
 			except ValueError:
-				print("Invalid \'a\' value: Must be a positive number less than and has no common factors with 26")
+				self.invalidKey("Invalid \'a\' value: Must be a positive number less than and has no common factors with 26")
 				self.a = None
 				continue
 
 		while True:
 			try:
 				if self.b is None:	
-					self.b = int(input("b (0-25): "))
+					self.b = int(self.promptKey("b (0-25): "))
 				else:
 					self.b = int(self.b)
 				if self.b < 0 or self.b > 25:
-					print("Invalid \'b\' value")
+					self.invalidKey("Invalid \'b\' value")
 					self.b = None
 					continue
 				else:
 					return      
 			except ValueError:
-				print("Invalid \'b\' value")
+				self.invalidKey("Invalid \'b\' value")
 				self.b = None
 				continue
 
-	def encipher(self, oldFileText, file):
-		""" 
-		    Encrypts the file by performing the Affine cipher's
-		    encryption function using the user's desired values
-		    for a and b.
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be encrypted
-		    file : file
-		        The output text file which will contain the
-		        encrypted text
-
-		"""
-		self.getKey()
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[((self.letters.index(c) * self.a + self.b) % 26) % 26]
-			file.write(newChar)
-
-	def decipher(self, oldFileText, file):
-		""" 
-		    Decrypts the file by performing the Affine cipher's
-		    decryption function using the user's desired values
-		    for a and b.
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be decrypted
-		    file : file
-		        The output text file which will contain the
-		        decrypted text
-
-		"""
-		self.getKey()
-		inverse = 0
-		for x in range(0, 27):
-			if (x * self.a) % 26 == 1:
-				inverse = x
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[(inverse * (self.letters.index(c) - self.b) % 26) % 26]
-			file.write(newChar)
-
 
 class AtbashCipher(Cipher):
 	""" 
@@ -313,43 +843,20 @@ class AtbashCipher(Cipher):
 	        "Cryptography", 1926, page 28
 	        http://www.practicalcryptography.com/ciphers/classical-era/atbash-cipher/
 	"""
+	monoalphabetic = True
+	alphabets = ALPHABETS
 
-	def encipher(self, oldFileText, file):
+	def cipherAlphabet(self):
 		""" 
-		    Encrypts the file by replacing each character in the
-		    text from the input file with its reverse.  
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be encrypted
-		    file : file
-		        The output text file which will contain the
-		        encrypted text
+		    Returns the alphabet in reverse order. The reversing is
+		    its own inverse, so both tables are the same.
 
 		"""
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[25 - self.letters.index(c)]
-			file.write(newChar)
-
-	def decipher(self, oldFileText, file):
-		""" 
-		    Decrypts the file by replacing each character in the
-		    text from the input file with its reverse.
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be decrypted
-		    file : file
-		        The output text file which will contain the
-		        decrypted text
+		return self.letters[::-1]
 
-		"""
-		# The reversing process is already in the encipher method.
-		self.encipher(oldFileText, file)
+	def byteMapping(self):
+		""" Returns the byte values in reverse order. """
+		return list(range(255, -1, -1))
 
 
 class SimpleSubstitutionCipher(Cipher):
@@ -363,80 +870,43 @@ class SimpleSubstitutionCipher(Cipher):
 	        https://pycipher.readthedocs.io/en/master/#simple-substitution-cipher
 	        http://www.practicalcryptography.com/ciphers/simple-substitution-cipher/
 	"""
+	monoalphabetic = True
 	keyAlpha = []
 	argKey = None
 
 	def __init__(self, key):
 		self.argKey = key
 
+	def cipherAlphabet(self):
+		""" Returns the user's key/cipher alphabet. """
+		return self.keyAlpha
+
 	def getKey(self):
 		""" Retrieves the key/cipher alphabet from the user. """
 		keyString = self.argKey
+		self.keyAlpha = []
 		while True:
 			if keyString is None:
-				keyString = input("Key/cipher alphabet: ").upper()
+				keyString = self.promptKey("Key/cipher alphabet: ").upper()
 			else:
 				keyString = keyString.upper()	
 			if not keyString.isalpha():
-				print("Invalid key: The key should only contain letters")
+				self.invalidKey("Invalid key: The key should only contain letters")
 				keyString = None
 				continue
 			if len(keyString) != 26:
-				print("Invalid key: The key must be 26 characters in length")
+				self.invalidKey("Invalid key: The key must be 26 characters in length")
 				keyString = None
 				continue
 			for c in keyString:
 				self.keyAlpha.append(c)
 			if len(self.keyAlpha) != len(set(self.keyAlpha)):
-				print("Invalid key: There should be no repeated characters in the key")
+				self.invalidKey("Invalid key: There should be no repeated characters in the key")
 				keyString = None
 				self.keyAlpha = []
 				continue
 			break
 
-	def encipher(self, oldFileText, file):
-		""" 
-		    Encrypts the file by replacing each character in the
-		    text from the input file with its equivalent in the
-		    user's desired key/cipher alphabet.  
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be encrypted
-		    file : file
-		        The output text file which will contain the
-		        encrypted text
-
-		"""
-		self.getKey()
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.keyAlpha[self.letters.index(c)]
-			file.write(newChar)
-
-	def decipher(self, oldFileText, file):
-		""" 
-		    Decrypts the file by replacing each character in the
-		    text from the input file with its reverse.  
-
-		    Parameters
-		    ----------
-		    oldFileText : str
-		        The text from the input text file to be decrypted
-		    file : file
-		        The output text file which will contain the
-		        decrypted text
-
-		"""
-		self.getKey()
-		for c in oldFileText:
-			newChar = c
-			if c in self.letters:
-				newChar = self.letters[self.keyAlpha.index(c)]
-			file.write(newChar)
-
 class ColumnarTranspositionCipher(Cipher):
 	""" 
 	    The Simple Columnar Transposition cipher "is usually based on a keyword mixed 
@@ -452,8 +922,10 @@ class ColumnarTranspositionCipher(Cipher):
 
 	"""
 	lettersInKeyword = []
-	columns = {}
+	columnOrder = []
 	argKey = None
+	wholeText = True
+	alphabets = ALPHABETS
 
 	def __init__(self, key):
 		self.argKey = key
@@ -462,216 +934,645 @@ class ColumnarTranspositionCipher(Cipher):
 		""" Retrieves the user's desired keyword. """
 		keyword = self.argKey
 		if keyword is not None and not keyword.isalpha():
-			print("Invalid key: The key should only contain letters")
-		else:
+			self.invalidKey("Invalid key: The key should only contain letters")
+		elif keyword is not None:
 			keyword = keyword.upper()
 			
 		while keyword is None or not keyword.isalpha():
-			keyword = input("Keyword: ").upper()	
+			keyword = self.promptKey("Keyword: ").upper()	
 			if not keyword.isalpha():
-				print("Invalid key: The key should only contain letters")
+				self.invalidKey("Invalid key: The key should only contain letters")
 
+		self.lettersInKeyword = []
 		for c in keyword:
 			i = 1
 			while c + str(i) in self.lettersInKeyword:
 				i += 1
 			self.lettersInKeyword.append(c + str(i))
-			self.columns[c + str(i)] = []
 
-	def encipher(self, oldFileText, file):
+		# The columns of the matrix in the order they are extracted
+		self.columnOrder = sorted(range(0, len(keyword)), key=lambda column: self.lettersInKeyword[column])
+
+	def buildTables(self):
+		""" The column order is all that is derived from the keyword, and getKey builds it. """
+		pass
+
+	def encipherText(self, text, position=0):
 		""" 
-		    Encrypts the file using the user's desired keyword.
+		    Encrypts the text using the user's desired keyword. Each
+		    column of the matrix is a slice of the text taking every
+		    width-th character, so the columns are extracted directly
+		    from the text in the order given by the keyword. The whole
+		    text is needed, so position is not used.
 
 		    Parameters
 		    ----------
-		    oldFileText : str
-		        The text from the input text file to be encrypted
-		    file : file
-		        The output text file which will contain the
-		        encrypted text
+		    text : str
+		        The text to be encrypted
+		    position : int
+		        Unused
 
 		"""
-		self.getKey()
-		i = 0
-		for c in oldFileText:
-			currentKeyChar = self.lettersInKeyword[i]
-			currentList = self.columns.get(currentKeyChar)
-			currentList.append(c)
-			self.columns[currentKeyChar] = currentList
-			i = (i + 1) % len(self.lettersInKeyword)
-
-		# Pads the remaining columns if necessary with 'X'
-		while i != 0:
-			currentKeyChar = self.lettersInKeyword[i]
-			currentList = self.columns.get(currentKeyChar)
-			currentList.append('X')
-			self.columns[currentKeyChar] = currentList
-			i = (i + 1) % len(self.lettersInKeyword)
-
-		self.lettersInKeyword.sort()
-		for letter in self.lettersInKeyword:
-			currentColumn = self.columns.get(letter)
-			if currentColumn is not None:
-				for c in currentColumn:
-					file.write(c)
-			
+		width = len(self.columnOrder)
+		# Pads the last row if necessary with 'X'
+		text += 'X' * (-len(text) % width)
+		return ''.join([text[column::width] for column in self.columnOrder])
 
-	def decipher(self, oldFileText, file):
+	def decipherText(self, text, position=0):
 		""" 
-		    Decrypts the file using the user's desired keyword.  
+		    Decrypts the text using the user's desired keyword. The
+		    text is cut into the columns in the order given by the
+		    keyword, and the columns are then read row by row. The
+		    whole text is needed, so position is not used.
 
 		    Parameters
 		    ----------
-		    oldFileText : str
-		        The text from the input text file to be decrypted
-		    file : file
-		        The output text file which will contain the
-		        decrypted text
+		    text : str
+		        The text to be decrypted
+		    position : int
+		        Unused
 
 		"""
-		self.getKey()
-		lettersInKeywordCopy = self.lettersInKeyword.copy()
-		lettersInKeywordCopy.sort()
-		columnSize = math.ceil(len(oldFileText) / len(self.lettersInKeyword))
-
-		keywordCharsIndex = -1
-		currentKeyChar = None
-		for textIndex in range(0, len(oldFileText)):
-			if textIndex % columnSize == 0:
-				keywordCharsIndex += 1
-				currentKeyChar = lettersInKeywordCopy[keywordCharsIndex]
-			currentTextChar = oldFileText[textIndex]
-			currentList = self.columns.get(currentKeyChar)
-			currentList.append(currentTextChar)
-			self.columns[currentKeyChar] = currentList
-
-		for row in range(0, columnSize):
-			for letter in self.lettersInKeyword:
-				currentList = self.columns.get(letter)
-				if len(currentList) != 0:
-					file.write(currentList[row])
-
-
-# --- click command-line interface code ----------------------------	
-
-CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
-
-@click.group(context_settings=CONTEXT_SETTINGS)
-def classicCiphers():
-	""" A tool that can encrypt or decrypt a text file with a variety of ciphers. """
-	pass
-
-@classicCiphers.command()
-@click.option('-c', is_flag=True, help='use the Caesar cipher')
-@click.option('-v', is_flag=True, help='use the Vigenere cipher')
-@click.option('-af', is_flag=True, help='use the Affine cipher')
-@click.option('-at', is_flag=True, help='use the Atbash cipher')
-@click.option('-s', is_flag=True, help='use the Simple Substitution cipher')
-@click.option('-t', is_flag=True, help='use the Columnar Transposition cipher')
-@click.option('-k', '--key', help='The key needed for the cipher')
-@click.option('-a', help='The \'a\' variable needed for the Affine cipher')
-@click.option('-b', help='The \'b\' variable needed for the Affine cipher')
-@click.argument('input_file', type=click.Path(exists=True))
-@click.argument('output_file', type=click.Path(exists=True))
-def encrypt(c, v, af, at, s, t, key, a, b, input_file, output_file):
-	""" Encrypts a file using one of the available ciphers. """
-	file = open(input_file, 'r')
-	oldFileText = file.read().upper()
-	file.close()
-
-	file = open(output_file, 'w')
-
-	trueCount = 0
-	cipher = None
-
-	if c == True:
-		trueCount += 1
-		cipher = CaesarCipher(key)
-	
-	if v == True:
-		trueCount += 1
-		cipher = VigenereCipher(key)
-	
-	if af == True:
-		trueCount += 1
-		cipher = AffineCipher(a, b)
-
-	if at == True:
-		trueCount += 1
-		cipher = AtbashCipher()
+		width = len(self.columnOrder)
+		columnSize = math.ceil(len(text) / width)
+		columns = [''] * width
+		for k, column in enumerate(self.columnOrder):
+			columns[column] = text[k * columnSize:(k + 1) * columnSize]
+
+		if len(text) != columnSize * width:
+			# Without padding the last columns are shorter, so the
+			# rows are read one at a time
+			return ''.join(map(''.join, itertools.zip_longest(*columns, fillvalue='')))
+
+		# Writes each column into every width-th slot of the output
+		if text.isascii():
+			encoding, itemFormat, itemSize = 'ascii', 'B', 1
+		else:
+			encoding, itemFormat, itemSize = 'utf-32-le', 'I', 4
+		newText = memoryview(bytearray(len(text) * itemSize)).cast(itemFormat)
+		for column in range(0, width):
+			newText[column::width] = memoryview(columns[column].encode(encoding)).cast(itemFormat)
+		return newText.tobytes().decode(encoding)
+
+	def encipherBytes(self, data, position=0):
+		""" 
+		    Encrypts the bytes using the user's desired keyword, in the
+		    same way as the text, upper-casing the ASCII letters for the
+		    upper alphabet. The whole input is needed, so position is
+		    not used.
+
+		    Parameters
+		    ----------
+		    data : bytes
+		        The bytes to be encrypted
+		    position : int
+		        Unused
+
+		"""
+		width = len(self.columnOrder)
+		if self.alphabet == 'upper':
+			data = data.upper()
+		data = bytes(data) + b'X' * (-len(data) % width)
+		return b''.join([data[column::width] for column in self.columnOrder])
+
+	def decipherBytes(self, data, position=0):
+		""" 
+		    Decrypts the bytes using the user's desired keyword, in the
+		    same way as the text, upper-casing the ASCII letters for the
+		    upper alphabet. The whole input is needed, so position is
+		    not used.
+
+		    Parameters
+		    ----------
+		    data : bytes
+		        The bytes to be decrypted
+		    position : int
+		        Unused
+
+		"""
+		width = len(self.columnOrder)
+		if self.alphabet == 'upper':
+			data = data.upper()
+		columnSize = math.ceil(len(data) / width)
+		columns = [b''] * width
+		for k, column in enumerate(self.columnOrder):
+			columns[column] = data[k * columnSize:(k + 1) * columnSize]
+
+		if len(data) != columnSize * width:
+			return bytes(byte for row in itertools.zip_longest(*columns) for byte in row if byte is not None)
+
+		newData = bytearray(len(data))
+		for column in range(0, width):
+			newData[column::width] = columns[column]
+		return bytes(newData)
+
+	def processStream(self, inFile, file, chunkSize, transform, normalize=str.upper):
+		""" 
+		    The columns can only be written once the whole text is
+		    known, so the input file is read all at once.
 
-	if s == True:
-		trueCount += 1
-		cipher = SimpleSubstitutionCipher(key)
-
-	if t == True:
-		trueCount += 1
-		cipher = ColumnarTranspositionCipher(key)
-
-	if cipher is not None and trueCount is 1:
-		cipher.encipher(oldFileText, file)
-	elif trueCount > 1:
-		print("ERROR: More than one cipher selected")
-	elif trueCount is 0:
-		print("ERROR: No cipher selected")
-
-	file.close()
-
-@classicCiphers.command()
-@click.option('-c', is_flag=True, help='use the Caesar cipher')
-@click.option('-v', is_flag=True, help='use the Vigenere cipher')
-@click.option('-af', is_flag=True, help='use the Affine cipher')
-@click.option('-at', is_flag=True, help='use the Atbash cipher')
-@click.option('-s', is_flag=True, help='use the Simple Substitution cipher')
-@click.option('-t', is_flag=True, help='use the Columnar Transposition cipher')
-@click.option('-k', '--key', help='The key needed for the cipher')
-@click.option('-a', help='The \'a\' variable needed for the Affine cipher')
-@click.option('-b', help='The \'b\' variable needed for the Affine cipher')
-@click.argument('input_file', type=click.Path(exists=True))
-@click.argument('output_file', type=click.Path(exists=True))
-def decrypt(c, v, af, at, s, t, key, a, b, input_file, output_file):
-	""" Decrypts a file using one of the available ciphers. """
-	file = open(input_file, 'r')
-	oldFileText = file.read().upper()
-	file.close()
-
-	file = open(output_file, 'w')
-
-	trueCount = 0
-	cipher = None
-
-	if c == True:
-		trueCount += 1
-		cipher = CaesarCipher(key)
-	
-	if v == True:
-		trueCount += 1
-		cipher = VigenereCipher(key)
-	
-	if af == True:
-		trueCount += 1
-		cipher = AffineCipher(a, b)
-
-	if at == True:
-		trueCount += 1
+		"""
+		file.write(transform(normalize(inFile.read())))
+
+	def processMapped(self, inputPath, outputPath, chunkSize, transform):
+		""" The columns depend on the whole text, so it cannot be mapped. """
+		raise ValueError("--mmap is not available for the Columnar Transposition cipher")
+
+	def processRange(self, inFile, file, offset, length, chunkSize, transform):
+		""" The columns depend on the whole text, so a range cannot be read alone. """
+		raise ValueError("--offset and --length are not available for the Columnar Transposition cipher")
+
+	def processSpilled(self, inputPath, outputPath, chunkSize, decrypt):
+		""" 
+		    Encrypts or decrypts the bytes of a file larger than memory.
+		    The size of the file gives the number of rows of the matrix,
+		    and so where each column starts in the ciphertext. Only
+		    chunkSize bytes are held at a time.
+
+		"""
+		size = os.path.getsize(inputPath)
+		with open(inputPath, 'rb') as inFile, open(outputPath, 'w+b') as file:
+			if decrypt:
+				self.gatherColumns(inFile, file, size, chunkSize)
+			else:
+				self.spillColumns(inFile, file, size, chunkSize)
+
+	def spillColumns(self, inFile, file, size, chunkSize):
+		""" 
+		    Reads the plaintext once, in order, and writes the piece of
+		    every column found in each chunk straight to where that
+		    column lies in the ciphertext.
+
+		"""
+		width = len(self.columnOrder)
+		rows = math.ceil(size / width)
+		columnStart = [0] * width
+		for k, column in enumerate(self.columnOrder):
+			columnStart[column] = k * rows
+
+		position = 0
+		chunk = inFile.read(chunkSize)
+		while chunk:
+			if self.alphabet == 'upper':
+				chunk = chunk.upper()
+			for column in range(0, width):
+				offset = (column - position) % width
+				if offset < len(chunk):
+					file.seek(columnStart[column] + (position + offset) // width)
+					file.write(chunk[offset::width])
+			position += len(chunk)
+			chunk = inFile.read(chunkSize)
+
+		# Pads the last row if necessary with 'X'
+		if size % width:
+			for column in range(size % width, width):
+				file.seek(columnStart[column] + rows - 1)
+				file.write(b'X')
+
+	def gatherColumns(self, inFile, file, size, chunkSize):
+		""" 
+		    Writes the plaintext a block of rows at a time, reading the
+		    same rows of every column of the ciphertext from where the
+		    column starts.
+
+		"""
+		width = len(self.columnOrder)
+		rows = math.ceil(size / width)
+		blockRows = max(1, chunkSize // width)
+		for row in range(0, rows, blockRows):
+			columns = [b''] * width
+			for k, column in enumerate(self.columnOrder):
+				start = k * rows + row
+				end = min(k * rows + row + blockRows, (k + 1) * rows, size)
+				if end > start:
+					inFile.seek(start)
+					columns[column] = inFile.read(end - start)
+					if self.alphabet == 'upper':
+						columns[column] = columns[column].upper()
+
+			if all(len(column) == len(columns[0]) for column in columns):
+				block = bytearray(len(columns[0]) * width)
+				for column in range(0, width):
+					block[column::width] = columns[column]
+				file.write(block)
+			else:
+				# Without padding the last columns are shorter
+				file.write(bytes(byte for row in itertools.zip_longest(*columns)
+					for byte in row if byte is not None))
+
+	def processParallel(self, inFile, file, chunkSize, jobs, decrypt, normalize=str.upper):
+		""" 
+		    Splits the text into blocks of whole rows of the matrix.
+		    Encrypting a block gives the same piece of every column,
+		    so the pieces are gathered per column before writing. For
+		    decryption, each block is rebuilt from the same rows of
+		    every column, which is a ciphertext of its own.
+
+		"""
+		# The text is a str, or bytes in binary mode
+		text = normalize(inFile.read())
+		empty = text[:0]
+		width = len(self.lettersInKeyword)
+		blockSize = max(1, chunkSize // width) * width
+
+		if decrypt and len(text) % width != 0:
+			# Only padded ciphertexts split into whole rows
+			file.write(self.transformData(text, 0, True))
+			return
+
+		with self.createPool(jobs) as pool:
+			if not decrypt:
+				# Pads the last row if necessary with 'X'
+				text += ('X' if isinstance(text, str) else b'X') * (-len(text) % width)
+				blocks = [text[i:i + blockSize] for i in range(0, len(text), blockSize)]
+				columns = [[] for letter in self.lettersInKeyword]
+				for result in pool.map(transformInWorker, blocks,
+						itertools.repeat(0), itertools.repeat(False)):
+					rows = len(result) // width
+					for k in range(0, width):
+						columns[k].append(result[k * rows:(k + 1) * rows])
+				for column in columns:
+					file.write(empty.join(column))
+			else:
+				columnSize = len(text) // width
+				blocks = []
+				for row in range(0, columnSize, blockSize // width):
+					end = min(row + blockSize // width, columnSize)
+					blocks.append(empty.join(text[k * columnSize + row:k * columnSize + end]
+						for k in range(0, width)))
+				for result in pool.map(transformInWorker, blocks,
+						itertools.repeat(0), itertools.repeat(True)):
+					file.write(result)
+
+
+class CipherChain(Cipher):
+	""" 
+	    A chain of ciphers applied one after the other in memory, the
+	    output of each being the input of the next. Decryption applies
+	    them in reverse order. Consecutive monoalphabetic ciphers are
+	    fused into a single Simple Substitution cipher, since replacing
+	    the letters with one alphabet and then another is the same as
+	    replacing them with the composed alphabet, so they cost a
+	    single pass however many there are.
+
+	"""
+	stages = []
+	fusedStages = []
+
+	def __init__(self, stages):
+		self.stages = stages
+		self.wholeText = any(stage.wholeText for stage in stages)
+		self.alphabets = tuple(alphabet for alphabet in ALPHABETS
+			if all(alphabet in stage.alphabets for stage in stages))
+
+	def getKey(self):
+		""" Retrieves the key of every cipher of the chain. """
+		for stage in self.stages:
+			stage.alphabet = self.alphabet
+			stage.prepare()
+
+	def buildTables(self):
+		""" Fuses the consecutive monoalphabetic ciphers of the chain. """
+		self.fusedStages = []
+		group = []
+		for stage in self.stages + [None]:
+			if stage is not None and stage.monoalphabetic:
+				group.append(stage)
+				continue
+			if len(group) == 1:
+				self.fusedStages.append(group[0])
+			elif group:
+				self.fusedStages.append(self.fuse(group))
+			group = []
+			if stage is not None:
+				self.fusedStages.append(stage)
+
+	def fuse(self, group):
+		""" 
+		    Returns a Simple Substitution cipher equivalent to the
+		    monoalphabetic ciphers of the group applied in order.
+
+		"""
+		alphabet = list(self.letters)
+		encryptByteTable = decryptByteTable = bytes(range(0, 256))
+		for stage in group:
+			stageAlphabet = stage.cipherAlphabet()
+			alphabet = [stageAlphabet[self.letters.index(c)] for c in alphabet]
+			# Translating a byte table by another composes them
+			encryptByteTable = encryptByteTable.translate(stage.encryptByteTable)
+			decryptByteTable = stage.decryptByteTable.translate(decryptByteTable)
+		cipher = SimpleSubstitutionCipher(''.join(alphabet))
+		cipher.interactive = False
+		cipher.prepare()
+		# The byte tables may be of the bytes alphabet, which a
+		# Simple Substitution cipher does not build itself
+		cipher.encryptByteTable = encryptByteTable
+		cipher.decryptByteTable = decryptByteTable
+		return cipher
+
+	def encipherText(self, text, position=0):
+		""" Encrypts the text with every cipher of the chain in order. """
+		for stage in self.fusedStages:
+			text = stage.encipherText(text, position)
+		return text
+
+	def decipherText(self, text, position=0):
+		""" Decrypts the text with every cipher of the chain in reverse order. """
+		for stage in reversed(self.fusedStages):
+			text = stage.decipherText(text, position)
+		return text
+
+	def encipherBytes(self, data, position=0):
+		""" Encrypts the bytes with every cipher of the chain in order. """
+		for stage in self.fusedStages:
+			data = stage.encipherBytes(data, position)
+		return data
+
+	def decipherBytes(self, data, position=0):
+		""" Decrypts the bytes with every cipher of the chain in reverse order. """
+		for stage in reversed(self.fusedStages):
+			data = stage.decipherBytes(data, position)
+		return data
+
+	def processStream(self, inFile, file, chunkSize, transform, normalize=str.upper):
+		""" 
+		    Streams the input file, unless a cipher of the chain needs
+		    the whole text, in which case it is read all at once.
+
+		"""
+		if self.wholeText:
+			file.write(transform(normalize(inFile.read())))
+		else:
+			Cipher.processStream(self, inFile, file, chunkSize, transform, normalize)
+
+	def processMapped(self, inputPath, outputPath, chunkSize, transform):
+		""" Maps the files, unless a cipher of the chain needs the whole text. """
+		if self.wholeText:
+			raise ValueError("--mmap is not available for a chain with the Columnar Transposition cipher")
+		else:
+			Cipher.processMapped(self, inputPath, outputPath, chunkSize, transform)
+
+	def processRange(self, inFile, file, offset, length, chunkSize, transform):
+		""" Reads the range alone, unless a cipher of the chain needs the whole text. """
+		if self.wholeText:
+			raise ValueError("--offset and --length are not available for a chain with the Columnar "
+				"Transposition cipher")
+		else:
+			Cipher.processRange(self, inFile, file, offset, length, chunkSize, transform)
+
+	def processSpilled(self, inputPath, outputPath, chunkSize, decrypt):
+		""" Streams the bytes, unless a cipher of the chain needs the whole text. """
+		if self.wholeText:
+			raise ValueError("--spill is not available for a chain with the Columnar Transposition cipher")
+		else:
+			Cipher.processSpilled(self, inputPath, outputPath, chunkSize, decrypt)
+
+	def processParallel(self, inFile, file, chunkSize, jobs, decrypt, normalize=str.upper):
+		""" 
+		    Hands the chunks to the workers, unless a cipher of the
+		    chain needs the whole text, in which case the text is
+		    transformed at once in this process.
+
+		"""
+		if self.wholeText:
+			file.write(self.transformData(normalize(inFile.read()), 0, decrypt))
+		else:
+			Cipher.processParallel(self, inFile, file, chunkSize, jobs, decrypt, normalize)
+
+
+# --- library interface code ----------------------------------------
+
+# The ciphers by the names used with encrypt and decrypt
+CIPHERS = {
+	'caesar': CaesarCipher,
+	'vigenere': VigenereCipher,
+	'affine': AffineCipher,
+	'atbash': AtbashCipher,
+	'substitution': SimpleSubstitutionCipher,
+	'transposition': ColumnarTranspositionCipher,
+}
+
+# Number of characters read from the input file at a time
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Number of prepared ciphers kept by getCipher
+CIPHER_CACHE_SIZE = 256
+
+def checkKey(name, key):
+	""" 
+	    Raises a ValueError if the key does not have the type the
+	    cipher expects, before the cipher reads it.
+
+	"""
+	if name == 'affine':
+		if not isinstance(key, tuple) or len(key) != 2:
+			raise ValueError("Invalid key: The Affine key should be an (a, b) pair")
+	elif name == 'caesar':
+		if not isinstance(key, (int, str)) or isinstance(key, bool):
+			raise ValueError("Invalid key: The Caesar key should be a shift value")
+	elif name != 'atbash' and not isinstance(key, str):
+		raise ValueError("Invalid key: The key should be a string of letters")
+
+@functools.lru_cache(maxsize=CIPHER_CACHE_SIZE)
+def getCipher(name, key=None, alphabet='upper', skipNonLetters=False):
+	""" 
+	    Returns the prepared cipher for a name and key, building its
+	    tables only the first time. The least recently used ciphers
+	    are dropped once CIPHER_CACHE_SIZE are cached, and the hits and
+	    misses are given by getCipher.cache_info(). The ciphers hold no
+	    state between calls, so a cached cipher can be shared. A key
+	    of the wrong type for the cipher raises a ValueError.
+
+	    Parameters
+	    ----------
+	    name : str
+	        One of the names in CIPHERS
+	    key : str, int or tuple
+	        The key of the cipher: the shift for Caesar, an (a, b) pair
+	        for Affine, None for Atbash and the keyword or cipher
+	        alphabet otherwise
+	    alphabet : str
+	        The alphabet of the byte tables, one of ALPHABETS
+	    skipNonLetters : bool
+	        Whether the Vigenere key moves on letters only
+
+	"""
+	if name not in CIPHERS:
+		raise ValueError("Unknown cipher: %s" % name)
+	if skipNonLetters and name != 'vigenere':
+		raise ValueError("Only the Vigenere key can skip non-letters")
+	if skipNonLetters and alphabet == 'bytes':
+		raise ValueError("The key cannot skip non-letters with the bytes alphabet, where every byte is shifted")
+	checkKey(name, key)
+	if name == 'affine':
+		cipher = AffineCipher(*key)
+	elif name == 'atbash':
 		cipher = AtbashCipher()
+	elif name == 'vigenere':
+		cipher = VigenereCipher(key, skipNonLetters)
+	else:
+		cipher = CIPHERS[name](key)
+	cipher.interactive = False
+	cipher.alphabet = alphabet
+	cipher.prepare()
+	return cipher
+
+def encrypt(name, text, key=None, alphabet='upper', skipNonLetters=False):
+	""" 
+	    Encrypts text, without asking for anything, and returns it.
+	    A str is upper-cased first, as the command-line tool does, and
+	    bytes are transformed as they are. An invalid key raises a
+	    ValueError.
+
+	    Parameters
+	    ----------
+	    name : str
+	        One of the names in CIPHERS
+	    text : str or bytes
+	        The text to be encrypted
+	    key : str, int or tuple
+	        The key of the cipher, as for getCipher
+	    alphabet : str
+	        The alphabet substituted in bytes, one of ALPHABETS: the
+	        letters upper-cased, the letters keeping their case, or
+	        all the byte values
+	    skipNonLetters : bool
+	        Whether the Vigenere key moves on letters only
 
-	if s == True:
-		trueCount += 1
-		cipher = SimpleSubstitutionCipher(key)
+	"""
+	cipher = getCipher(name, key, alphabet, skipNonLetters)
+	if isinstance(text, (bytes, bytearray)):
+		return bytes(cipher.encipherBytes(text))
+	return cipher.encipherText(text.upper())
+
+def decrypt(name, text, key=None, alphabet='upper', skipNonLetters=False):
+	""" 
+	    Decrypts text, without asking for anything, and returns it.
+	    A str is upper-cased first, as the command-line tool does, and
+	    bytes are transformed as they are. An invalid key raises a
+	    ValueError.
+
+	    Parameters
+	    ----------
+	    name : str
+	        One of the names in CIPHERS
+	    text : str or bytes
+	        The text to be decrypted
+	    key : str, int or tuple
+	        The key of the cipher, as for getCipher
+	    alphabet : str
+	        The alphabet substituted in bytes, one of ALPHABETS: the
+	        letters upper-cased, the letters keeping their case, or
+	        all the byte values
+	    skipNonLetters : bool
+	        Whether the Vigenere key moves on letters only
 
-	if t == True:
-		trueCount += 1
-		cipher = ColumnarTranspositionCipher(key)
+	"""
+	cipher = getCipher(name, key, alphabet, skipNonLetters)
+	if isinstance(text, (bytes, bytearray)):
+		return bytes(cipher.decipherBytes(text))
+	return cipher.decipherText(text.upper())
 
-	if cipher is not None and trueCount is 1:
-		cipher.decipher(oldFileText, file)
-	elif trueCount > 1:
-		print("ERROR: More than one cipher selected")
-	elif trueCount is 0:
-		print("ERROR: No cipher selected")
+def decryptRange(name, path, offset, length, key=None, alphabet='upper', skipNonLetters=False):
+	""" 
+	    Decrypts length bytes of a ciphertext file from the byte at
+	    offset, without decrypting the rest of the file, and returns
+	    them. The result is the same range of the whole file decrypted
+	    as bytes. A Vigenere key skipping non-letters needs the letters
+	    before the offset counted, so only those bytes are read first.
+	    The Columnar Transposition cipher needs the whole text, so it
+	    raises a ValueError.
+
+	    Parameters
+	    ----------
+	    name : str
+	        One of the names in CIPHERS
+	    path : str
+	        The path of the ciphertext file
+	    offset : int
+	        The position of the first byte to decrypt
+	    length : int
+	        The number of bytes to decrypt
+	    key : str, int or tuple
+	        The key of the cipher, as for getCipher
+	    alphabet : str
+	        The alphabet the file was encrypted with, as for decrypt
+	    skipNonLetters : bool
+	        Whether the Vigenere key moves on letters only
 
-	file.close()
+	"""
+	cipher = getCipher(name, key, alphabet, skipNonLetters)
+	if cipher.wholeText:
+		raise ValueError("A range cannot be decrypted alone with the %s cipher" % name)
+	output = io.BytesIO()
+	with open(path, 'rb') as file:
+		cipher.processRange(file, output, offset, length, DEFAULT_CHUNK_SIZE, cipher.decipherBytes)
+	return output.getvalue()
+
+
+# --- fast command-line entry point ---------------------------------
+
+# The cipher chosen by each option flag of the encrypt and decrypt commands
+CIPHER_FLAGS = {
+	'-c': 'caesar',
+	'-v': 'vigenere',
+	'-af': 'affine',
+	'-at': 'atbash',
+	'-s': 'substitution',
+	'-t': 'transposition',
+}
+
+def runFast(args):
+	""" 
+	    Runs the common case of the encrypt and decrypt commands
+	    without importing click: a single cipher flag, its key given
+	    with -k/--key (or -a and -b), then the existing input and
+	    output files. Returns False without doing anything for any
+	    other command line, or a key that is not valid, which are left
+	    to the command-line interface of cipherCommands.py.
+
+	"""
+	if not args or args[0] not in ('encrypt', 'decrypt'):
+		return False
+	names = []
+	values = {'-k': None, '-a': None, '-b': None}
+	paths = []
+	i = 1
+	while i < len(args):
+		option, equals, value = args[i].partition('=') if args[i].startswith('--') else (args[i], '', '')
+		if option == '--key':
+			option = '-k'
+		if option in CIPHER_FLAGS:
+			names.append(CIPHER_FLAGS[option])
+		elif option in values:
+			if not equals:
+				i += 1
+				if i == len(args):
+					return False
+				value = args[i]
+			values[option] = value
+		elif option.startswith('-'):
+			return False
+		else:
+			paths.append(option)
+		i += 1
+	if len(names) != 1 or len(paths) != 2 or not all(os.path.exists(path) for path in paths):
+		return False
+
+	if names[0] == 'affine':
+		key = (values['-a'], values['-b'])
+	else:
+		key = values['-k']
+	try:
+		cipher = getCipher(names[0], key)
+	except ValueError:
+		return False
+	transform = cipher.decipherText if args[0] == 'decrypt' else cipher.encipherText
+	with open(paths[0], 'r') as inFile, open(paths[1], 'w') as file:
+		cipher.processStream(inFile, file, DEFAULT_CHUNK_SIZE, transform)
+	return True
 
 if __name__ == '__main__':
-    classicCiphers()
+	if not runFast(sys.argv[1:]):
+		import cipherCommands
+		cipherCommands.classicCiphers()
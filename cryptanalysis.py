@@ -0,0 +1,1065 @@
+#!/usr/bin/env python
+""" cryptanalysis.py
+
+    Attacks on the ciphers of classicCiphers.py, used to recover the
+    key of an intercepted ciphertext. Candidate keys are scored from
+    the letter frequencies of the ciphertext, which are counted once,
+    so no candidate needs the whole text to be decrypted. When part
+    of the plaintext is known, the key is read from it instead.
+
+"""
+
+import array
+import bisect
+import collections
+import concurrent.futures
+import heapq
+import math
+import random
+import re
+
+from classicCiphers import Cipher, ColumnarTranspositionCipher, loadNumpy
+
+# Relative frequencies of the letters 'A' to 'Z' in English text, in percent
+ENGLISH_FREQUENCIES = [
+	8.167, 1.492, 2.782, 4.253, 12.702, 2.228, 2.015, 6.094, 6.966,
+	0.153, 0.772, 4.025, 2.406, 6.749, 7.507, 1.929, 0.095, 5.987,
+	6.327, 9.056, 2.758, 0.978, 2.360, 0.150, 1.974, 0.074,
+]
+
+# The values of 'a' with no common factors with 26
+AFFINE_A_VALUES = [1, 3, 5, 7, 9, 11, 15, 17, 19, 21, 23, 25]
+
+def countLetters(text, counts=None):
+	""" 
+	    Returns the number of times each letter 'A' to 'Z' appears in
+	    the text, added to counts if given so that a file can be
+	    counted one chunk at a time.
+
+	"""
+	if counts is None:
+		counts = [0] * 26
+	for i, letter in enumerate(Cipher.letters):
+		counts[i] += text.count(letter)
+	return counts
+
+def countFileLetters(file, chunkSize):
+	""" Counts the letters of a text file one chunk at a time. """
+	counts = [0] * 26
+	chunk = file.read(chunkSize)
+	while chunk:
+		countLetters(chunk.upper(), counts)
+		chunk = file.read(chunkSize)
+	return counts
+
+def chiSquared(counts):
+	""" 
+	    Returns the chi-squared statistic of the letter counts against
+	    the English letter frequencies. The lower the score, the more
+	    the counts look like English text.
+
+	"""
+	total = sum(counts)
+	if total == 0:
+		return 0.0
+	score = 0.0
+	for count, frequency in zip(counts, ENGLISH_FREQUENCIES):
+		expected = total * frequency / 100
+		score += (count - expected) ** 2 / expected
+	return score
+
+def crackCaesar(counts):
+	""" 
+	    Scores all 26 shifts of the Caesar cipher. The plaintext letter
+	    p was enciphered as p + shift, so its count is read from there.
+	    Returns (score, shift) pairs, best first.
+
+	"""
+	candidates = []
+	for shift in range(0, 26):
+		plainCounts = [counts[(p + shift) % 26] for p in range(0, 26)]
+		candidates.append((chiSquared(plainCounts), shift))
+	candidates.sort()
+	return candidates
+
+def crackAffine(counts):
+	""" 
+	    Scores all 312 valid keys of the Affine cipher. The plaintext
+	    letter p was enciphered as ap + b (mod 26), so its count is
+	    read from there. Returns (score, a, b) triples, best first.
+
+	"""
+	candidates = []
+	for a in AFFINE_A_VALUES:
+		for b in range(0, 26):
+			plainCounts = [counts[(a * p + b) % 26] for p in range(0, 26)]
+			candidates.append((chiSquared(plainCounts), a, b))
+	candidates.sort()
+	return candidates
+
+# Index of coincidence of English text and of uniformly random letters
+ENGLISH_IOC = 0.0667
+RANDOM_IOC = 1 / 26
+
+def indexOfCoincidence(counts):
+	""" 
+	    Returns the probability that two letters drawn at random from
+	    the counted text are the same letter.
+
+	"""
+	total = sum(counts)
+	if total < 2:
+		return 0.0
+	return sum(count * (count - 1) for count in counts) / (total * (total - 1))
+
+def countColumnLetters(text, period, columns=None, position=0):
+	""" 
+	    Counts the letters of each of the period columns of the text,
+	    where the character at offset i of the whole text is in column
+	    i % period. The counts are added to columns if given, so that a
+	    file can be counted one chunk at a time from its position.
+
+	"""
+	if columns is None:
+		columns = [[0] * 26 for column in range(0, period)]
+	for column in range(0, period):
+		countLetters(text[(column - position) % period::period], columns[column])
+	return columns
+
+def kasiskiDistances(text, maxDistances=10000):
+	""" 
+	    Returns the distances between repeated trigrams of letters in
+	    the text. A repeated plaintext trigram enciphered with the same
+	    key letters repeats in the ciphertext, so most distances are
+	    multiples of the key length.
+
+	"""
+	lastPositions = {}
+	distances = []
+	for i in range(0, len(text) - 2):
+		trigram = text[i:i + 3]
+		if not trigram.isalpha():
+			continue
+		if trigram in lastPositions:
+			distances.append(i - lastPositions[trigram])
+			if len(distances) >= maxDistances:
+				break
+		lastPositions[trigram] = i
+	return distances
+
+def scoreKeyLengths(text, maxKeyLength):
+	""" 
+	    Scores each key length from 1 to maxKeyLength. The average
+	    index of coincidence of its columns is scaled so that random
+	    letters score 0 and English scores 1, and the share of the
+	    Kasiski distances it divides is added, less the share that any
+	    number divides by chance. Returns (keyLength, score,
+	    indexOfCoincidence, kasiskiFraction) tuples.
+
+	"""
+	distances = kasiskiDistances(text[:100000])
+	scores = []
+	for keyLength in range(1, maxKeyLength + 1):
+		columns = countColumnLetters(text, keyLength)
+		ioc = sum(indexOfCoincidence(counts) for counts in columns) / keyLength
+		kasiski = 0.0
+		if distances:
+			kasiski = sum(1 for distance in distances if distance % keyLength == 0) / len(distances)
+		score = (ioc - RANDOM_IOC) / (ENGLISH_IOC - RANDOM_IOC) + kasiski - 1 / keyLength
+		scores.append((keyLength, score, ioc, kasiski))
+	return scores
+
+def chooseKeyLength(scores):
+	""" 
+	    Returns the smallest key length scoring within 10% of the best
+	    score, since every multiple of the key length scores as well.
+	    The margin is taken from the size of the best score, which is
+	    negative for a text with too few letters.
+
+	"""
+	bestScore = max(score for keyLength, score, ioc, kasiski in scores)
+	for keyLength, score, ioc, kasiski in scores:
+		if score >= bestScore - 0.1 * abs(bestScore):
+			return keyLength
+
+def crackVigenere(file, chunkSize, maxKeyLength=40, sampleSize=1000000):
+	""" 
+	    Recovers the keyword of a Vigenere ciphertext. The key length
+	    is estimated from a sample at the start of the file, and each
+	    key letter is then the Caesar shift that best fits its column,
+	    counted over the whole file in one pass. The confidence is the
+	    average margin between the best and second best shift of each
+	    column, from 0 to 1.
+
+	    Returns the keyword, its confidence and the key length scores.
+	    Raises a ValueError if the sample has no letters.
+
+	"""
+	sample = file.read(sampleSize).upper()
+	if not any(countLetters(sample)):
+		raise ValueError("There are no letters to analyse")
+	scores = scoreKeyLengths(sample, maxKeyLength)
+	keyLength = chooseKeyLength(scores)
+
+	columns = countColumnLetters(sample, keyLength)
+	position = len(sample)
+	chunk = file.read(chunkSize)
+	while chunk:
+		chunk = chunk.upper()
+		countColumnLetters(chunk, keyLength, columns, position)
+		position += len(chunk)
+		chunk = file.read(chunkSize)
+
+	keyword = ''
+	margins = []
+	for counts in columns:
+		candidates = crackCaesar(counts)
+		keyword += Cipher.letters[candidates[0][1]]
+		if candidates[1][0] > 0:
+			margins.append(1 - candidates[0][0] / candidates[1][0])
+	confidence = sum(margins) / len(margins) if margins else 0.0
+	return keyword, confidence, scores
+
+def ngramIndex(codes):
+	""" Returns the index of an n-gram of letter codes 0-25, read in base 26. """
+	index = 0
+	for code in codes:
+		index = index * 26 + code
+	return index
+
+# The characters skipped when counting n-grams
+NON_LETTERS = re.compile('[^A-Z]+')
+
+class NgramCounts(object):
+	""" 
+	    The counts of the letters, bigrams, trigrams and quadgrams of
+	    a text, each kept in a flat array of 26**n counts indexed by
+	    ngramIndex. The text is added one chunk at a time, and the last
+	    letters of each chunk are kept so that the n-grams across two
+	    chunks are counted too, so a file of any size is counted in
+	    constant memory. Non-letters are skipped, so the n-grams run
+	    across spaces and punctuation.
+
+	"""
+	# Whether the n-grams are counted with NumPy when it is installed
+	useNumpy = True
+
+	def __init__(self, maxN=4):
+		self.maxN = maxN
+		self.counts = [array.array('q', bytes(8 * 26 ** n)) for n in range(1, maxN + 1)]
+		self.characters = 0
+		self.tail = ''
+
+	def add(self, text):
+		""" Counts the n-grams of the next chunk of upper-cased text. """
+		self.characters += len(text)
+		letters = self.tail + NON_LETTERS.sub('', text)
+		numpy = loadNumpy() if self.useNumpy else None
+		if numpy is not None:
+			codes = numpy.frombuffer(letters.encode('ascii'), dtype=numpy.uint8).astype(numpy.intp) - ord('A')
+		for n in range(1, self.maxN + 1):
+			# The n-grams lying in the tail were counted with the last chunk
+			start = max(0, len(self.tail) - n + 1)
+			end = len(letters) - n + 1
+			if end <= start:
+				continue
+			if numpy is not None:
+				indexes = numpy.zeros(end - start, dtype=numpy.intp)
+				for k in range(0, n):
+					indexes = indexes * 26 + codes[start + k:end + k]
+				counts = numpy.frombuffer(self.counts[n - 1], dtype=numpy.int64)
+				counts += numpy.bincount(indexes, minlength=26 ** n)
+			else:
+				ngrams = collections.Counter(letters[i:i + n] for i in range(start, end))
+				for ngram, count in ngrams.items():
+					self.counts[n - 1][ngramIndex([ord(c) - ord('A') for c in ngram])] += count
+		self.tail = letters[-(self.maxN - 1):] if self.maxN > 1 else ''
+
+	def mostCommon(self, n, count):
+		""" Returns the count most common n-grams, as (n-gram, count) pairs. """
+		counts = self.counts[n - 1]
+		indexes = heapq.nlargest(count, range(0, len(counts)), key=counts.__getitem__)
+		mostCommon = []
+		for index in indexes:
+			if counts[index] == 0:
+				break
+			ngram = ''
+			code = index
+			for k in range(0, n):
+				ngram = Cipher.letters[code % 26] + ngram
+				code //= 26
+			mostCommon.append((ngram, counts[index]))
+		return mostCommon
+
+def countFileNgrams(file, chunkSize, maxN=4):
+	""" Counts the n-grams of a text file up to maxN letters, one chunk at a time. """
+	ngrams = NgramCounts(maxN)
+	chunk = file.read(chunkSize)
+	while chunk:
+		ngrams.add(chunk.upper())
+		chunk = file.read(chunkSize)
+	return ngrams
+
+def loadNgrams(path):
+	""" 
+	    Loads a file of n-grams and their counts, one pair per line,
+	    such as the English quadgram counts from practicalcryptography.com.
+	    Returns n and a flat array of the log10 probability of each of
+	    the 26**n n-grams, indexed by ngramIndex. N-grams missing from
+	    the file get a floor probability. Raises a ValueError if the
+	    file has no n-gram counts.
+
+	"""
+	counts = {}
+	with open(path, 'r') as file:
+		for line in file:
+			fields = line.split()
+			if len(fields) == 2 and fields[0].isalpha() and fields[0].isascii():
+				counts[fields[0].upper()] = int(fields[1])
+	total = sum(counts.values())
+	if total <= 0:
+		raise ValueError("The n-gram file %s has no n-gram counts" % path)
+	n = len(next(iter(counts)))
+	logProbabilities = array.array('d', [math.log10(0.01 / total)]) * 26 ** n
+	for ngram, count in counts.items():
+		if len(ngram) == n:
+			logProbabilities[ngramIndex([ord(c) - ord('A') for c in ngram])] = math.log10(count / total)
+	return n, logProbabilities
+
+class SubstitutionScorer(object):
+	""" 
+	    Scores the decryptions of a Simple Substitution ciphertext by
+	    the sum of the log probabilities of their n-grams. The distinct
+	    n-grams of the ciphertext are counted once, with the list of
+	    n-grams each cipher letter appears in. Swapping the plaintext
+	    letters of two cipher letters then only rescores the n-grams
+	    holding either of them, instead of the whole text.
+
+	"""
+
+	def __init__(self, ciphertext, n, logProbabilities):
+		codes = [ord(c) - ord('A') for c in ciphertext if c in Cipher.letters]
+		ngramCounts = collections.Counter(tuple(codes[i:i + n]) for i in range(0, len(codes) - n + 1))
+		self.n = n
+		self.logProbabilities = logProbabilities
+		self.ngrams = list(ngramCounts)
+		self.counts = [ngramCounts[ngram] for ngram in self.ngrams]
+		self.ngramsWith = [[] for letter in Cipher.letters]
+		for i, ngram in enumerate(self.ngrams):
+			for letter in set(ngram):
+				self.ngramsWith[letter].append(i)
+		self.setMapping(list(range(0, 26)))
+
+	def contribution(self, i, mapping):
+		""" Returns the score of the i-th ciphertext n-gram under the mapping. """
+		index = 0
+		for code in self.ngrams[i]:
+			index = index * 26 + mapping[code]
+		return self.counts[i] * self.logProbabilities[index]
+
+	def setMapping(self, mapping):
+		""" 
+		    Scores the whole ciphertext under the mapping, which gives
+		    the plaintext letter of each cipher letter.
+
+		"""
+		self.mapping = list(mapping)
+		self.contributions = [self.contribution(i, self.mapping) for i in range(0, len(self.ngrams))]
+		self.score = sum(self.contributions)
+
+	def swapDelta(self, x, y):
+		""" 
+		    Returns the change in score from swapping the plaintext
+		    letters of cipher letters x and y, and the new scores of
+		    the n-grams that change.
+
+		"""
+		mapping = self.mapping[:]
+		mapping[x], mapping[y] = mapping[y], mapping[x]
+		delta = 0.0
+		changes = []
+		for i in self.ngramsWith[x]:
+			contribution = self.contribution(i, mapping)
+			delta += contribution - self.contributions[i]
+			changes.append((i, contribution))
+		for i in self.ngramsWith[y]:
+			if x not in self.ngrams[i]:
+				contribution = self.contribution(i, mapping)
+				delta += contribution - self.contributions[i]
+				changes.append((i, contribution))
+		return delta, changes
+
+	def swap(self, x, y, delta, changes):
+		""" Applies a swap scored with swapDelta. """
+		self.mapping[x], self.mapping[y] = self.mapping[y], self.mapping[x]
+		for i, contribution in changes:
+			self.contributions[i] = contribution
+		self.score += delta
+
+	def climb(self, rng, anneal=False):
+		""" 
+		    Hill-climbs from a random mapping, trying every swap of two
+		    letters in random order until none improves the score. With
+		    anneal, random swaps are first accepted with a probability
+		    falling with the loss of score and the temperature, which
+		    decreases linearly to zero. Returns the score and mapping.
+
+		"""
+		mapping = list(range(0, 26))
+		rng.shuffle(mapping)
+		self.setMapping(mapping)
+		pairs = [(x, y) for x in range(0, 26) for y in range(x + 1, 26)]
+
+		if anneal:
+			steps = 10 * len(pairs)
+			startTemperature = 0.02 * sum(self.counts)
+			for step in range(0, steps):
+				temperature = startTemperature * (1 - step / steps)
+				x, y = rng.choice(pairs)
+				delta, changes = self.swapDelta(x, y)
+				if delta >= 0 or rng.random() < math.exp(delta / temperature):
+					self.swap(x, y, delta, changes)
+
+		improved = True
+		while improved:
+			improved = False
+			rng.shuffle(pairs)
+			for x, y in pairs:
+				delta, changes = self.swapDelta(x, y)
+				if delta > 0:
+					self.swap(x, y, delta, changes)
+					improved = True
+		return self.score, self.mapping[:]
+
+	def keyOf(self, mapping):
+		""" 
+		    Returns the Simple Substitution key, the cipher alphabet,
+		    of a mapping from cipher letters to plaintext letters.
+
+		"""
+		keyAlpha = [None] * 26
+		for cipherLetter, plainLetter in enumerate(mapping):
+			keyAlpha[plainLetter] = Cipher.letters[cipherLetter]
+		return ''.join(keyAlpha)
+
+# The scorer used by each worker process of a parallel solve
+workerScorer = None
+
+def initClimbWorker(scorer):
+	""" Stores the scorer in a worker process. """
+	global workerScorer
+	workerScorer = scorer
+
+def climbInWorker(seed, anneal):
+	""" Runs one hill-climb from a random start in a worker process. """
+	return workerScorer.climb(random.Random(seed), anneal)
+
+def solveSubstitution(ciphertext, n, logProbabilities, restarts, jobs, anneal=False, seed=None):
+	""" 
+	    Searches for the Simple Substitution key of the ciphertext with
+	    restarts independent hill-climbs spread over jobs processes.
+	    Returns the best key and its score.
+
+	"""
+	scorer = SubstitutionScorer(ciphertext, n, logProbabilities)
+	seeds = [random.Random(seed).getrandbits(64) + restart for restart in range(0, restarts)]
+	with concurrent.futures.ProcessPoolExecutor(jobs,
+			initializer=initClimbWorker, initargs=(scorer,)) as pool:
+		results = list(pool.map(climbInWorker, seeds, [anneal] * restarts))
+	score, mapping = max(results)
+	return scorer.keyOf(mapping), score
+
+# The inverse modulo 26 of each value of 'a'
+AFFINE_INVERSES = {a: next(x for x in AFFINE_A_VALUES if a * x % 26 == 1) for a in AFFINE_A_VALUES}
+
+# The most candidate column orders listed for one width and position
+MAX_COLUMN_ORDERS = 20
+
+# The fewest letter differences a crib must give for each key length
+# tried when it is slid along a Vigenere ciphertext
+MIN_CRIB_DIFFERENCES = 4
+
+def cribMapping(ciphertext, crib, position):
+	""" 
+	    Returns the plaintext to ciphertext letter mapping given by the
+	    crib enciphered at the position with a monoalphabetic cipher,
+	    or None if no such cipher can give the ciphertext there. The
+	    non-letters of the crib must be found unchanged, and no two
+	    letters may share an equivalent.
+
+	"""
+	if position + len(crib) > len(ciphertext):
+		return None
+	letters = Cipher.letters
+	mapping = {}
+	inverse = {}
+	for p, c in zip(crib, ciphertext[position:position + len(crib)]):
+		if p not in letters:
+			if p != c:
+				return None
+		elif c not in letters or mapping.setdefault(p, c) != c or inverse.setdefault(c, p) != p:
+			return None
+	return mapping
+
+def recoverCaesar(mapping):
+	""" Returns the shift of the Caesar cipher giving the mapping, or None if there is none. """
+	letters = Cipher.letters
+	shifts = {(letters.index(c) - letters.index(p)) % 26 for p, c in mapping.items()}
+	return shifts.pop() if len(shifts) == 1 else None
+
+def recoverAffine(mapping):
+	""" 
+	    Returns the (a, b) keys of the Affine cipher giving the mapping.
+	    Two letters p1 and p2 enciphered as c1 and c2 give the linear
+	    congruence a(p1 - p2) = c1 - c2 (mod 26), solved for a when
+	    p1 - p2 is invertible, and then b = c1 - a p1. Otherwise every
+	    value of 'a' is tried, which leaves more than one key.
+
+	"""
+	letters = Cipher.letters
+	pairs = [(letters.index(p), letters.index(c)) for p, c in mapping.items()]
+	if not pairs:
+		return []
+	p1, c1 = pairs[0]
+	candidates = AFFINE_A_VALUES
+	for p2, c2 in pairs[1:]:
+		if (p1 - p2) % 26 in AFFINE_INVERSES:
+			candidates = [(c1 - c2) * AFFINE_INVERSES[(p1 - p2) % 26] % 26]
+			break
+	keys = []
+	for a in candidates:
+		b = (c1 - a * p1) % 26
+		if a in AFFINE_INVERSES and all((a * p + b) % 26 == c for p, c in pairs):
+			keys.append((a, b))
+	return keys
+
+def recoverAtbash(mapping):
+	""" Returns whether the Atbash cipher gives the mapping. """
+	letters = Cipher.letters
+	return all(c == letters[25 - letters.index(p)] for p, c in mapping.items())
+
+def recoverSubstitution(mapping):
+	""" 
+	    Returns the key of the Simple Substitution cipher giving the
+	    mapping, with '?' for the letters the mapping leaves unknown.
+	    A single unknown letter is filled in, as only one remains.
+
+	"""
+	letters = Cipher.letters
+	key = [mapping.get(p, '?') for p in letters]
+	if key.count('?') == 1:
+		key[key.index('?')] = (set(letters) - set(key)).pop()
+	return ''.join(key)
+
+def recoverVigenere(ciphertext, crib, position, keyLengths):
+	""" 
+	    Returns the keywords of the Vigenere cipher of each of the key
+	    lengths that give the ciphertext from the crib at the position,
+	    with '?' for the keyword letters the crib leaves unknown. Each
+	    crib letter gives the key letter at its position in the text,
+	    which is that of the keyword at the position modulo the key
+	    length, so the keyword is found in the phase it was used in.
+
+	"""
+	if position + len(crib) > len(ciphertext):
+		return []
+	letters = Cipher.letters
+	shifts = []
+	for i, (p, c) in enumerate(zip(crib, ciphertext[position:position + len(crib)])):
+		if p not in letters:
+			if p != c:
+				return []
+		elif c not in letters:
+			return []
+		else:
+			shifts.append((position + i, (letters.index(c) - letters.index(p)) % 26))
+
+	keywords = []
+	for keyLength in keyLengths:
+		keyword = ['?'] * keyLength
+		for i, shift in shifts:
+			if keyword[i % keyLength] == '?':
+				keyword[i % keyLength] = letters[shift]
+			elif keyword[i % keyLength] != letters[shift]:
+				break
+		else:
+			keywords.append(''.join(keyword))
+	return keywords
+
+def columnRanks(ciphertext, crib, position, width):
+	""" 
+	    Returns the ranks in the column order of a Columnar
+	    Transposition of the width that each column holding part of
+	    the crib at the plaintext position may have, as a dictionary
+	    of sets, or None if the crib cannot be there. The letters of
+	    the crib in one column are read one after another in the
+	    ciphertext, from the row of the first of them, so each rank is
+	    tried by comparing them at once.
+
+	"""
+	length = len(ciphertext)
+	if length % width or position + len(crib) > length:
+		return None
+	rows = length // width
+	ranks = {}
+	for j in range(0, min(width, len(crib))):
+		row, column = divmod(position + j, width)
+		piece = crib[j::width]
+		candidates = {k for k in range(0, width) if ciphertext.startswith(piece, k * rows + row)}
+		if not candidates:
+			return None
+		ranks[column] = candidates
+	return ranks
+
+def columnOrders(ranks, width, limit=MAX_COLUMN_ORDERS):
+	""" 
+	    Returns up to limit keywords giving the column orders the ranks
+	    allow, each column a different rank, with '?' for the columns
+	    the ranks leave unknown. The columns with fewest ranks are
+	    assigned first so that impossible orders are dropped early.
+
+	"""
+	letters = Cipher.letters
+	columns = sorted(ranks, key=lambda column: len(ranks[column]))
+	orders = []
+	assigned = {}
+
+	def assign(index):
+		if len(orders) >= limit:
+			return
+		if index == len(columns):
+			keyword = [letters[assigned[column]] if column in assigned else '?' for column in range(0, width)]
+			if keyword.count('?') == 1:
+				keyword[keyword.index('?')] = (set(letters[:width]) - set(keyword)).pop()
+			orders.append(''.join(keyword))
+			return
+		column = columns[index]
+		for rank in sorted(ranks[column] - set(assigned.values())):
+			assigned[column] = rank
+			assign(index + 1)
+			del assigned[column]
+
+	assign(0)
+	return orders
+
+def patternSignature(text):
+	""" 
+	    Returns the pattern signature of the text, one byte for each
+	    character: the distance back to the previous occurrence of the
+	    same letter, or 0 for the first occurrence, a distance over 255
+	    or a non-letter. A monoalphabetic cipher keeps the signature of
+	    the text, so it is built once and used as an index of where a
+	    crib may be in the ciphertext.
+
+	"""
+	letters = Cipher.letters
+	last = {}
+	signature = bytearray(len(text))
+	for i, c in enumerate(text):
+		if c in letters:
+			distance = i - last.get(c, i)
+			if distance < 256:
+				signature[i] = distance
+			last[c] = i
+	return bytes(signature)
+
+def findMonoalphabeticCrib(signature, crib):
+	""" 
+	    Returns the positions where the pattern signature of the
+	    ciphertext matches the crib. A repeated crib letter must be
+	    found at the same distance, and any other letter at more than
+	    its offset in the crib, so that it is new to the window. The
+	    signature is searched with a regular expression, which scans
+	    a megabyte ciphertext far faster than trying every position.
+
+	"""
+	letters = Cipher.letters
+	last = {}
+	pattern = []
+	for j, c in enumerate(crib):
+		if c not in letters:
+			pattern.append(b'\\x00')
+			continue
+		distance = j - last.get(c, j)
+		last[c] = j
+		if 0 < distance < 256:
+			pattern.append(re.escape(bytes([distance])))
+		elif distance or j >= 255:
+			pattern.append(b'\\x00')
+		else:
+			pattern.append(b'[\\x00' + re.escape(bytes([j + 1])) + b'-\\xff]')
+	regex = re.compile(b'(?=' + b''.join(pattern) + b')', re.DOTALL)
+	return [match.start() for match in regex.finditer(signature)]
+
+def differenceString(codes, distance):
+	""" 
+	    Returns the differences modulo 26 between the letter codes
+	    distance apart as a byte string, a letter for each, or '.'
+	    where either is not a letter. A Vigenere key of that length
+	    cancels out of the differences.
+
+	"""
+	return bytes([(b - a) % 26 + 65 if a >= 0 and b >= 0 else 46 for a, b in zip(codes, codes[distance:])])
+
+def findVigenereCrib(ciphertext, crib, maxKeyLength):
+	""" 
+	    Returns the (position, key length) pairs where the crib may be
+	    in a Vigenere ciphertext. For each key length, the differences
+	    between the letters a key length apart do not depend on the
+	    key, so those of the crib are searched for in those of the
+	    ciphertext. Key lengths leaving fewer than
+	    MIN_CRIB_DIFFERENCES differences in the crib are not tried.
+
+	"""
+	codes = {letter: i for i, letter in enumerate(Cipher.letters)}
+	textCodes = [codes.get(c, -1) for c in ciphertext]
+	cribCodes = [codes.get(c, -1) for c in crib]
+	found = []
+	for keyLength in range(1, min(maxKeyLength, len(crib) - MIN_CRIB_DIFFERENCES) + 1):
+		differences = differenceString(textCodes, keyLength)
+		cribDifferences = differenceString(cribCodes, keyLength)
+		position = differences.find(cribDifferences)
+		while position != -1:
+			found.append((position, keyLength))
+			position = differences.find(cribDifferences, position + 1)
+	return found
+
+def findColumnarCrib(ciphertext, crib, maxWidth):
+	""" 
+	    Returns the (position, width) pairs where the crib may be in
+	    the plaintext of a Columnar Transposition ciphertext. The crib
+	    letters falling in the column of its first letter are read one
+	    after another in the ciphertext, so each place they are found
+	    gives the row of the crib, and each column it may start in is
+	    then checked with columnRanks. Widths not shorter than the
+	    crib are not tried.
+
+	"""
+	length = len(ciphertext)
+	found = []
+	for width in range(1, min(maxWidth, len(crib) - 1) + 1):
+		if length % width:
+			continue
+		rows = length // width
+		piece = crib[::width]
+		start = ciphertext.find(piece)
+		while start != -1:
+			row = start % rows
+			if row + len(piece) <= rows:
+				for column in range(0, width):
+					position = row * width + column
+					ranks = columnRanks(ciphertext, crib, position, width)
+					if ranks is not None and columnOrders(ranks, width, 1):
+						found.append((position, width))
+			start = ciphertext.find(piece, start + 1)
+	return sorted(set(found))
+
+def recoverKeys(name, ciphertext, crib, position=None, maxKeyLength=20):
+	""" 
+	    Recovers the keys of the named cipher from a crib, a known
+	    plaintext at the position, or searched for in the ciphertext
+	    when position is None. Returns (position, key) pairs, where the
+	    key is a shift for Caesar, an (a, b) pair for Affine, None for
+	    Atbash and a key or keyword for the other ciphers with '?' for
+	    the letters the crib leaves unknown. For the Columnar
+	    Transposition the position is in the plaintext, and for the
+	    other ciphers it is the same in the ciphertext. Vigenere
+	    keywords and transposition widths are tried up to
+	    maxKeyLength letters.
+
+	"""
+	ciphertext = ciphertext.upper()
+	crib = crib.upper()
+	if name == 'vigenere':
+		keyLengths = range(1, maxKeyLength + 1)
+		if position is not None:
+			candidates = [(position, keyLength) for keyLength in keyLengths]
+		else:
+			candidates = findVigenereCrib(ciphertext, crib, maxKeyLength)
+		keys = []
+		found = set()
+		for position, keyLength in candidates:
+			# A multiple of a key length found gives the same keyword repeated
+			if any((position, length) in found for length in range(1, keyLength) if keyLength % length == 0):
+				continue
+			for keyword in recoverVigenere(ciphertext, crib, position, [keyLength]):
+				found.add((position, keyLength))
+				keys.append((position, keyword))
+		return keys
+
+	if name == 'transposition':
+		if position is not None:
+			candidates = [(position, width) for width in range(1, min(maxKeyLength, 26) + 1)]
+		else:
+			candidates = findColumnarCrib(ciphertext, crib, min(maxKeyLength, 26))
+		keys = []
+		for position, width in candidates:
+			ranks = columnRanks(ciphertext, crib, position, width)
+			if ranks is not None:
+				keys.extend((position, keyword) for keyword in columnOrders(ranks, width))
+		return keys
+
+	if position is not None:
+		positions = [position]
+	else:
+		positions = findMonoalphabeticCrib(patternSignature(ciphertext), crib)
+	keys = []
+	for position in positions:
+		mapping = cribMapping(ciphertext, crib, position)
+		if mapping is None:
+			continue
+		if name == 'caesar':
+			shift = recoverCaesar(mapping)
+			if shift is not None:
+				keys.append((position, shift))
+		elif name == 'affine':
+			keys.extend((position, key) for key in recoverAffine(mapping))
+		elif name == 'atbash':
+			if recoverAtbash(mapping):
+				keys.append((position, None))
+		elif name == 'substitution':
+			keys.append((position, recoverSubstitution(mapping)))
+		else:
+			raise ValueError("Unknown cipher: %s" % name)
+	return keys
+
+def keywordShifts(keyword):
+	""" 
+	    Returns the shortest Vigenere keyword giving the same shifts as
+	    the keyword, which repeats it if it is made of one part repeated.
+
+	"""
+	keyword = keyword.upper()
+	for length in range(1, len(keyword)):
+		if len(keyword) % length == 0 and keyword == keyword[:length] * (len(keyword) // length):
+			return keyword[:length]
+	return keyword
+
+def keywordColumnOrder(keyword):
+	""" 
+	    Returns the keyword of distinct letters giving the same column
+	    order as the keyword in a Columnar Transposition: the letter of
+	    the rank of each column.
+
+	"""
+	cipher = ColumnarTranspositionCipher(keyword)
+	cipher.getKey()
+	order = [None] * len(keyword)
+	for rank, column in enumerate(cipher.columnOrder):
+		order[column] = Cipher.letters[rank]
+	return ''.join(order)
+
+class KeywordScorer(object):
+	""" 
+	    Scores the decryptions of a ciphertext under candidate keywords
+	    by the sum of the log probabilities of their n-grams, the
+	    decryption of the first characters only so that most keywords
+	    can be dropped without decrypting the whole sample. Batches of
+	    keywords are scored at once as NumPy arrays when NumPy is
+	    installed, unless useNumpy is turned off.
+
+	"""
+	useNumpy = True
+
+	def __init__(self, n, logProbabilities):
+		self.n = n
+		self.logProbabilities = logProbabilities
+
+	def decrypt(self, keyword, length):
+		""" Returns the letter codes of the first length characters decrypted with the keyword. """
+		raise NotImplementedError
+
+	def score(self, keyword, length):
+		""" 
+		    Returns the n-gram score of the first length characters
+		    decrypted with the keyword, per n-gram so that the scores
+		    of decryptions of different lengths can be compared.
+
+		"""
+		logProbabilities = self.logProbabilities
+		size = 26 ** self.n
+		codes = self.decrypt(keyword, length)
+		index = 0
+		for code in codes[:self.n - 1]:
+			index = index * 26 + code
+		score = 0.0
+		for code in codes[self.n - 1:]:
+			index = (index * 26 + code) % size
+			score += logProbabilities[index]
+		return score / max(1, len(codes) - self.n + 1)
+
+	def scoreMany(self, keywords, length):
+		""" Returns the scores of score for each keyword. """
+		numpy = loadNumpy() if self.useNumpy else None
+		if numpy is None:
+			return [self.score(keyword, length) for keyword in keywords]
+		scores = [None] * len(keywords)
+		groups = collections.defaultdict(list)
+		for i, keyword in enumerate(keywords):
+			groups[len(keyword)].append(i)
+		for indexes in groups.values():
+			group = ''.join([keywords[i] for i in indexes])
+			keys = numpy.frombuffer(group.encode('ascii'), dtype=numpy.uint8).reshape(len(indexes), -1)
+			codes, counts = self.decryptArrays(numpy, keys.astype(numpy.int64) - ord('A'), length)
+			for i, score in zip(indexes, self.scoreArrays(numpy, codes, counts)):
+				scores[i] = float(score)
+		return scores
+
+	def decryptArrays(self, numpy, keys, length):
+		""" 
+		    Returns the letter codes of the first length characters
+		    decrypted with each row of keys, the key letter codes of
+		    keywords of one length, as an array with a row for each, and
+		    the number of letters in each row, which are at its start.
+
+		"""
+		raise NotImplementedError
+
+	def scoreArrays(self, numpy, codes, counts):
+		""" Returns the n-gram scores of the rows of letter codes, as score does. """
+		n = self.n
+		width = codes.shape[1] - n + 1
+		if width <= 0:
+			return numpy.zeros(len(codes))
+		indexes = numpy.zeros((len(codes), width), dtype=numpy.int64)
+		for k in range(0, n):
+			indexes = indexes * 26 + codes[:, k:k + width]
+		logProbabilities = numpy.frombuffer(self.logProbabilities, dtype=numpy.float64)
+		ngramCounts = counts - n + 1
+		valid = numpy.arange(width) < ngramCounts[:, None]
+		scores = numpy.where(valid, logProbabilities[indexes], 0.0).sum(axis=1)
+		return scores / numpy.maximum(1, ngramCounts)
+
+class VigenereKeywordScorer(KeywordScorer):
+	""" Scores Vigenere keywords on a sample from the start of the ciphertext. """
+
+	def __init__(self, sample, n, logProbabilities):
+		KeywordScorer.__init__(self, n, logProbabilities)
+		sample = sample.upper()
+		self.positions = [i for i, c in enumerate(sample) if c in Cipher.letters]
+		self.codes = [ord(sample[i]) - ord('A') for i in self.positions]
+
+	def decrypt(self, keyword, length):
+		shifts = [ord(c) - ord('A') for c in keyword]
+		keyLength = len(shifts)
+		count = bisect.bisect_left(self.positions, length)
+		return [(code - shifts[i % keyLength]) % 26 for i, code in zip(self.positions[:count], self.codes)]
+
+	def decryptArrays(self, numpy, keys, length):
+		count = bisect.bisect_left(self.positions, length)
+		positions = numpy.array(self.positions[:count], dtype=numpy.int64)
+		codes = numpy.array(self.codes[:count], dtype=numpy.int64)
+		plain = (codes - keys[:, positions % keys.shape[1]]) % 26
+		return plain, numpy.full(len(keys), count)
+
+class ColumnarKeywordScorer(KeywordScorer):
+	""" 
+	    Scores Columnar Transposition keywords. Only the first rows of
+	    the plaintext are decrypted, which come from the start of each
+	    column, so the start of the columns of each possible width is
+	    kept instead of the whole ciphertext.
+
+	"""
+
+	def __init__(self, ciphertext, sampleSize, maxWidth, n, logProbabilities):
+		KeywordScorer.__init__(self, n, logProbabilities)
+		ciphertext = ciphertext.upper()
+		self.columns = {}
+		for width in range(2, maxWidth + 1):
+			if len(ciphertext) % width == 0:
+				rows = len(ciphertext) // width
+				sampleRows = min(rows, math.ceil(sampleSize / width))
+				self.columns[width] = [ciphertext[k * rows:k * rows + sampleRows] for k in range(0, width)]
+
+	def decrypt(self, keyword, length):
+		width = len(keyword)
+		columns = [self.columns[width][ord(c) - ord('A')] for c in keyword]
+		rows = min(len(columns[0]), math.ceil(length / width))
+		text = ''.join([column[row] for row in range(0, rows) for column in columns])
+		return [ord(c) - ord('A') for c in text if c in Cipher.letters]
+
+	def decryptArrays(self, numpy, keys, length):
+		width = keys.shape[1]
+		rows = min(len(self.columns[width][0]), math.ceil(length / width))
+		columns = numpy.array([[ord(c) for c in column[:rows]] for column in self.columns[width]],
+			dtype=numpy.int64)
+		text = columns[keys].transpose(0, 2, 1).reshape(len(keys), rows * width)
+		isLetter = (text >= ord('A')) & (text <= ord('Z'))
+		# Moves the letters of each row to its start, in order
+		order = numpy.argsort(~isLetter, axis=1, kind='stable')
+		codes = numpy.take_along_axis(text, order, axis=1) - ord('A')
+		codes[~numpy.take_along_axis(isLetter, order, axis=1)] = 0
+		return codes, isLetter.sum(axis=1)
+
+# The scorer used by each worker process of a dictionary attack
+workerKeywordScorer = None
+
+def initKeywordWorker(scorer):
+	""" Stores the keyword scorer in a worker process. """
+	global workerKeywordScorer
+	workerKeywordScorer = scorer
+
+def scoreKeywordsInWorker(keywords, length, shortlist):
+	""" 
+	    Scores a batch of keywords on the first length characters in a
+	    worker process. Returns the best shortlist (score, keyword)
+	    pairs, so that the rest are pruned before reaching the parent.
+
+	"""
+	return heapq.nlargest(shortlist, zip(workerKeywordScorer.scoreMany(keywords, length), keywords))
+
+def dictionaryAttack(name, ciphertext, words, n, logProbabilities, jobs, sampleSize=10000,
+		prefixSize=200, shortlist=1000, maxKeyLength=40, batchSize=10000, progress=None):
+	""" 
+	    Tries every word of a wordlist as the keyword of a Vigenere or
+	    Columnar Transposition ciphertext. Words giving the same shifts
+	    or the same column order as an earlier word are tried once, and
+	    so are transposition keywords of a width the ciphertext length
+	    is not a multiple of. Every keyword is scored on the first
+	    prefixSize characters over jobs processes, and the best
+	    shortlist are scored again on sampleSize characters. progress
+	    is called with the number of keywords scored and the total
+	    after each batch. Returns (score, keyword, word) triples, best
+	    first, where keyword is the first word tried of its kind.
+
+	"""
+	if name == 'vigenere':
+		scorer = VigenereKeywordScorer(ciphertext[:sampleSize], n, logProbabilities)
+		normalize = keywordShifts
+	elif name == 'transposition':
+		# The keywords are compared as the letters of the rank of each column
+		maxKeyLength = min(maxKeyLength, 26)
+		scorer = ColumnarKeywordScorer(ciphertext, sampleSize, maxKeyLength, n, logProbabilities)
+		normalize = keywordColumnOrder
+	else:
+		raise ValueError("No dictionary attack on the %s cipher" % name)
+
+	distinct = {}
+	for word in words:
+		word = word.strip()
+		if not word.isalpha() or not word.isascii() or len(word) > maxKeyLength:
+			continue
+		if name == 'transposition' and len(word) not in scorer.columns:
+			continue
+		distinct.setdefault(normalize(word), word)
+	keywords = list(distinct)
+
+	candidates = []
+	scored = 0
+	with concurrent.futures.ProcessPoolExecutor(jobs,
+			initializer=initKeywordWorker, initargs=(scorer,)) as pool:
+		futures = {}
+		for i in range(0, len(keywords), batchSize):
+			batch = keywords[i:i + batchSize]
+			futures[pool.submit(scoreKeywordsInWorker, batch, prefixSize, shortlist)] = len(batch)
+		for future in concurrent.futures.as_completed(futures):
+			candidates = heapq.nlargest(shortlist, candidates + future.result())
+			scored += futures[future]
+			if progress is not None:
+				progress(scored, len(keywords))
+
+	keywords = [keyword for score, keyword in candidates]
+	results = [(score, keyword, distinct[keyword])
+		for score, keyword in zip(scorer.scoreMany(keywords, sampleSize), keywords)]
+	results.sort(reverse=True)
+	return results
@@ -0,0 +1,178 @@
+""" test_cipherContainer.py
+
+    Tests of the container format of cipherContainer.py, run with
+    python -m pytest. A container must decrypt, in full or a range at
+    a time, into the bytes that were encrypted, and a damaged one must
+    raise a ValueError.
+
+"""
+
+import random
+
+import pytest
+from click.testing import CliRunner
+
+import cipherCommands
+import cipherContainer
+import classicCiphers
+
+CHUNK_SIZE = 64
+
+# The ciphers of the containers, with their keys
+CONTAINER_CIPHERS = [
+	('caesar', 7),
+	('vigenere', 'LEMON'),
+	('affine', (5, 8)),
+	('atbash', None),
+	('transposition', 'ZEBRAS'),
+]
+
+def newCipher(name, key, alphabet, skipNonLetters=False):
+	""" Returns a new cipher, not the one cached by getCipher, as packing and unpacking set its alphabet. """
+	if name == 'affine':
+		cipher = classicCiphers.AffineCipher(*key)
+	elif name == 'atbash':
+		cipher = classicCiphers.AtbashCipher()
+	elif name == 'vigenere':
+		cipher = classicCiphers.VigenereCipher(key, skipNonLetters)
+	else:
+		cipher = classicCiphers.CIPHERS[name](key)
+	cipher.interactive = False
+	cipher.alphabet = alphabet
+	return cipher
+
+def randomBytes(generator, length):
+	""" Returns random bytes of the length, mostly letters in both cases. """
+	characters = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz' * 4 + b' .,\n\x00\xc8\xff'
+	return bytes(generator.choice(characters) for i in range(0, length))
+
+def packAndUnpack(tmp_path, name, key, data, alphabet, compression, jobs=1, offset=0, length=None):
+	""" Packs the data into a container and returns the bytes unpacked from it. """
+	inputPath = tmp_path / 'input'
+	inputPath.write_bytes(data)
+	containerPath = tmp_path / 'container'
+	outputPath = tmp_path / 'output'
+	cipherContainer.packFile(newCipher(name, key, alphabet), str(inputPath), str(containerPath), CHUNK_SIZE,
+		compression, jobs)
+	cipherContainer.unpackFile(newCipher(name, key, 'upper'), str(containerPath), str(outputPath), jobs, offset,
+		length)
+	return outputPath.read_bytes()
+
+@pytest.mark.parametrize('name, key', CONTAINER_CIPHERS)
+@pytest.mark.parametrize('compression', ['none', 'zlib', 'lzma'])
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_containerRoundTrips(tmp_path, name, key, compression, jobs):
+	generator = random.Random(24)
+	for length in (0, 1, CHUNK_SIZE, 10 * CHUNK_SIZE + 5):
+		data = randomBytes(generator, length)
+		assert packAndUnpack(tmp_path, name, key, data, 'bytes', compression, jobs) == data
+		if compression == 'none':
+			# The letters keep their case, and the other bytes are left as they are
+			assert packAndUnpack(tmp_path, name, key, data, 'letters', compression, jobs) == data
+
+@pytest.mark.parametrize('name, key', CONTAINER_CIPHERS)
+@pytest.mark.parametrize('compression', ['none', 'zlib'])
+def test_containerRanges(tmp_path, name, key, compression):
+	generator = random.Random(25)
+	data = randomBytes(generator, 10 * CHUNK_SIZE + 5)
+	for offset, length in [(0, 1), (3, 11), (CHUNK_SIZE - 1, 2), (CHUNK_SIZE, CHUNK_SIZE), (100, 300),
+			(10 * CHUNK_SIZE, 20), (len(data), 5), (len(data) + 10, 5), (50, 0), (200, None)]:
+		expected = data[offset:] if length is None else data[offset:offset + length]
+		assert packAndUnpack(tmp_path, name, key, data, 'bytes', compression, 1, offset, length) == expected
+
+def test_containerSkippingNonLetters(tmp_path):
+	generator = random.Random(26)
+	data = randomBytes(generator, 5 * CHUNK_SIZE)
+	inputPath = tmp_path / 'input'
+	inputPath.write_bytes(data)
+	containerPath = tmp_path / 'container'
+	outputPath = tmp_path / 'output'
+	cipherContainer.packFile(newCipher('vigenere', 'LEMON', 'letters', True), str(inputPath), str(containerPath),
+		CHUNK_SIZE)
+	with open(str(containerPath), 'rb') as file:
+		assert cipherContainer.readHeader(file).skipNonLetters
+	# The key convention is taken from the header
+	cipherContainer.unpackFile(newCipher('vigenere', 'LEMON', 'upper'), str(containerPath), str(outputPath))
+	assert outputPath.read_bytes() == data
+
+def writeContainer(tmp_path, data, compression='none'):
+	""" Packs the data into a container with the Vigenere cipher and returns its path. """
+	inputPath = tmp_path / 'input'
+	inputPath.write_bytes(data)
+	containerPath = tmp_path / 'container'
+	cipherContainer.packFile(newCipher('vigenere', 'LEMON', 'bytes'), str(inputPath), str(containerPath),
+		CHUNK_SIZE, compression)
+	return containerPath
+
+def unpack(containerPath, offset=0, length=None):
+	""" Returns the bytes unpacked from the container with the Vigenere cipher. """
+	outputPath = containerPath.parent / 'output'
+	cipherContainer.unpackFile(newCipher('vigenere', 'LEMON', 'upper'), str(containerPath), str(outputPath), 1,
+		offset, length)
+	return outputPath.read_bytes()
+
+@pytest.mark.parametrize('compression', ['none', 'zlib', 'lzma'])
+def test_corruptChunkIsDetected(tmp_path, compression):
+	generator = random.Random(27)
+	data = randomBytes(generator, 10 * CHUNK_SIZE)
+	containerPath = writeContainer(tmp_path, data, compression)
+	with open(str(containerPath), 'rb') as file:
+		header = cipherContainer.readHeader(file)
+		index = cipherContainer.readIndex(file, header)
+	container = bytearray(containerPath.read_bytes())
+	container[index[3].offset + 1] ^= 0x20
+	containerPath.write_bytes(bytes(container))
+	with pytest.raises(ValueError, match='corrupt'):
+		unpack(containerPath)
+	with pytest.raises(ValueError, match='corrupt'):
+		unpack(containerPath, 3 * CHUNK_SIZE + 10, 5)
+	# The other chunks are still read
+	assert unpack(containerPath, 0, 3 * CHUNK_SIZE) == data[:3 * CHUNK_SIZE]
+	assert unpack(containerPath, 4 * CHUNK_SIZE) == data[4 * CHUNK_SIZE:]
+
+def rewriteHeader(containerPath, **fields):
+	""" Replaces fields of the header of the container, as named in HEADER. """
+	container = containerPath.read_bytes()
+	names = ['magic', 'version', 'cipherId', 'compressionId', 'alphabetId', 'flags', 'originalLength', 'chunkSize',
+		'chunkCount', 'indexOffset']
+	values = dict(zip(names, cipherContainer.HEADER.unpack_from(container)))
+	values.update(fields)
+	header = cipherContainer.HEADER.pack(*[values[name] for name in names])
+	containerPath.write_bytes(header + container[cipherContainer.HEADER_SIZE:])
+
+@pytest.mark.parametrize('fields, message', [
+	(dict(cipherId=len(cipherContainer.CIPHER_IDS)), 'Unknown cipher id'),
+	(dict(compressionId=200), 'Unknown compression id'),
+	(dict(alphabetId=3), 'Unknown alphabet id'),
+	(dict(chunkCount=0), 'do not cover'),
+	(dict(chunkCount=11), 'do not cover'),
+	(dict(originalLength=20 * CHUNK_SIZE), 'do not cover'),
+	(dict(chunkSize=0), 'do not cover'),
+	(dict(chunkSize=CHUNK_SIZE * 2, originalLength=10 * CHUNK_SIZE * 2), 'does not match'),
+	(dict(version=2), 'Unsupported container version'),
+	(dict(magic=b'XXXX'), 'Not a container'),
+])
+def test_inconsistentHeaderIsRejected(tmp_path, fields, message):
+	containerPath = writeContainer(tmp_path, randomBytes(random.Random(28), 10 * CHUNK_SIZE))
+	rewriteHeader(containerPath, **fields)
+	with pytest.raises(ValueError, match=message):
+		unpack(containerPath)
+
+def test_compressionNeedsTheBytesAlphabet(tmp_path):
+	inputPath = tmp_path / 'input'
+	inputPath.write_text('ATTACK AT DAWN\n')
+	containerPath = tmp_path / 'container'
+	with pytest.raises(ValueError, match='bytes alphabet'):
+		cipherContainer.packFile(newCipher('caesar', 3, 'letters'), str(inputPath), str(containerPath), CHUNK_SIZE,
+			'zlib')
+	containerPath.write_bytes(b'')
+	runner = CliRunner()
+	result = runner.invoke(cipherCommands.classicCiphers, ['encrypt', '-c', '-k', '3', '--container', '--compress',
+		'zlib', '--alphabet', 'letters', str(inputPath), str(containerPath)])
+	assert result.output.startswith('ERROR')
+	# Without --alphabet, --compress uses the bytes alphabet
+	result = runner.invoke(cipherCommands.classicCiphers, ['encrypt', '-c', '-k', '3', '--container', '--compress',
+		'zlib', str(inputPath), str(containerPath)])
+	assert result.exit_code == 0 and 'ERROR' not in result.output, result.output
+	with open(str(containerPath), 'rb') as file:
+		assert cipherContainer.readHeader(file).alphabet == 'bytes'
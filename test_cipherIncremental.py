@@ -0,0 +1,110 @@
+""" test_cipherIncremental.py
+
+    Tests of the incremental encryption of cipherIncremental.py, run
+    with python -m pytest. Every incremental run must write the same
+    output as a full run on the same input.
+
+"""
+
+import random
+import string
+
+import pytest
+from click.testing import CliRunner
+
+import cipherCommands
+import cipherIncremental
+import classicCiphers
+
+CHUNK_SIZE = 64
+
+def runEncrypt(tmp_path, options, text, outputName):
+	""" Writes the input text and encrypts it with the command-line tool, returning the output. """
+	inputPath = tmp_path / 'input.txt'
+	inputPath.write_text(text)
+	outputPath = tmp_path / outputName
+	if not outputPath.exists():
+		outputPath.write_bytes(b'')
+	arguments = ['encrypt', '--chunk-size', str(CHUNK_SIZE)] + options + [str(inputPath), str(outputPath)]
+	result = CliRunner().invoke(cipherCommands.classicCiphers, arguments)
+	assert result.exit_code == 0, result.output
+	assert 'ERROR' not in result.output, result.output
+	return outputPath.read_bytes()
+
+def assertIncrementalMatchesFull(tmp_path, options, text):
+	""" Encrypts the text incrementally into the same output as before, and in full, and compares them. """
+	incremental = runEncrypt(tmp_path, options + ['--incremental'], text, 'incremental.txt')
+	(tmp_path / 'full.txt').write_bytes(b'')
+	assert incremental == runEncrypt(tmp_path, options, text, 'full.txt')
+
+def randomText(generator, length):
+	""" Returns a random log-like text of the length. """
+	return ''.join(generator.choice(string.ascii_letters + '   .,:\n') for i in range(0, length))
+
+@pytest.mark.parametrize('options', [
+	['-c', '-k', '7'],
+	['-v', '-k', 'lemon'],
+	['-v', '-k', 'lemon', '--skip-non-letters'],
+	['-v', '-k', 'lemon', '--binary', '--alphabet', 'letters'],
+	['-s', '-k', 'QWERTYUIOPASDFGHJKLZXCVBNM', '--binary'],
+	['-p', 'caesar:3', '-p', 'vigenere:key'],
+	['-t', '-k', 'zebra'],
+])
+def test_incrementalRunsMatchFullRuns(tmp_path, options):
+	generator = random.Random(25)
+	text = randomText(generator, 1000)
+	assertIncrementalMatchesFull(tmp_path, options, text)
+	text += randomText(generator, 300)
+	assertIncrementalMatchesFull(tmp_path, options, text)
+	assertIncrementalMatchesFull(tmp_path, options, text)
+	text = text[:500] + 'EDITED' + text[506:]
+	assertIncrementalMatchesFull(tmp_path, options, text)
+	text = text[:700] + 'inserted' + text[700:]
+	assertIncrementalMatchesFull(tmp_path, options, text)
+	text = text[:900]
+	assertIncrementalMatchesFull(tmp_path, options, text)
+
+def test_keyChangedWithTheFirstChunkEdited(tmp_path):
+	generator = random.Random(26)
+	text = randomText(generator, 1000)
+	assertIncrementalMatchesFull(tmp_path, ['-v', '-k', 'lemon'], text)
+	text = 'X' + text[1:]
+	assertIncrementalMatchesFull(tmp_path, ['-v', '-k', 'lemom'], text)
+
+def test_keyFingerprintCoversLongKeys():
+	keys = ['A' * 300 + 'B', 'A' * 300 + 'C']
+	fingerprints = set()
+	for key in keys:
+		cipher = classicCiphers.VigenereCipher(key, skipNonLetters=True)
+		cipher.prepare()
+		fingerprints.add(cipherIncremental.keyFingerprint(cipher, False))
+	assert len(fingerprints) == 2
+
+def test_appendOnlyEncryptsTheTail(tmp_path):
+	generator = random.Random(27)
+	inputPath = tmp_path / 'input.txt'
+	outputPath = tmp_path / 'output.txt'
+	inputPath.write_text(randomText(generator, 10 * CHUNK_SIZE + 10))
+	cipher = classicCiphers.VigenereCipher('lemon')
+	state = cipherIncremental.encryptFile(cipher, str(inputPath), str(outputPath), CHUNK_SIZE)
+	assert state['length'] == 10 * CHUNK_SIZE + 10
+	assert state['position'] == 10 * CHUNK_SIZE + 10
+
+	with open(str(inputPath), 'a') as file:
+		file.write(randomText(generator, 100))
+	positions = []
+	encipherText = cipher.encipherText
+	def recordingEncipherText(text, position=0):
+		if not text.startswith(cipherIncremental.PROBE):
+			positions.append(position)
+		return encipherText(text, position)
+	cipher.encipherText = recordingEncipherText
+	state = cipherIncremental.encryptFile(cipher, str(inputPath), str(outputPath), CHUNK_SIZE, state=state)
+	assert positions == [10 * CHUNK_SIZE, 11 * CHUNK_SIZE]
+	assert state['length'] == 10 * CHUNK_SIZE + 110
+
+def test_columnarTranspositionHasNoState(tmp_path):
+	runEncrypt(tmp_path, ['-t', '-k', 'zebra', '--incremental'], 'ATTACK AT DAWN\n', 'output.txt')
+	assert not (tmp_path / 'output.txt.state').exists()
+	runEncrypt(tmp_path, ['-v', '-k', 'lemon', '--incremental'], 'ATTACK AT DAWN\n', 'other.txt')
+	assert (tmp_path / 'other.txt.state').exists()
@@ -0,0 +1,340 @@
+""" test_classicCiphers.py
+
+    Tests of the ciphers of classicCiphers.py, run with python -m pytest.
+
+"""
+
+import random
+import string
+
+import pytest
+from click.testing import CliRunner
+
+import cipherCommands
+import classicCiphers
+
+def randomText(generator, length, characters=string.ascii_uppercase + ' .,\nÉß'):
+	""" Returns a random text of the length, mostly letters. """
+	return ''.join(generator.choice(characters) for i in range(0, length))
+
+def randomBytes(generator, length):
+	""" Returns random bytes of the length, mostly letters in both cases. """
+	characters = (string.ascii_letters * 4 + ' .,\n').encode('ascii') + bytes([0, 200, 255])
+	return bytes(generator.choice(characters) for i in range(0, length))
+
+def runCommand(tmp_path, arguments, inputPath):
+	""" Runs a command of the command-line tool on the input file and returns the bytes it writes. """
+	outputPath = tmp_path / 'output'
+	outputPath.write_bytes(b'')
+	result = CliRunner().invoke(cipherCommands.classicCiphers, arguments + [str(inputPath), str(outputPath)])
+	assert result.exit_code == 0, result.output
+	assert 'ERROR' not in result.output, result.output
+	return outputPath.read_bytes()
+
+def randomKey(generator, length):
+	""" Returns a random keyword of the length. """
+	return ''.join(generator.choice(string.ascii_uppercase) for i in range(0, length))
+
+def test_vigenereNumpyMatchesTableau():
+	pytest.importorskip('numpy')
+	generator = random.Random(3)
+	for trial in range(0, 50):
+		cipher = classicCiphers.VigenereCipher(randomKey(generator, generator.randint(1, 40)))
+		cipher.prepare()
+		text = randomText(generator, generator.randint(0, 5000))
+		if trial % 2:
+			text = text.encode('ascii', 'ignore').decode('ascii')
+		position = generator.randint(0, 1000)
+		for direction in (1, -1):
+			assert cipher.shiftTextNumpy(text, position, direction) == cipher.shiftSlices(text, position, direction)
+
+def test_vigenereChoosesNumpyOnceEnoughTextIsShifted(monkeypatch):
+	pytest.importorskip('numpy')
+	cipher = classicCiphers.VigenereCipher('lemon')
+	cipher.prepare()
+	monkeypatch.setattr(classicCiphers.VigenereCipher, 'shiftedLength', 0)
+	monkeypatch.setattr(classicCiphers.VigenereCipher, 'numpyMinLength', 3 * cipher.numpyMinTextLength)
+	monkeypatch.delitem(classicCiphers.sys.modules, 'numpy')
+	text = 'A' * cipher.numpyMinTextLength
+	assert not cipher.chooseNumpy(len(text))
+	# The text shifted is counted for every cipher, as NumPy is imported once
+	other = classicCiphers.VigenereCipher('point')
+	other.prepare()
+	assert not other.chooseNumpy(len(text))
+	assert cipher.chooseNumpy(len(text))
+	assert not cipher.chooseNumpy(cipher.numpyMinTextLength - 1)
+	cipher.useNumpy = False
+	assert not cipher.chooseNumpy(len(text))
+
+@pytest.mark.parametrize('name, key', [
+	('affine', None),
+	('affine', '5,8'),
+	('affine', (5,)),
+	('caesar', None),
+	('caesar', 2.5),
+	('vigenere', 7),
+	('substitution', None),
+	('transposition', 12345),
+])
+def test_keysOfTheWrongShape(name, key):
+	with pytest.raises(ValueError, match='Invalid key'):
+		classicCiphers.encrypt(name, 'HELLO', key)
+	with pytest.raises(ValueError, match='Invalid key'):
+		classicCiphers.decrypt(name, b'HELLO', key)
+
+@pytest.mark.parametrize('arguments', [
+	['-t', '-k', 'zebra', '--mmap'],
+	['-t', '-k', 'zebra', '--offset', '2'],
+	['-c', '-k', '3', '--mmap', '--binary'],
+	['-c', '-k', '3', '--container', '--spill'],
+])
+def test_statsOnlyAfterASuccessfulRun(tmp_path, arguments):
+	inputPath = tmp_path / 'input'
+	inputPath.write_text('ATTACK AT DAWN\n')
+	outputPath = tmp_path / 'output'
+	outputPath.write_bytes(b'')
+	result = CliRunner().invoke(cipherCommands.classicCiphers, ['decrypt', '--stats'] + arguments
+		+ [str(inputPath), str(outputPath)])
+	assert result.output.startswith('ERROR')
+	assert 'Processed' not in result.output
+	result = CliRunner().invoke(cipherCommands.classicCiphers, ['decrypt', '--stats', '-c', '-k', '3',
+		str(inputPath), str(outputPath)])
+	assert 'Processed' in result.output
+
+def test_skipNonLettersWithTheBytesAlphabet(tmp_path):
+	with pytest.raises(ValueError, match='skip non-letters'):
+		classicCiphers.encrypt('vigenere', b'ATTACK AT DAWN', 'lemon', alphabet='bytes', skipNonLetters=True)
+	inputPath = tmp_path / 'input'
+	inputPath.write_text('ATTACK AT DAWN\n')
+	outputPath = tmp_path / 'output'
+	outputPath.write_bytes(b'')
+	for mode in (['--binary'], ['--mmap'], ['--spill'], ['--container'], ['--container', '--compress', 'zlib'],
+			['--binary', '--incremental']):
+		if '--compress' not in mode:
+			mode = mode + ['--alphabet', 'bytes']
+		result = CliRunner().invoke(cipherCommands.classicCiphers, ['encrypt', '-v', '-k', 'lemon',
+			'--skip-non-letters'] + mode + [str(inputPath), str(outputPath)])
+		assert result.output.startswith('ERROR'), mode
+
+# The ciphers whose ranges are decrypted on their own: name, key, skipNonLetters and options
+RANGE_CIPHERS = [
+	('caesar', 7, False, ['-c', '-k', '7']),
+	('vigenere', 'LEMON', False, ['-v', '-k', 'lemon']),
+	('vigenere', 'LEMON', True, ['-v', '-k', 'lemon', '--skip-non-letters']),
+	('affine', (5, 8), False, ['-af', '-a', '5', '-b', '8']),
+	('atbash', None, False, ['-at']),
+	('substitution', 'QWERTYUIOPASDFGHJKLZXCVBNM', False, ['-s', '-k', 'QWERTYUIOPASDFGHJKLZXCVBNM']),
+]
+
+# Ranges as (offset, length) around a ciphertext of 500 bytes read in chunks of 7 bytes
+RANGES = [(0, 500), (0, 1), (3, 11), (10, 60), (250, 249), (495, 20), (500, 5), (600, 10), (123, 0)]
+
+@pytest.mark.parametrize('name, key, skipNonLetters, options', RANGE_CIPHERS)
+def test_decryptRangeMatchesFullDecryption(tmp_path, name, key, skipNonLetters, options):
+	generator = random.Random(17)
+	ciphertext = classicCiphers.encrypt(name, randomBytes(generator, 500), key, skipNonLetters=skipNonLetters)
+	plaintext = classicCiphers.decrypt(name, ciphertext, key, skipNonLetters=skipNonLetters)
+	path = tmp_path / 'ciphertext'
+	path.write_bytes(ciphertext)
+	for offset, length in RANGES:
+		expected = plaintext[offset:offset + length]
+		assert classicCiphers.decryptRange(name, str(path), offset, length, key,
+			skipNonLetters=skipNonLetters) == expected
+		arguments = ['decrypt'] + options + ['--chunk-size', '7', '--offset', str(offset), '--length', str(length)]
+		assert runCommand(tmp_path, arguments, path) == expected
+	arguments = ['decrypt'] + options + ['--chunk-size', '7', '--offset', '480']
+	assert runCommand(tmp_path, arguments, path) == plaintext[480:]
+
+def test_decryptRangeOfTheColumnarTransposition(tmp_path):
+	path = tmp_path / 'ciphertext'
+	path.write_bytes(b'ATTACKATDAWN')
+	with pytest.raises(ValueError):
+		classicCiphers.decryptRange('transposition', str(path), 0, 4, 'ZEBRA')
+
+def referenceVigenere(data, keyword, decrypt, skipNonLetters, keepCase=False):
+	""" 
+	    Transforms the bytes one at a time with the Vigenere keyword,
+	    the key moving on every byte, or on letters only when skipping
+	    the non-letters.
+
+	"""
+	shifts = [ord(c) - ord('A') for c in keyword]
+	output = bytearray()
+	position = 0
+	for byte in data:
+		letter = chr(byte)
+		if letter.isascii() and letter.isalpha():
+			shift = shifts[position % len(shifts)] * (-1 if decrypt else 1)
+			newLetter = chr((ord(letter.upper()) - ord('A') + shift) % 26 + ord('A'))
+			output.append(ord(newLetter.lower() if keepCase and letter.islower() else newLetter))
+			position += 1
+		else:
+			output.append(byte)
+			position += 0 if skipNonLetters else 1
+	return bytes(output)
+
+# The ways a file is run through the command-line tool, with whether they keep the case
+VIGENERE_MODES = [
+	([], False),
+	(['-j', '2'], False),
+	(['--binary'], False),
+	(['--binary', '--alphabet', 'letters'], True),
+	(['--mmap'], False),
+	(['--spill'], False),
+]
+
+@pytest.mark.parametrize('skipNonLetters', [False, True])
+@pytest.mark.parametrize('mode, keepCase', VIGENERE_MODES)
+@pytest.mark.parametrize('chunkSize', [1, 7, 4096])
+def test_vigenereKeystreamsMatchReference(tmp_path, skipNonLetters, mode, keepCase, chunkSize):
+	generator = random.Random(23)
+	# Text mode decodes the file, so the bytes that are not ASCII are left out
+	plaintext = randomBytes(generator, 3000).translate(None, bytes([200, 255]))
+	ciphertext = referenceVigenere(plaintext, 'LEMON', False, skipNonLetters, keepCase)
+	plainPath = tmp_path / 'plain'
+	plainPath.write_bytes(plaintext)
+	cipherPath = tmp_path / 'cipher'
+	cipherPath.write_bytes(ciphertext)
+	options = ['-v', '-k', 'lemon', '--chunk-size', str(chunkSize)] + mode
+	if skipNonLetters:
+		options.append('--skip-non-letters')
+	assert runCommand(tmp_path, ['encrypt'] + options, plainPath) == ciphertext
+	expected = referenceVigenere(ciphertext, 'LEMON', True, skipNonLetters, keepCase)
+	assert runCommand(tmp_path, ['decrypt'] + options, cipherPath) == expected
+
+@pytest.mark.parametrize('skipNonLetters', [False, True])
+@pytest.mark.parametrize('chunkSize', [1, 7, 4096])
+def test_vigenereKeystreamRangesMatchReference(tmp_path, skipNonLetters, chunkSize):
+	generator = random.Random(29)
+	ciphertext = randomBytes(generator, 1000)
+	plaintext = referenceVigenere(ciphertext, 'LEMON', True, skipNonLetters)
+	path = tmp_path / 'cipher'
+	path.write_bytes(ciphertext)
+	options = ['-v', '-k', 'lemon', '--chunk-size', str(chunkSize)]
+	if skipNonLetters:
+		options.append('--skip-non-letters')
+	for offset, length in [(0, 1000), (1, 1), (333, 400), (999, 10), (1200, 5)]:
+		arguments = ['decrypt'] + options + ['--offset', str(offset), '--length', str(length)]
+		assert runCommand(tmp_path, arguments, path) == plaintext[offset:offset + length]
+
+def test_vigenereKeystreamConventionsOfText():
+	# The position of a text is the number of characters before it, or of letters when skipping
+	for skipNonLetters, expected, position in [(False, 'LXFOPV MH OEIB', 7), (True, 'LXFOPV EF RNHR', 6)]:
+		cipher = classicCiphers.VigenereCipher('lemon', skipNonLetters)
+		cipher.prepare()
+		assert cipher.encipherText('ATTACK AT DAWN') == expected
+		assert cipher.decipherText(expected) == 'ATTACK AT DAWN'
+		assert cipher.encipherText('AT DAWN', position) == expected[7:]
+
+# Keywords of the Columnar Transposition of several widths, with repeated letters
+COLUMNAR_KEYS = ['A', 'KEY', 'ZEBRAS', 'CRYPTOGRAPHY']
+
+def columnarTexts(generator, width):
+	""" Returns random texts whose lengths are and are not multiples of the width. """
+	lengths = [width * 37, width * 37 + 1, width * 37 - 1 if width > 1 else 5, 3]
+	return [randomText(generator, length, string.ascii_uppercase + ' .,\n') for length in lengths]
+
+@pytest.mark.parametrize('key', COLUMNAR_KEYS)
+@pytest.mark.parametrize('chunkSize', [1, 7, 100])
+@pytest.mark.parametrize('jobs', [2, 3])
+@pytest.mark.parametrize('mode', [[], ['--binary']])
+def test_columnarParallelMatchesSerial(tmp_path, key, chunkSize, jobs, mode):
+	generator = random.Random(4)
+	path = tmp_path / 'input'
+	for text in columnarTexts(generator, len(key)):
+		path.write_text(text)
+		# The texts are encrypted, and decrypted as padded or unpadded ciphertexts
+		for command in ('encrypt', 'decrypt'):
+			options = [command, '-t', '-k', key, '--chunk-size', str(chunkSize)] + mode
+			assert runCommand(tmp_path, options + ['-j', str(jobs)], path) == runCommand(tmp_path, options, path)
+
+@pytest.mark.parametrize('key', COLUMNAR_KEYS)
+@pytest.mark.parametrize('chunkSize', [1, 7, 100])
+@pytest.mark.parametrize('alphabet', ['upper', 'bytes'])
+def test_columnarSpillMatchesInMemory(tmp_path, key, chunkSize, alphabet):
+	generator = random.Random(18)
+	path = tmp_path / 'input'
+	for text in columnarTexts(generator, len(key)):
+		path.write_bytes(text.lower().encode('ascii'))
+		# The texts are encrypted, and decrypted as padded or unpadded ciphertexts
+		for command in ('encrypt', 'decrypt'):
+			options = [command, '-t', '-k', key, '--chunk-size', str(chunkSize), '--alphabet', alphabet]
+			assert runCommand(tmp_path, options + ['--spill'], path) == runCommand(tmp_path, options + ['--binary'], path)
+
+# Known vectors of the Columnar Transposition, (key, plaintext, ciphertext) as written by
+# the first per-character implementation, for padded and non-ASCII texts
+COLUMNAR_VECTORS = [
+	('ZEBRAS', 'WEAREDISCOVEREDFLEEATONCE', 'EVLNXACDTXESEAXROFOXDEECXWIREE'),
+	('ZEBRAS', 'WEAREDISCOVEREDFLEEATONC', 'EVLNACDTESEAROFODEECWIRE'),
+	('KEY', 'ÉTÉ À PARIS, ÇA VA', 'TÀASÇVÉ PI  É R,AA'),
+	('CRYPTOGRAPHY', 'ATTACK AT DAWN', 'TXAW XDXKXAX XTNAXCXTXAX'),
+]
+
+@pytest.mark.parametrize('key, plaintext, ciphertext', COLUMNAR_VECTORS)
+def test_columnarKnownVectors(key, plaintext, ciphertext):
+	cipher = classicCiphers.ColumnarTranspositionCipher(key)
+	cipher.prepare()
+	assert cipher.encipherText(plaintext) == ciphertext
+	padding = -len(plaintext) % len(key)
+	assert cipher.decipherText(ciphertext) == plaintext + 'X' * padding
+
+def test_columnarUnpaddedCiphertext():
+	# Without padding, the last columns in key order are one letter shorter
+	cipher = classicCiphers.ColumnarTranspositionCipher('ZEBRAS')
+	cipher.prepare()
+	assert cipher.decipherText('EVLNACDTESEAROFODEECWIREE') == 'ECOEWADDVIRTELROEENEFSCAE'
+	cipher = classicCiphers.ColumnarTranspositionCipher('KEY')
+	cipher.prepare()
+	assert cipher.decipherText('TÀASÇVÉ PI  É R,A') == 'ÉTÉ À PARIS, ÇA V'
+
+def chainStages(names):
+	""" Returns new ciphers for the names, with the keys of the chain tests. """
+	keys = {'caesar': 3, 'affine': (5, 8), 'atbash': None, 'substitution': 'QWERTYUIOPASDFGHJKLZXCVBNM',
+		'vigenere': 'LEMON', 'transposition': 'ZEBRAS'}
+	stages = []
+	for name in names:
+		key = keys[name]
+		if name == 'affine':
+			stage = classicCiphers.AffineCipher(*key)
+		elif name == 'atbash':
+			stage = classicCiphers.AtbashCipher()
+		else:
+			stage = classicCiphers.CIPHERS[name](key)
+		stage.interactive = False
+		stages.append(stage)
+	return stages
+
+# Chains as the names of their stages, with the number of stages left once fused
+CHAINS = [
+	(['caesar', 'affine'], 1),
+	(['caesar', 'affine', 'atbash', 'caesar'], 1),
+	(['caesar', 'vigenere', 'affine', 'atbash'], 3),
+	(['affine', 'caesar', 'transposition', 'atbash', 'affine'], 3),
+	(['substitution', 'transposition', 'caesar', 'substitution'], 3),
+]
+
+@pytest.mark.parametrize('alphabet', ['upper', 'letters', 'bytes'])
+@pytest.mark.parametrize('names, fusedLength', CHAINS)
+def test_fusedChainMatchesItsStages(names, fusedLength, alphabet):
+	if alphabet == 'bytes' and 'substitution' in names:
+		pytest.skip('The Simple Substitution cipher has no bytes alphabet')
+	generator = random.Random(15)
+	chain = classicCiphers.CipherChain(chainStages(names))
+	chain.interactive = False
+	chain.alphabet = alphabet
+	chain.prepare()
+	assert len(chain.fusedStages) == fusedLength
+	stages = chainStages(names)
+	for stage in stages:
+		stage.alphabet = alphabet
+		stage.prepare()
+
+	for data, encipher, decipher in [(randomText(generator, 500), 'encipherText', 'decipherText'),
+			(randomBytes(generator, 500), 'encipherBytes', 'decipherBytes')]:
+		encrypted = decrypted = data
+		for stage in stages:
+			encrypted = getattr(stage, encipher)(encrypted)
+		for stage in reversed(stages):
+			decrypted = getattr(stage, decipher)(decrypted)
+		assert getattr(chain, encipher)(data) == encrypted
+		assert getattr(chain, decipher)(data) == decrypted
@@ -0,0 +1,179 @@
+""" test_cryptanalysis.py
+
+    Tests of the attacks of cryptanalysis.py, run with python -m pytest.
+
+"""
+
+import collections
+import io
+import random
+import string
+
+import pytest
+from click.testing import CliRunner
+
+import cipherCommands
+import classicCiphers
+import cryptanalysis
+
+def test_chooseKeyLengthWithNegativeScores():
+	scores = [(1, -0.9, 0.0, 0.0), (2, -0.5, 0.0, 0.0), (3, -0.52, 0.0, 0.0)]
+	assert cryptanalysis.chooseKeyLength(scores) == 2
+
+def test_chooseKeyLengthPrefersTheSmallestLength():
+	scores = [(1, 0.1, 0.0, 0.0), (2, 0.95, 0.0, 0.0), (3, 0.2, 0.0, 0.0), (4, 1.0, 0.0, 0.0)]
+	assert cryptanalysis.chooseKeyLength(scores) == 2
+
+@pytest.mark.parametrize('text', ['', '1234 ... !!\n'])
+def test_crackVigenereWithoutLetters(text):
+	with pytest.raises(ValueError, match='no letters'):
+		cryptanalysis.crackVigenere(io.StringIO(text), 1024)
+
+def test_crackVigenereWithFewLetters():
+	keyword, confidence, scores = cryptanalysis.crackVigenere(io.StringIO('AB'), 1024, maxKeyLength=5)
+	assert len(keyword) in range(1, 6)
+
+def test_loadNgrams(tmp_path):
+	path = tmp_path / 'bigrams.txt'
+	path.write_text('TH 30\nhe 10\nnot a count line\n')
+	n, logProbabilities = cryptanalysis.loadNgrams(str(path))
+	assert n == 2
+	assert logProbabilities[cryptanalysis.ngramIndex([7, 4])] == pytest.approx(-0.60206)
+	assert logProbabilities[0] == pytest.approx(-3.60206)
+
+@pytest.mark.parametrize('content', ['', 'no counts here\n', 'THE 0\n'])
+def test_loadNgramsWithoutCounts(tmp_path, content):
+	path = tmp_path / 'ngrams.txt'
+	path.write_text(content)
+	with pytest.raises(ValueError, match='no n-gram counts'):
+		cryptanalysis.loadNgrams(str(path))
+
+def test_swapDeltaMatchesFullRescore():
+	generator = random.Random(10)
+	n = 3
+	logProbabilities = [generator.uniform(-8.0, -1.0) for i in range(0, 26 ** n)]
+	ciphertext = ''.join(generator.choice(string.ascii_uppercase + ' .') for i in range(0, 2000))
+	scorer = cryptanalysis.SubstitutionScorer(ciphertext, n, logProbabilities)
+	mapping = list(range(0, 26))
+	generator.shuffle(mapping)
+	scorer.setMapping(mapping)
+	for trial in range(0, 300):
+		x, y = generator.sample(range(0, 26), 2)
+		delta, changes = scorer.swapDelta(x, y)
+		mapping[x], mapping[y] = mapping[y], mapping[x]
+		rescored = cryptanalysis.SubstitutionScorer(ciphertext, n, logProbabilities)
+		rescored.setMapping(mapping)
+		assert scorer.score + delta == pytest.approx(rescored.score)
+		# Half of the swaps are kept, so that the next deltas start from a changed mapping
+		if trial % 2:
+			scorer.swap(x, y, delta, changes)
+			assert scorer.contributions == pytest.approx(rescored.contributions)
+		else:
+			mapping[x], mapping[y] = mapping[y], mapping[x]
+
+PLAINTEXT = ('IT WAS THE BEST OF TIMES, IT WAS THE WORST OF TIMES, IT WAS THE AGE OF WISDOM, IT WAS THE AGE OF '
+	'FOOLISHNESS, IT WAS THE EPOCH OF BELIEF, IT WAS THE EPOCH OF INCREDULITY, IT WAS THE SEASON OF LIGHT, '
+	'IT WAS THE SEASON OF DARKNESS, IT WAS THE SPRING OF HOPE, IT WAS THE WINTER OF DESPAIR.')
+
+CRIB = 'THE SPRING OF HOPE'
+
+# The ciphers whose keys are recovered from the crib, with the key the plaintext is encrypted with
+CRIB_CIPHERS = [
+	('caesar', 11),
+	('affine', (5, 8)),
+	('atbash', None),
+	('substitution', 'QWERTYUIOPASDFGHJKLZXCVBNM'),
+	('vigenere', 'LEMON'),
+	('transposition', 'ZEBRAS'),
+]
+
+def assertKeysGiveTheCiphertext(name, plaintext, ciphertext, keys):
+	""" Checks that each key recovered without unknown letters encrypts the plaintext into the ciphertext. """
+	for position, key in keys:
+		if isinstance(key, str) and '?' in key:
+			continue
+		assert classicCiphers.encrypt(name, plaintext, key) == ciphertext
+
+@pytest.mark.parametrize('name, key', CRIB_CIPHERS)
+def test_recoverKeysFromACrib(name, key):
+	ciphertext = classicCiphers.encrypt(name, PLAINTEXT, key)
+	# The transposition pads the plaintext, which the keys recovered must give too
+	plaintext = PLAINTEXT + 'X' * (len(ciphertext) - len(PLAINTEXT))
+	position = PLAINTEXT.index(CRIB)
+	searched = cryptanalysis.recoverKeys(name, ciphertext, CRIB.lower())
+	given = cryptanalysis.recoverKeys(name, ciphertext, CRIB, position)
+	assert position in [keyPosition for keyPosition, found in searched]
+	assert given and all(keyPosition == position for keyPosition, found in given)
+	assertKeysGiveTheCiphertext(name, plaintext, ciphertext, searched + given)
+
+# The keys recovered from the crib, the column order of ZEBRAS being given by the letters from 'A'
+RECOVERED_KEYS = [
+	('caesar', 11, 11),
+	('affine', (5, 8), (5, 8)),
+	('substitution', 'QWERTYUIOPASDFGHJKLZXCVBNM', '????TYUIO????FGH?KLZ??????'),
+	('vigenere', 'LEMON', 'LEMON'),
+	('transposition', 'ZEBRAS', 'FCBDAE'),
+]
+
+@pytest.mark.parametrize('name, key, recovered', RECOVERED_KEYS)
+def test_recoverKeysNamesTheKey(name, key, recovered):
+	ciphertext = classicCiphers.encrypt(name, PLAINTEXT, key)
+	position = PLAINTEXT.index(CRIB)
+	assert cryptanalysis.recoverKeys(name, ciphertext, CRIB)[0] == (position, recovered)
+	assert cryptanalysis.recoverKeys(name, ciphertext, CRIB, position)[0] == (position, recovered)
+
+@pytest.mark.parametrize('name, key', CRIB_CIPHERS)
+def test_recoverKeysWithoutAFittingKey(name, key):
+	ciphertext = classicCiphers.encrypt(name, PLAINTEXT, key)
+	assert cryptanalysis.recoverKeys(name, ciphertext, 'ZZZZZZZZZZZZ') == []
+	# The crib one character further on than it is
+	assert cryptanalysis.recoverKeys(name, ciphertext, CRIB, PLAINTEXT.index(CRIB) + 1) == []
+
+def test_findCribs():
+	position = PLAINTEXT.index(CRIB)
+	ciphertext = classicCiphers.encrypt('substitution', PLAINTEXT, 'QWERTYUIOPASDFGHJKLZXCVBNM')
+	signature = cryptanalysis.patternSignature(ciphertext)
+	assert position in cryptanalysis.findMonoalphabeticCrib(signature, CRIB)
+	assert cryptanalysis.findMonoalphabeticCrib(signature, 'ZZZZZZZZZZZZ') == []
+	ciphertext = classicCiphers.encrypt('vigenere', PLAINTEXT, 'LEMON')
+	assert (position, 5) in cryptanalysis.findVigenereCrib(ciphertext, CRIB, 20)
+	ciphertext = classicCiphers.encrypt('transposition', PLAINTEXT, 'ZEBRAS')
+	assert (position, 6) in cryptanalysis.findColumnarCrib(ciphertext, CRIB, 20)
+
+@pytest.mark.parametrize('options', [[], ['--position', str(PLAINTEXT.index(CRIB))]])
+def test_recoverKeyCommand(tmp_path, options):
+	path = tmp_path / 'ciphertext'
+	path.write_text(classicCiphers.encrypt('vigenere', PLAINTEXT, 'LEMON'))
+	result = CliRunner().invoke(cipherCommands.classicCiphers, ['recover-key', '-v', '--crib', CRIB] + options
+		+ [str(path)])
+	assert result.exit_code == 0, result.output
+	assert '-v --key=LEMON' in result.output
+	result = CliRunner().invoke(cipherCommands.classicCiphers, ['recover-key', '-v', '--crib', 'ZZZZZZZZZZZZ']
+		+ options + [str(path)])
+	assert result.output.startswith('No key gives the crib')
+
+def ngramFile(tmp_path, text, n):
+	""" Writes the counts of the n-grams of the letters of the text, as loadNgrams reads them, and returns the path. """
+	letters = ''.join(c for c in text if c.isalpha())
+	counts = collections.Counter(letters[i:i + n] for i in range(0, len(letters) - n + 1))
+	path = tmp_path / 'ngrams.txt'
+	path.write_text(''.join('%s %d\n' % (ngram, count) for ngram, count in counts.items()))
+	return str(path)
+
+# Wordlists with the key, words giving the same shifts or column order, and other words
+DICTIONARY_ATTACKS = [
+	('vigenere', 'LEMON', ['apple', 'lemon', 'melon', 'LEMON', 'orange', 'limes', 'x1y', 'lemonlemon'],
+		('LEMON', 'lemon')),
+	('transposition', 'ZEBRAS', ['planet', 'zebras', 'orange', 'zebra', 'kitten', 'ZEBRAS', 'fcbdae'],
+		('FCBDAE', 'zebras')),
+]
+
+@pytest.mark.parametrize('name, key, words, expected', DICTIONARY_ATTACKS)
+def test_dictionaryAttackRanksTheKeyFirst(tmp_path, name, key, words, expected):
+	n, logProbabilities = cryptanalysis.loadNgrams(ngramFile(tmp_path, PLAINTEXT, 3))
+	ciphertext = classicCiphers.encrypt(name, PLAINTEXT, key)
+	results = cryptanalysis.dictionaryAttack(name, ciphertext, words, n, logProbabilities, 2, batchSize=2)
+	assert results[0][1:] == expected
+	# The words giving the key are tried once, under the first of them
+	assert [keyword for score, keyword, word in results].count(expected[0]) == 1
+	assert results == sorted(results, reverse=True)
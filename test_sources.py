@@ -0,0 +1,27 @@
+""" test_sources.py
+
+    Tests of the source files of the repository, run with python -m pytest.
+
+"""
+
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def pythonSources():
+	""" Yields the paths of the Python files of the repository, outside of hidden and cache directories. """
+	for directory, directories, files in os.walk(ROOT):
+		directories[:] = [name for name in directories if not name.startswith('.') and name != '__pycache__']
+		for name in files:
+			if name.endswith('.py'):
+				yield os.path.join(directory, name)
+
+def test_pythonSourcesUseCrlf():
+	# The Python files end their lines with CRLF, as classicCiphers.py always has
+	mixed = []
+	for path in pythonSources():
+		with open(path, 'rb') as file:
+			data = file.read()
+		if data.count(b'\n') != data.count(b'\r\n'):
+			mixed.append(os.path.relpath(path, ROOT))
+	assert mixed == []
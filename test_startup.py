@@ -0,0 +1,72 @@
+""" test_startup.py
+
+    Tests that the command-line tool starts without the modules it
+    only loads on demand, run with python -m pytest. The startup time
+    itself depends on the machine, so it is only checked here against
+    budgets several times what it takes, to catch an eager import of
+    a heavy module. The tight budgets are checked by running
+    benchmarks/startup.py.
+
+"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Milliseconds the import of classicCiphers may take, cumulated over
+# the modules it imports: usually 10 to 30, and over 100 with NumPy
+IMPORT_BUDGET = 100
+
+def loadStartupBenchmark():
+	""" Returns the benchmarks/startup.py module, for its list of lazy modules. """
+	spec = importlib.util.spec_from_file_location('startup', os.path.join(ROOT, 'benchmarks', 'startup.py'))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+
+def test_importLoadsNoLazyModule():
+	assert loadStartupBenchmark().loadedLazyModules() == []
+
+def test_fastPathLoadsNoLazyModule(tmp_path):
+	inputPath = tmp_path / 'input.txt'
+	outputPath = tmp_path / 'output.txt'
+	inputPath.write_text('Attack at dawn\n')
+	outputPath.write_text('')
+	lazyModules = loadStartupBenchmark().LAZY_MODULES + ['cipherCommands']
+	code = ('import sys, classicCiphers\n'
+		'assert classicCiphers.runFast(sys.argv[1:])\n'
+		'print(" ".join(m for m in %r if m in sys.modules))' % lazyModules)
+	result = subprocess.run([sys.executable, '-c', code, 'encrypt', '-v', '-k', 'lemon', str(inputPath),
+		str(outputPath)], cwd=ROOT, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+	assert result.stdout.split() == []
+	assert outputPath.read_text() == 'LXFOPV MH OEIB\n'
+
+def test_importWithinBudget():
+	benchmark = loadStartupBenchmark()
+	times = []
+	# The best of a few runs, as the first one may compile the modules
+	for run in range(0, 3):
+		imports = benchmark.slowestImports(100, dict(os.environ))
+		times.append(next(milliseconds for milliseconds, module in imports if module == 'classicCiphers'))
+	assert min(times) < IMPORT_BUDGET
+
+def test_fastPathFasterThanClick(tmp_path):
+	inputPath = tmp_path / 'input.txt'
+	outputPath = tmp_path / 'output.txt'
+	inputPath.write_text('Attack at dawn\n')
+	outputPath.write_text('')
+	arguments = [sys.executable, '-m', 'classicCiphers', 'encrypt', '-c', '-k', '3', str(inputPath), str(outputPath)]
+	times = {}
+	# --chunk-size is not handled by the fast path, so click is used
+	for name, command in (('fast', arguments), ('click', arguments[:-2] + ['--chunk-size', '4096'] + arguments[-2:])):
+		runs = []
+		for run in range(0, 3):
+			start = time.perf_counter()
+			subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+			runs.append(time.perf_counter() - start)
+		times[name] = min(runs)
+	assert times['fast'] < times['click']